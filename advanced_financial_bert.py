@@ -22,20 +22,27 @@ from transformers import (
 )
 from peft import LoraConfig, get_peft_model, PeftModel
 import numpy as np
-from typing import Dict, List, Tuple, Any, Optional
-import re
+from typing import Dict, List, Tuple, Any, Optional, Union
 from datetime import datetime
 import json
 import os
 import logging
+import threading
 from dataclasses import dataclass
 import warnings
 warnings.filterwarnings("ignore")
 
+from financial_patterns import FinancialPatternSet, FinancialScan
+from keyword_matcher import KeywordAutomaton, KeywordScan
+from risk_cache import RiskResultCache
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Arquivo que identifica um checkpoint com os adapters LoRA já mesclados
+MERGED_CHECKPOINT_MARKER = "ddai_merged.json"
+
 @dataclass
 class RiskAssessmentResult:
     """Resultado estruturado da análise de risco"""
@@ -62,7 +69,12 @@ class AdvancedFinancialBERT:
     def __init__(self, 
                  model_name: str = "neuralmind/bert-base-portuguese-cased",
                  use_qlora: bool = True,
-                 load_pretrained_adapter: Optional[str] = None):
+                 load_pretrained_adapter: Optional[str] = None,
+                 inference_only: bool = False,
+                 inference_backend: str = "torch",
+                 onnx_model_dir: Optional[str] = None,
+                 onnx_quantize: bool = True,
+                 result_cache: Optional[RiskResultCache] = None):
         """
         Inicializa o modelo avançado com QLoRA optimization
         
@@ -70,15 +82,43 @@ class AdvancedFinancialBERT:
             model_name: Nome do modelo base (FinBERT-PT-BR recommended)
             use_qlora: Ativar otimização QLoRA
             load_pretrained_adapter: Caminho para adapter pré-treinado
+            inference_only: Modelo não será treinado; mescla os adapters LoRA nos
+                pesos base ao carregar (remove o custo dos adapters por camada)
+            inference_backend: "torch" (padrão) ou "onnx" (ONNX Runtime em CPU)
+            onnx_model_dir: Diretório do modelo ONNX exportado (exporta se não existir)
+            onnx_quantize: Aplicar quantização dinâmica int8 na exportação ONNX
+            result_cache: Cache de predições por conteúdo (None = sem cache)
         """
+        if inference_backend not in ("torch", "onnx"):
+            raise ValueError(f"Backend de inferência inválido: {inference_backend}")
+        
         self.model_name = model_name
         self.use_qlora = use_qlora
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.load_pretrained_adapter = load_pretrained_adapter
+        self.adapter_version = self._compute_adapter_version(load_pretrained_adapter)
+        self.result_cache = result_cache
+        self.inference_only = inference_only
+        self.lora_merged = False
+        self.inference_backend = inference_backend
+        self.onnx_model_dir = onnx_model_dir or os.path.join(
+            "onnx_models", model_name.strip("/").replace("/", "__")
+        )
+        self.onnx_quantize = onnx_quantize
+        self.onnx_session = None
+        self._checkpoint_hash = None
+        
+        # Sobreposição (em tokens) entre janelas consecutivas no modo documento longo
+        self.window_stride = 128
+        
+        # Métricas de padding do caminho em lote
+        self.padding_stats = {"batches": 0, "real_tokens": 0, "padded_tokens": 0}
+        self._padding_lock = threading.Lock()
+        self.device = torch.device("cuda" if torch.cuda.is_available() and inference_backend == "torch" else "cpu")
         
         logger.info(f"🚀 Inicializando Advanced DD-AI v2.1 no dispositivo: {self.device}")
         
         # Configuração QLoRA para eficiência de memória
-        if use_qlora and torch.cuda.is_available():
+        if use_qlora and self.device.type == "cuda":
             self.bnb_config = BitsAndBytesConfig(
                 load_in_4bit=True,
                 bnb_4bit_quant_type="nf4",  # NormalFloat4 para melhor precisão
@@ -88,7 +128,7 @@ class AdvancedFinancialBERT:
             logger.info("✅ QLoRA configurado - Redução de memória: ~75%")
         else:
             self.bnb_config = None
-            if use_qlora and not torch.cuda.is_available():
+            if use_qlora and self.device.type != "cuda":
                 logger.warning("⚠️ QLoRA requer GPU. Usando modo LoRA padrão em CPU.")
             
         # Configuração LoRA otimizada para tarefas financeiras
@@ -107,6 +147,12 @@ class AdvancedFinancialBERT:
         # Padrões brasileiros específicos para compliance
         self.brazilian_compliance_patterns = self._init_compliance_patterns()
         
+        # Regex compiladas uma única vez + passada fundida de normalização/extração
+        self.financial_patterns = FinancialPatternSet(self.brazilian_compliance_patterns)
+        
+        # Autômato único com todas as listas de palavras-chave (uma passada por documento)
+        self.keyword_automaton = KeywordAutomaton(self._keyword_categories())
+        
         # Risk assessment classes
         self.risk_classes = {
             0: "BAIXO",
@@ -119,12 +165,25 @@ class AdvancedFinancialBERT:
     
     def _initialize_model(self):
         """Inicializa modelo com QLoRA optimization"""
+        # Backend ONNX: reutilizar exportação existente, sem carregar o PyTorch
+        if self.inference_backend == "onnx" and self._load_onnx_backend():
+            return
+        
         try:
             # Tokenizer
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
             
+            # Checkpoint pré-mesclado (ver save_merged_checkpoint): carregar sem LoRA
+            if self._is_merged_checkpoint(self.model_name):
+                self.model = AutoModelForSequenceClassification.from_pretrained(
+                    self.model_name,
+                    num_labels=4,
+                    torch_dtype=torch.float32
+                ).to(self.device)
+                self.lora_merged = True
+                logger.info("✅ Checkpoint pré-mesclado (base + LoRA) carregado")
             # Modelo base com quantização (se GPU disponível)
-            if self.use_qlora and self.bnb_config:
+            elif self.use_qlora and self.bnb_config:
                 base_model = AutoModelForSequenceClassification.from_pretrained(
                     self.model_name,
                     quantization_config=self.bnb_config,
@@ -134,7 +193,7 @@ class AdvancedFinancialBERT:
                 )
                 
                 # Aplicar LoRA
-                self.model = get_peft_model(base_model, self.lora_config)
+                self.model = self._apply_lora(base_model)
                 logger.info("✅ Modelo QLoRA carregado com sucesso")
             elif self.use_qlora:
                 # LoRA sem quantização para CPU
@@ -145,7 +204,7 @@ class AdvancedFinancialBERT:
                 ).to(self.device)
                 
                 # Aplicar LoRA
-                self.model = get_peft_model(base_model, self.lora_config)
+                self.model = self._apply_lora(base_model)
                 logger.info("✅ Modelo LoRA (CPU) carregado com sucesso")
             else:
                 # Modelo padrão para CPU ou sem QLoRA
@@ -160,6 +219,119 @@ class AdvancedFinancialBERT:
             logger.error(f"❌ Erro ao inicializar modelo: {e}")
             # Fallback para modelo básico
             self._fallback_initialization()
+        
+        # Modo somente inferência: remover adapters do caminho crítico
+        if self.inference_only:
+            self.merge_adapters()
+        
+        if self.inference_backend == "onnx":
+            self.export_onnx(self.onnx_model_dir, quantize=self.onnx_quantize)
+            self._load_onnx_backend()
+    
+    def export_onnx(self, output_dir: str, quantize: bool = True) -> str:
+        """
+        Exporta o modelo atual (base + LoRA mesclados) para ONNX
+        
+        Args:
+            output_dir: Diretório de saída
+            quantize: Aplicar quantização dinâmica int8
+            
+        Returns:
+            Caminho do arquivo .onnx gerado
+        """
+        from onnx_inference import export_to_onnx
+        
+        # Mesclar adapters LoRA nos pesos base antes de exportar
+        self.merge_adapters()
+        
+        return export_to_onnx(
+            self.model, self.tokenizer, output_dir, quantize=quantize, source=self._onnx_source()
+        )
+    
+    def _onnx_source(self) -> Dict[str, str]:
+        """Origem do modelo registrada na exportação ONNX (modelo, adapter e checkpoint)"""
+        from onnx_inference import checkpoint_hash
+        
+        if self._checkpoint_hash is None:
+            self._checkpoint_hash = checkpoint_hash(self.model_name)
+        return {
+            "model_name": self.model_name,
+            "adapter_version": self.adapter_version,
+            "checkpoint_hash": self._checkpoint_hash
+        }
+    
+    def _apply_lora(self, base_model):
+        """Aplica adapter pré-treinado (se informado) ou um novo adapter LoRA"""
+        if self.load_pretrained_adapter:
+            logger.info(f"📂 Carregando adapter pré-treinado: {self.load_pretrained_adapter}")
+            return PeftModel.from_pretrained(
+                base_model, self.load_pretrained_adapter, is_trainable=not self.inference_only
+            )
+        return get_peft_model(base_model, self.lora_config)
+    
+    def merge_adapters(self) -> bool:
+        """
+        Mescla os adapters LoRA nos pesos base (merge_and_unload)
+        
+        Após o merge o forward pass não paga mais as multiplicações extras
+        dos adapters em query/key/value/dense. O modelo deixa de ser treinável
+        via LoRA, portanto use apenas para inferência.
+        
+        Returns:
+            True se o modelo está mesclado ao final da chamada
+        """
+        if self.lora_merged or not isinstance(self.model, PeftModel):
+            return self.lora_merged
+        
+        if self.bnb_config is not None:
+            # Mesclar em pesos 4-bit reintroduz erro de quantização
+            logger.warning("⚠️ Merge LoRA não suportado em pesos 4-bit (QLoRA). Mantendo adapters.")
+            return False
+        
+        self.model = self.model.merge_and_unload()
+        self.model.eval()
+        self.lora_merged = True
+        logger.info("✅ Adapters LoRA mesclados nos pesos base")
+        return True
+    
+    def save_merged_checkpoint(self, output_dir: str) -> str:
+        """Salva um checkpoint pré-mesclado (base + LoRA) para carregar direto em produção"""
+        if not self.merge_adapters() and isinstance(self.model, PeftModel):
+            raise ValueError("Não foi possível mesclar os adapters LoRA deste modelo")
+        
+        os.makedirs(output_dir, exist_ok=True)
+        self.model.save_pretrained(output_dir)
+        self.tokenizer.save_pretrained(output_dir)
+        with open(os.path.join(output_dir, MERGED_CHECKPOINT_MARKER), "w", encoding="utf-8") as f:
+            json.dump({
+                "base_model": self.model_name,
+                "adapter": self.load_pretrained_adapter,
+                "merged_at": datetime.now().isoformat()
+            }, f, indent=2)
+        
+        logger.info(f"💾 Checkpoint mesclado salvo em: {output_dir}")
+        return output_dir
+    
+    @staticmethod
+    def _is_merged_checkpoint(model_name: str) -> bool:
+        return os.path.isfile(os.path.join(model_name, MERGED_CHECKPOINT_MARKER))
+    
+    def _load_onnx_backend(self) -> bool:
+        """Carrega a sessão ONNX Runtime de `onnx_model_dir`, se exportada desta origem e quantização"""
+        from onnx_inference import OnnxRiskClassifier, find_exported_model
+        
+        model_path = find_exported_model(
+            self.onnx_model_dir, quantize=self.onnx_quantize, source=self._onnx_source()
+        )
+        if model_path is None:
+            return False
+        
+        self.tokenizer = AutoTokenizer.from_pretrained(self.onnx_model_dir)
+        self.onnx_session = OnnxRiskClassifier(model_path)
+        # O modelo PyTorch não é mais necessário para servir
+        self.model = None
+        logger.info("✅ Backend ONNX Runtime ativo")
+        return True
     
     def _fallback_initialization(self):
         """Inicialização de fallback em caso de erro"""
@@ -207,160 +379,420 @@ class AdvancedFinancialBERT:
             'prsac_indicators': [
                 'risco socioambiental', 'mudança climática', 'impacto ambiental',
                 'responsabilidade climática', 'sustentabilidade financeira'
-            ]
+            ],
+            
+            # Fatores de risco por categoria
+            'risk_categories': {
+                'OPERACIONAL': ['falha', 'erro', 'sistema indisponível', 'interrupção'],
+                'CRÉDITO': ['inadimplência', 'calote', 'atraso pagamento', 'insolvência'],
+                'MERCADO': ['volatilidade', 'oscilação', 'queda', 'perda'],
+                'LIQUIDEZ': ['falta de liquidez', 'dificuldade pagamento', 'fluxo caixa'],
+                'REGULATÓRIO': ['autuação', 'multa', 'infração', 'penalidade']
+            }
+        }
+    
+    def _keyword_categories(self) -> Dict[str, List[str]]:
+        """Todas as listas de palavras-chave, por categoria, para o autômato"""
+        patterns = self.brazilian_compliance_patterns
+        categories = {
+            name: patterns[name]
+            for name in ('suspicious_keywords', 'regulated_entities', 'esg_indicators', 'prsac_indicators')
         }
+        for category, keywords in patterns['risk_categories'].items():
+            categories[f"risk:{category}"] = keywords
+        return categories
     
-    def analyze_risk(self, text: str, include_explanation: bool = True) -> RiskAssessmentResult:
+    def _scan_keywords(self, text: str) -> KeywordScan:
+        """Varredura única do texto com o autômato de palavras-chave"""
+        return self.keyword_automaton.scan(text)
+    
+    def analyze_risk(self, text: str, include_explanation: bool = True,
+                     long_document: bool = False, pooling: str = "max") -> RiskAssessmentResult:
         """
         Análise de risco financeiro com compliance brasileiro
         
         Args:
             text: Texto para análise
             include_explanation: Incluir explicação detalhada
+            long_document: Analisar o texto inteiro em janelas deslizantes
+            pooling: Agregação dos logits das janelas ("max" ou "mean")
             
         Returns:
             RiskAssessmentResult com análise completa
         """
+        return self.analyze_risk_batch(
+            [text], batch_size=1, include_explanation=include_explanation,
+            long_document=long_document, pooling=pooling
+        )[0]
+    
+    def analyze_risk_batch(self, texts: List[str], batch_size: int = 16,
+                           include_explanation: bool = True,
+                           long_document: bool = False,
+                           pooling: str = "max") -> List[RiskAssessmentResult]:
+        """
+        Análise de risco em lote: um forward pass por micro-batch
+        
+        Os textos são ordenados pelo comprimento em tokens antes de formar os
+        micro-batches (buckets de tamanho parecido), e cada micro-batch recebe
+        padding dinâmico apenas até o seu maior item. A ordem original é
+        restaurada na saída. O pós-processamento (regex, palavras-chave,
+        explicação) continua sendo feito por item.
+        
+        Com `long_document=True` cada texto é dividido em janelas de tokens
+        sobrepostas (ver `_predict_long_documents`) em vez de truncado em 512.
+        Se houver `result_cache`, apenas os textos ausentes do cache passam
+        pelo modelo.
+        
+        Args:
+            texts: Lista de textos para análise
+            batch_size: Quantidade de textos (ou janelas) por forward pass
+            include_explanation: Incluir explicação detalhada
+            long_document: Analisar cada texto inteiro em janelas deslizantes
+            pooling: Agregação dos logits das janelas ("max" ou "mean")
+            
+        Returns:
+            Lista de RiskAssessmentResult na mesma ordem de `texts`
+        """
+        batch_size = max(1, batch_size)
+        results: List[Optional[RiskAssessmentResult]] = [None] * len(texts)
+        
         try:
-            # Preprocessing especializado
-            processed_text = self._preprocess_financial_text(text)
+            if long_document and pooling not in ("max", "mean"):
+                raise ValueError(f"Pooling inválido: {pooling} (use 'max' ou 'mean')")
             
-            # Tokenização
-            inputs = self.tokenizer(
-                processed_text,
-                return_tensors="pt",
-                padding=True,
+            # Preprocessing especializado (a mesma passada já extrai as entidades)
+            pattern_scans = [self.financial_patterns.scan(text) for text in texts]
+            processed_texts = [scan.normalized_text for scan in pattern_scans]
+        except Exception as e:
+            logger.error(f"❌ Erro na análise de risco: {e}")
+            return [self._create_error_result(str(e)) for _ in texts]
+        
+        # Cache de predições: só os textos ausentes vão para o modelo
+        pending = list(range(len(texts)))
+        cache_keys: List[str] = []
+        if self.result_cache is not None:
+            cache_keys = [
+                self._cache_key(processed_text, long_document, pooling)
+                for processed_text in processed_texts
+            ]
+            pending = []
+            for i, key in enumerate(cache_keys):
+                cached = self.result_cache.get(key)
+                if cached is None:
+                    pending.append(i)
+                else:
+                    results[i] = self._build_risk_result(
+                        texts[i], cached["predicted_class"], cached["confidence"], include_explanation,
+                        pattern_scans[i]
+                    )
+        
+        if pending:
+            pending_texts = [processed_texts[i] for i in pending]
+            if long_document:
+                predictions = self._predict_long_documents(pending_texts, batch_size, pooling)
+            else:
+                predictions = self._predict_texts(pending_texts, batch_size)
+            
+            for i, prediction in zip(pending, predictions):
+                if isinstance(prediction, Exception):
+                    results[i] = self._create_error_result(str(prediction))
+                    continue
+                
+                predicted_class, confidence = prediction
+                if self.result_cache is not None:
+                    self.result_cache.set(
+                        cache_keys[i], {"predicted_class": predicted_class, "confidence": confidence}
+                    )
+                results[i] = self._build_risk_result(
+                    texts[i], predicted_class, confidence, include_explanation, pattern_scans[i]
+                )
+        
+        return results
+    
+    def _predict_texts(self, processed_texts: List[str],
+                       batch_size: int) -> List[Union[Tuple[int, float], Exception]]:
+        """Predição (classe, confiança) por texto, com micro-batches por comprimento"""
+        try:
+            # Tokenização sem padding para conhecer o comprimento real de cada texto
+            encodings = self.tokenizer(
+                processed_texts,
                 truncation=True,
                 max_length=512
-            ).to(self.device)
-            
-            # Predição
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                probabilities = F.softmax(outputs.logits, dim=-1)
-                predicted_class = torch.argmax(probabilities, dim=-1).item()
-                confidence = probabilities[0][predicted_class].item()
-            
-            # Análise de entidades financeiras
-            financial_entities = self._extract_financial_entities(text)
-            
-            # Detecção de red flags regulatórios
-            compliance_flags = self._detect_compliance_flags(text)
-            risk_factors = self._identify_risk_factors(text)
-            regulatory_alerts = self._check_regulatory_alerts(text)
-            
-            # Explicação (se solicitada)
-            explanation = ""
-            if include_explanation:
-                explanation = self._generate_explanation(
-                    text, predicted_class, confidence, risk_factors
+            )
+        except Exception as e:
+            logger.error(f"❌ Erro na análise de risco: {e}")
+            return [e] * len(processed_texts)
+        
+        predictions: List[Union[Tuple[int, float], Exception, None]] = [None] * len(processed_texts)
+        lengths = [len(input_ids) for input_ids in encodings["input_ids"]]
+        order = sorted(range(len(processed_texts)), key=lambda i: lengths[i])
+        
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            try:
+                # Padding dinâmico apenas até o maior item do bucket
+                features = [
+                    {key: encodings[key][i] for key in encodings.keys()}
+                    for i in batch_indices
+                ]
+                inputs = self.tokenizer.pad(features, return_tensors="pt").to(self.device)
+                self._record_padding(
+                    sum(lengths[i] for i in batch_indices), inputs["input_ids"].numel()
                 )
-            
-            return RiskAssessmentResult(
-                risk_level=self.risk_classes[predicted_class],
-                confidence_score=confidence,
-                risk_factors=risk_factors,
-                compliance_flags=compliance_flags,
-                explanation=explanation,
-                financial_entities=financial_entities,
-                regulatory_alerts=regulatory_alerts
+                
+                # Predição
+                with torch.no_grad():
+                    logits = self._forward_logits(inputs)
+                    probabilities = F.softmax(logits, dim=-1)
+                    confidences, predicted_classes = torch.max(probabilities, dim=-1)
+                
+                for i, predicted_class, confidence in zip(
+                    batch_indices, predicted_classes.tolist(), confidences.tolist()
+                ):
+                    predictions[i] = (predicted_class, confidence)
+                    
+            except Exception as e:
+                logger.error(f"❌ Erro na análise de risco: {e}")
+                for i in batch_indices:
+                    predictions[i] = e
+        
+        return predictions
+    
+    def _predict_long_documents(self, processed_texts: List[str], batch_size: int,
+                                pooling: str) -> List[Union[Tuple[int, float], Exception]]:
+        """
+        Modo documento longo: janelas de tokens sobrepostas por documento
+        
+        Cada documento é dividido em janelas de até 512 tokens com sobreposição
+        de `window_stride` tokens. Todas as janelas de um documento entram no
+        mesmo forward pass (documentos são agrupados até completar `batch_size`
+        janelas) e os logits das janelas são agregados por max ou mean pooling
+        (validado em `analyze_risk_batch`).
+        """
+        try:
+            encodings = self.tokenizer(
+                processed_texts,
+                truncation=True,
+                max_length=512,
+                stride=self.window_stride,
+                return_overflowing_tokens=True
             )
-            
         except Exception as e:
             logger.error(f"❌ Erro na análise de risco: {e}")
-            return self._create_error_result(str(e))
+            return [e] * len(processed_texts)
+        
+        predictions: List[Union[Tuple[int, float], Exception, None]] = [None] * len(processed_texts)
+        
+        # Janelas de cada documento
+        windows_by_doc: Dict[int, List[int]] = {}
+        for window_index, doc_index in enumerate(encodings["overflow_to_sample_mapping"]):
+            windows_by_doc.setdefault(doc_index, []).append(window_index)
+        feature_keys = [key for key in ("input_ids", "attention_mask", "token_type_ids") if key in encodings]
+        
+        # Agrupar documentos inteiros até completar batch_size janelas
+        doc_groups: List[List[int]] = []
+        current: List[int] = []
+        current_windows = 0
+        for doc_index in range(len(processed_texts)):
+            n_windows = len(windows_by_doc.get(doc_index, []))
+            if current and current_windows + n_windows > batch_size:
+                doc_groups.append(current)
+                current, current_windows = [], 0
+            current.append(doc_index)
+            current_windows += n_windows
+        if current:
+            doc_groups.append(current)
+        
+        for doc_indices in doc_groups:
+            try:
+                window_indices = [w for d in doc_indices for w in windows_by_doc.get(d, [])]
+                features = [
+                    {key: encodings[key][w] for key in feature_keys}
+                    for w in window_indices
+                ]
+                inputs = self.tokenizer.pad(features, return_tensors="pt").to(self.device)
+                self._record_padding(
+                    sum(len(encodings["input_ids"][w]) for w in window_indices),
+                    inputs["input_ids"].numel()
+                )
+                
+                with torch.no_grad():
+                    window_logits = self._forward_logits(inputs)
+                
+                offset = 0
+                for doc_index in doc_indices:
+                    n_windows = len(windows_by_doc.get(doc_index, []))
+                    doc_logits = window_logits[offset:offset + n_windows]
+                    offset += n_windows
+                    
+                    pooled = doc_logits.max(dim=0).values if pooling == "max" else doc_logits.mean(dim=0)
+                    probabilities = F.softmax(pooled, dim=-1)
+                    confidence, predicted_class = torch.max(probabilities, dim=-1)
+                    predictions[doc_index] = (predicted_class.item(), confidence.item())
+                    
+            except Exception as e:
+                logger.error(f"❌ Erro na análise de risco: {e}")
+                for doc_index in doc_indices:
+                    predictions[doc_index] = e
+        
+        return predictions
     
-    def _preprocess_financial_text(self, text: str) -> str:
-        """Preprocessing especializado para textos financeiros brasileiros"""
-        # Normalização de valores monetários
-        text = re.sub(r'R\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)', r'VALOR_MONETARIO_\1', text)
+    def _cache_key(self, processed_text: str, long_document: bool, pooling: str) -> str:
+        """Chave do cache: texto pré-processado + modelo + versão do adapter + opções"""
+        # ONNX fp32 e int8 produzem predições diferentes: vale o modelo efetivamente carregado
+        onnx_quantize = None
+        if self.inference_backend == "onnx":
+            onnx_quantize = self.onnx_session.quantized if self.onnx_session is not None else self.onnx_quantize
+        return RiskResultCache.make_key(
+            processed_text,
+            self.model_name,
+            self.adapter_version,
+            backend=self.inference_backend,
+            onnx_quantize=onnx_quantize,
+            long_document=long_document,
+            pooling=pooling if long_document else None,
+            window_stride=self.window_stride if long_document else None
+        )
+    
+    @staticmethod
+    def _compute_adapter_version(adapter_path: Optional[str]) -> str:
+        """Identifica a versão do adapter pelo caminho e pelos arquivos de pesos"""
+        if not adapter_path:
+            return "no-adapter"
+        
+        parts = [os.path.abspath(adapter_path)]
+        for filename in ("adapter_model.safetensors", "adapter_model.bin"):
+            weights_path = os.path.join(adapter_path, filename)
+            if os.path.isfile(weights_path):
+                stat = os.stat(weights_path)
+                parts.append(f"{filename}:{stat.st_size}:{int(stat.st_mtime)}")
+        return "|".join(parts)
+    
+    def _record_padding(self, real_tokens: int, padded_tokens: int):
+        """Acumula tokens reais x tokens processados (com padding) por micro-batch"""
+        with self._padding_lock:
+            self.padding_stats["batches"] += 1
+            self.padding_stats["real_tokens"] += real_tokens
+            self.padding_stats["padded_tokens"] += padded_tokens
+    
+    def get_padding_efficiency(self) -> Dict[str, Any]:
+        """Eficiência de padding: fração dos tokens processados que são tokens reais"""
+        with self._padding_lock:
+            stats = dict(self.padding_stats)
+        stats["padding_efficiency"] = (
+            stats["real_tokens"] / stats["padded_tokens"] if stats["padded_tokens"] else 1.0
+        )
+        return stats
+    
+    def _forward_logits(self, inputs) -> torch.Tensor:
+        """Forward pass no backend ativo (PyTorch ou ONNX Runtime)"""
+        if self.onnx_session is not None:
+            return self.onnx_session(**inputs)
+        return self.model(**inputs).logits
+    
+    def _build_risk_result(self, text: str, predicted_class: int, confidence: float,
+                           include_explanation: bool,
+                           pattern_scan: Optional[FinancialScan] = None) -> RiskAssessmentResult:
+        """Monta o resultado a partir da predição e das regras de compliance"""
+        # Uma única varredura de palavras-chave para todas as categorias
+        keyword_scan = self._scan_keywords(text)
+        pattern_scan = pattern_scan or self.financial_patterns.scan(text)
+        
+        # Análise de entidades financeiras
+        financial_entities = self._extract_financial_entities(text, keyword_scan, pattern_scan)
         
-        # Normalização de documentos
-        text = re.sub(self.brazilian_compliance_patterns['cpf'], 'CPF_NORMALIZADO', text)
-        text = re.sub(self.brazilian_compliance_patterns['cnpj'], 'CNPJ_NORMALIZADO', text)
+        # Detecção de red flags regulatórios
+        compliance_flags = self._detect_compliance_flags(text, keyword_scan, pattern_scan)
+        risk_factors = self._identify_risk_factors(text, keyword_scan)
+        regulatory_alerts = self._check_regulatory_alerts(text, keyword_scan)
         
-        # Normalização de datas
-        text = re.sub(r'\d{1,2}/\d{1,2}/\d{4}', 'DATA_NORMALIZADA', text)
+        # Explicação (se solicitada)
+        explanation = ""
+        if include_explanation:
+            explanation = self._generate_explanation(
+                text, predicted_class, confidence, risk_factors, keyword_scan
+            )
         
-        return text.strip()
+        return RiskAssessmentResult(
+            risk_level=self.risk_classes[predicted_class],
+            confidence_score=confidence,
+            risk_factors=risk_factors,
+            compliance_flags=compliance_flags,
+            explanation=explanation,
+            financial_entities=financial_entities,
+            regulatory_alerts=regulatory_alerts
+        )
+    
+    def _preprocess_financial_text(self, text: str) -> str:
+        """Preprocessing especializado para textos financeiros brasileiros"""
+        # Valores monetários, CNPJ, CPF e datas normalizados em uma única passada
+        return self.financial_patterns.scan(text).normalized_text
     
-    def _extract_financial_entities(self, text: str) -> Dict[str, List[str]]:
+    def _extract_financial_entities(self, text: str,
+                                    keyword_scan: Optional[KeywordScan] = None,
+                                    pattern_scan: Optional[FinancialScan] = None) -> Dict[str, List[str]]:
         """Extrai entidades financeiras do texto"""
+        keyword_scan = keyword_scan or self._scan_keywords(text)
+        pattern_scan = pattern_scan or self.financial_patterns.scan(text)
         entities = {
-            'cpfs': re.findall(self.brazilian_compliance_patterns['cpf'], text),
-            'cnpjs': re.findall(self.brazilian_compliance_patterns['cnpj'], text),
-            'valores': re.findall(self.brazilian_compliance_patterns['currency_brl'], text),
+            'cpfs': pattern_scan.cpfs,
+            'cnpjs': pattern_scan.cnpjs,
+            'valores': pattern_scan.valores,
             'bancos': [],
-            'instituicoes': []
+            'instituicoes': keyword_scan.found('regulated_entities')
         }
         
-        # Busca por nomes de bancos e instituições
-        text_lower = text.lower()
-        for entity in self.brazilian_compliance_patterns['regulated_entities']:
-            if entity in text_lower:
-                entities['instituicoes'].append(entity)
-        
         return entities
     
-    def _detect_compliance_flags(self, text: str) -> List[str]:
+    def _detect_compliance_flags(self, text: str,
+                                 keyword_scan: Optional[KeywordScan] = None,
+                                 pattern_scan: Optional[FinancialScan] = None) -> List[str]:
         """Detecta flags de compliance regulatório"""
-        flags = []
-        text_lower = text.lower()
+        keyword_scan = keyword_scan or self._scan_keywords(text)
+        pattern_scan = pattern_scan or self.financial_patterns.scan(text)
         
         # Red flags de lavagem de dinheiro
-        for keyword in self.brazilian_compliance_patterns['suspicious_keywords']:
-            if keyword in text_lower:
-                flags.append(f"RED_FLAG: {keyword}")
+        flags = [f"RED_FLAG: {keyword}" for keyword in keyword_scan.found('suspicious_keywords')]
         
         # Valores altos (>= R$ 50.000)
-        large_amounts = re.findall(self.brazilian_compliance_patterns['large_amounts'], text)
+        large_amounts = pattern_scan.large_amounts
         if large_amounts:
             flags.append(f"VALOR_ALTO: {len(large_amounts)} transações suspeitas")
         
         return flags
     
-    def _identify_risk_factors(self, text: str) -> List[str]:
+    def _identify_risk_factors(self, text: str,
+                               keyword_scan: Optional[KeywordScan] = None) -> List[str]:
         """Identifica fatores de risco específicos"""
-        risk_factors = []
-        text_lower = text.lower()
-        
-        # Fatores de risco por categoria
-        risk_categories = {
-            'OPERACIONAL': ['falha', 'erro', 'sistema indisponível', 'interrupção'],
-            'CRÉDITO': ['inadimplência', 'calote', 'atraso pagamento', 'insolvência'],
-            'MERCADO': ['volatilidade', 'oscilação', 'queda', 'perda'],
-            'LIQUIDEZ': ['falta de liquidez', 'dificuldade pagamento', 'fluxo caixa'],
-            'REGULATÓRIO': ['autuação', 'multa', 'infração', 'penalidade']
-        }
+        keyword_scan = keyword_scan or self._scan_keywords(text)
         
-        for category, keywords in risk_categories.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    risk_factors.append(f"{category}: {keyword}")
-        
-        return list(set(risk_factors))
+        return [
+            f"{category}: {keyword}"
+            for category in self.brazilian_compliance_patterns['risk_categories']
+            for keyword in keyword_scan.found(f"risk:{category}")
+        ]
     
-    def _check_regulatory_alerts(self, text: str) -> List[str]:
+    def _check_regulatory_alerts(self, text: str,
+                                 keyword_scan: Optional[KeywordScan] = None) -> List[str]:
         """Verifica alertas regulatórios CVM/BACEN"""
+        keyword_scan = keyword_scan or self._scan_keywords(text)
         alerts = []
-        text_lower = text.lower()
         
         # CVM Resolution 193 (ESG/Sustainability)
-        esg_found = [indicator for indicator in self.brazilian_compliance_patterns['esg_indicators'] 
-                     if indicator in text_lower]
+        esg_found = keyword_scan.found('esg_indicators')
         if esg_found:
             alerts.append(f"CVM_RES_193: Indicadores ESG encontrados - {', '.join(esg_found)}")
         
         # BACEN Resolution 4,945/21 (PRSAC)
-        prsac_found = [indicator for indicator in self.brazilian_compliance_patterns['prsac_indicators'] 
-                       if indicator in text_lower]
+        prsac_found = keyword_scan.found('prsac_indicators')
         if prsac_found:
             alerts.append(f"BACEN_RES_4945: Indicadores PRSAC - {', '.join(prsac_found)}")
         
         return alerts
     
     def _generate_explanation(self, text: str, predicted_class: int, 
-                            confidence: float, risk_factors: List[str]) -> str:
+                            confidence: float, risk_factors: List[str],
+                            keyword_scan: Optional[KeywordScan] = None) -> str:
         """Gera explicação detalhada da análise"""
         risk_level = self.risk_classes[predicted_class]
         
@@ -379,6 +811,13 @@ class AdvancedFinancialBERT:
         else:
             explanation += "• Nenhum fator de risco específico identificado\n"
         
+        # Onde cada termo foi encontrado (offset da primeira ocorrência)
+        evidence = keyword_scan.evidence(limit=5) if keyword_scan else []
+        if evidence:
+            explanation += "\n📍 EVIDÊNCIAS NO TEXTO:\n"
+            for offset, category, keyword in evidence:
+                explanation += f"• \"{keyword}\" ({category}) na posição {offset}\n"
+        
         explanation += f"""
 📋 COMPLIANCE:
 • Análise baseada em regulamentações CVM e BACEN
@@ -406,18 +845,34 @@ para decisões críticas de compliance e risco.
     
     def get_model_info(self) -> Dict[str, Any]:
         """Retorna informações do modelo para auditoria"""
-        return {
+        if self.onnx_session is not None:
+            memory_optimization = (
+                "ONNX Runtime int8 dynamic quantization" if self.onnx_session.quantized else "ONNX Runtime fp32"
+            )
+        else:
+            memory_optimization = "QLoRA 4-bit quantization" if self.use_qlora else "Standard"
+            if self.lora_merged:
+                memory_optimization = "LoRA merged into base weights"
+        
+        info = {
             "model_name": self.model_name,
             "version": "DD-AI v2.1 Advanced",
             "use_qlora": self.use_qlora,
+            "inference_only": self.inference_only,
+            "lora_merged": self.lora_merged,
+            "inference_backend": self.inference_backend,
             "device": str(self.device),
-            "num_parameters": sum(p.numel() for p in self.model.parameters()),
-            "trainable_parameters": sum(p.numel() for p in self.model.parameters() if p.requires_grad),
-            "memory_optimization": "QLoRA 4-bit quantization" if self.use_qlora else "Standard",
+            "num_parameters": sum(p.numel() for p in self.model.parameters()) if self.model is not None else None,
+            "trainable_parameters": sum(p.numel() for p in self.model.parameters() if p.requires_grad) if self.model is not None else None,
+            "memory_optimization": memory_optimization,
             "compliance_frameworks": ["CVM Resolution 193", "BACEN Resolution 4,945/21"],
             "risk_classes": self.risk_classes,
+            "batch_inference": self.get_padding_efficiency(),
             "timestamp": datetime.now().isoformat()
         }
+        if self.onnx_session is not None:
+            info["onnx"] = self.onnx_session.get_info()
+        return info
 
 # Exemplo de uso
 if __name__ == "__main__":
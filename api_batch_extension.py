@@ -10,13 +10,20 @@ Endpoints:
 - POST /api/smart-batch-analysis - Análise inteligente em lote
 - POST /api/sql-to-smart-batch   - SQL query → análise automática
 - POST /api/detect-data-type     - Detecta tipo de dados
+- POST /api/jobs/smart-batch-analysis, /api/jobs/sql-to-smart-batch
+                                 - Mesmos pipelines como jobs em segundo plano
 """
 
-from fastapi import HTTPException
+from fastapi import HTTPException, Request, Response
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional, Union
+from typing import Callable, List, Dict, Any, Optional, Tuple, Union
 from enum import Enum
-import re
+
+from arrow_results import ARROW_STREAM_MEDIA_TYPE, accepts_arrow, analysis_results_to_arrow
+from cnpj_columns import columns_from_rows, detect_cnpj_column, first_cnpj_per_row
+from blocking_executors import ExecutorSaturatedError, get_batch_executor, get_db_executor
+from db_pool import get_connection_pool
+from job_manager import get_job_manager
 
 # Modelos para a API
 class AnalysisStrategyAPI(str, Enum):
@@ -94,157 +101,211 @@ def add_smart_batch_endpoints(app, get_db_connection_string_func):
             raise HTTPException(status_code=500, detail=f"Erro na detecção: {str(e)}")
     
     @app.post("/api/smart-batch-analysis")
-    async def smart_batch_analysis(request: SmartBatchRequestAPI):
+    async def smart_batch_analysis(request: SmartBatchRequestAPI, http_request: Request):
         """
         Análise inteligente em lote que escolhe automaticamente a melhor estratégia
         """
         try:
-            print(f"🧠 Iniciando análise inteligente de {len(request.data_items)} items...")
-            
-            from smart_batch_analyzer import SmartBatchAnalyzer, SmartBatchRequest, AnalysisStrategy
-            
-            # Converter enum da API para enum interno
-            strategy_mapping = {
-                AnalysisStrategyAPI.AUTO_DETECT: AnalysisStrategy.AUTO_DETECT,
-                AnalysisStrategyAPI.CNPJ_ONLY: AnalysisStrategy.CNPJ_ONLY,
-                AnalysisStrategyAPI.COMPANY_NAME_ONLY: AnalysisStrategy.COMPANY_NAME_ONLY,
-                AnalysisStrategyAPI.HYBRID: AnalysisStrategy.HYBRID
-            }
-            
-            analyzer = SmartBatchAnalyzer()
-            
-            # Criar requisição interna
-            smart_request = SmartBatchRequest(
-                data_items=request.data_items,
-                analysis_strategy=strategy_mapping[request.analysis_strategy],
-                include_news=request.include_news,
-                include_enrichment=request.include_enrichment,
-                max_concurrent=request.max_concurrent,
-                column_mapping=request.column_mapping
-            )
-            
-            # Executar análise
-            results = analyzer.process_smart_batch(smart_request)
-            
-            print(f"✅ Análise concluída: {results['summary']['companies_analyzed']} items processados")
-            
-            return results
+            results = await get_batch_executor().run(_run_smart_batch, request)
+            return _batch_response(results, http_request)
             
+        except ExecutorSaturatedError as e:
+            raise _executor_saturated(e)
         except Exception as e:
             print(f"❌ Erro na análise inteligente: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Erro na análise: {str(e)}")
     
     @app.post("/api/sql-to-smart-batch")
-    async def sql_to_smart_batch(request: SQLToSmartBatchRequest):
+    async def sql_to_smart_batch(request: SQLToSmartBatchRequest, http_request: Request):
         """
         Executa query SQL e aplica análise inteligente automaticamente
         """
         try:
-            import pyodbc
-            
-            print(f"🔍 Executando query SQL para análise inteligente...")
-            
-            # 1. Executar query SQL
-            conn_str = get_db_connection_string_func(request.connection)
-            
-            with pyodbc.connect(conn_str) as conn:
-                cursor = conn.cursor()
-                cursor.execute(request.query)
-                
-                # Obter colunas e dados
-                columns = [column[0] for column in cursor.description]
-                rows = cursor.fetchall()
-                
-                # Converter para lista de dicionários
-                sql_results = []
-                for row in rows:
-                    sql_results.append(dict(zip(columns, row)))
-                
-                print(f"✅ Query executada: {len(sql_results)} registros")
-            
-            # 2. Detectar colunas automaticamente ou usar mapeamento
-            if request.auto_detect_columns:
-                detected_mapping = _auto_detect_columns(columns, sql_results)
-                column_mapping = detected_mapping
-                print(f"🔍 Colunas detectadas: {column_mapping}")
-            else:
-                column_mapping = request.column_mapping or {}
-            
-            # 3. Preparar dados para análise inteligente
-            data_items = []
-            
-            for row in sql_results:
-                # Criar item com todas as colunas relevantes
-                if column_mapping:
-                    item_data = {}
-                    for api_col, sql_col in column_mapping.items():
-                        if sql_col in row:
-                            item_data[api_col] = row[sql_col]
-                    
-                    if item_data:
-                        data_items.append(item_data)
-                else:
-                    # Fallback: tentar detectar automaticamente
-                    potential_cnpj = None
-                    potential_name = None
-                    
-                    for key, value in row.items():
-                        if isinstance(value, str):
-                            # Verificar se é CNPJ
-                            if re.match(r'\d{2}\.?\d{3}\.?\d{3}\/?\d{4}-?\d{2}', value):
-                                potential_cnpj = value
-                            # Verificar se pode ser nome de empresa
-                            elif len(value) > 10 and any(word in value.lower() for word in ['ltda', 'sa', 'eireli', 'fundo']):
-                                potential_name = value
-                    
-                    if potential_cnpj or potential_name:
-                        item_data = {}
-                        if potential_cnpj:
-                            item_data['cnpj'] = potential_cnpj
-                        if potential_name:
-                            item_data['razao_social'] = potential_name
-                        data_items.append(item_data)
-            
-            print(f"📊 Preparados {len(data_items)} items para análise")
-            
-            # 4. Executar análise inteligente
-            from smart_batch_analyzer import SmartBatchAnalyzer, SmartBatchRequest, AnalysisStrategy
-            
-            strategy_mapping = {
-                AnalysisStrategyAPI.AUTO_DETECT: AnalysisStrategy.AUTO_DETECT,
-                AnalysisStrategyAPI.CNPJ_ONLY: AnalysisStrategy.CNPJ_ONLY,
-                AnalysisStrategyAPI.COMPANY_NAME_ONLY: AnalysisStrategy.COMPANY_NAME_ONLY,
-                AnalysisStrategyAPI.HYBRID: AnalysisStrategy.HYBRID
-            }
-            
-            analyzer = SmartBatchAnalyzer()
-            
-            smart_request = SmartBatchRequest(
-                data_items=data_items,
-                analysis_strategy=strategy_mapping[request.analysis_strategy],
-                include_news=request.include_news,
-                include_enrichment=request.include_enrichment,
-                max_concurrent=request.max_concurrent,
-                column_mapping={'cnpj_col': 'cnpj', 'name_col': 'razao_social'}
-            )
-            
-            results = analyzer.process_smart_batch(smart_request)
-            
-            # 5. Adicionar metadados da query SQL
-            results['sql_metadata'] = {
-                'query': request.query,
-                'total_sql_records': len(sql_results),
-                'columns_detected': column_mapping,
-                'items_processed': len(data_items)
-            }
-            
-            print(f"✅ Análise SQL→IA concluída: {results['summary']['companies_analyzed']} empresas")
-            
-            return results
+            results = await _sql_to_smart_batch(request, get_db_connection_string_func)
+            return _batch_response(results, http_request)
             
+        except ExecutorSaturatedError as e:
+            raise _executor_saturated(e)
         except Exception as e:
             print(f"❌ Erro na análise SQL→IA: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Erro: {str(e)}")
+    
+    @app.post("/api/jobs/smart-batch-analysis")
+    async def start_smart_batch_job(request: SmartBatchRequestAPI):
+        """
+        Mesmo pipeline de /api/smart-batch-analysis em segundo plano:
+        devolve o job na hora; progresso em /api/jobs/{id}/events
+        """
+        async def runner(progress):
+            return await get_batch_executor().run(_run_smart_batch, request, progress.item)
+        
+        return get_job_manager().start("smart-batch-analysis", runner, summarize=_summarize_batch,
+                                       total=len(request.data_items))
+    
+    @app.post("/api/jobs/sql-to-smart-batch")
+    async def start_sql_to_smart_batch_job(request: SQLToSmartBatchRequest):
+        """
+        Mesmo pipeline de /api/sql-to-smart-batch em segundo plano:
+        devolve o job na hora; progresso em /api/jobs/{id}/events
+        """
+        async def runner(progress):
+            return await _sql_to_smart_batch(request, get_db_connection_string_func, progress.item)
+        
+        return get_job_manager().start("sql-to-smart-batch", runner, summarize=_summarize_batch)
+
+def _executor_saturated(e: ExecutorSaturatedError) -> HTTPException:
+    return HTTPException(status_code=503, detail=f"Servidor ocupado, tente novamente em instantes: {e}")
+
+async def _sql_to_smart_batch(request: SQLToSmartBatchRequest,
+                              get_db_connection_string_func: Callable[[Dict[str, Any]], str],
+                              progress_callback: Optional[Callable[[Dict, int], None]] = None) -> Dict[str, Any]:
+    """Pipeline de /api/sql-to-smart-batch: query no pool de banco, análise no pool dos lotes"""
+    columns, rows = await get_db_executor().run(_fetch_sql_rows, request, get_db_connection_string_func)
+    return await get_batch_executor().run(_run_sql_to_smart_batch, request, columns, rows, progress_callback)
+
+def _strategy(strategy: AnalysisStrategyAPI):
+    """Converte o enum da API para o enum interno"""
+    from smart_batch_analyzer import AnalysisStrategy
+    
+    return {
+        AnalysisStrategyAPI.AUTO_DETECT: AnalysisStrategy.AUTO_DETECT,
+        AnalysisStrategyAPI.CNPJ_ONLY: AnalysisStrategy.CNPJ_ONLY,
+        AnalysisStrategyAPI.COMPANY_NAME_ONLY: AnalysisStrategy.COMPANY_NAME_ONLY,
+        AnalysisStrategyAPI.HYBRID: AnalysisStrategy.HYBRID
+    }[strategy]
+
+def _run_smart_batch(request: SmartBatchRequestAPI,
+                     progress_callback: Optional[Callable[[Dict, int], None]] = None) -> Dict[str, Any]:
+    """Pipeline de /api/smart-batch-analysis (bloqueante)"""
+    print(f"🧠 Iniciando análise inteligente de {len(request.data_items)} items...")
+    
+    from smart_batch_analyzer import SmartBatchAnalyzer, SmartBatchRequest
+    
+    analyzer = SmartBatchAnalyzer()
+    
+    # Criar requisição interna
+    smart_request = SmartBatchRequest(
+        data_items=request.data_items,
+        analysis_strategy=_strategy(request.analysis_strategy),
+        include_news=request.include_news,
+        include_enrichment=request.include_enrichment,
+        max_concurrent=request.max_concurrent,
+        column_mapping=request.column_mapping
+    )
+    
+    # Executar análise
+    results = analyzer.process_smart_batch(smart_request, progress_callback)
+    
+    print(f"✅ Análise concluída: {results['summary']['companies_analyzed']} items processados")
+    return results
+
+def _fetch_sql_rows(request: SQLToSmartBatchRequest,
+                    get_db_connection_string_func: Callable[[Dict[str, Any]], str]) -> Tuple[List[str], List]:
+    """Etapa 1 de /api/sql-to-smart-batch: executa a query (pyodbc, bloqueante)"""
+    print(f"🔍 Executando query SQL para análise inteligente...")
+    
+    # Conexão do pool compartilhado
+    conn_str = get_db_connection_string_func(request.connection)
+    
+    with get_connection_pool().connection(conn_str) as conn:
+        cursor = conn.cursor()
+        cursor.execute(request.query)
+        
+        # Obter colunas e dados
+        columns = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+    
+    print(f"✅ Query executada: {len(rows)} registros")
+    return columns, rows
+
+def _run_sql_to_smart_batch(request: SQLToSmartBatchRequest, columns: List[str], rows: List,
+                            progress_callback: Optional[Callable[[Dict, int], None]] = None) -> Dict[str, Any]:
+    """Etapas 2-5 de /api/sql-to-smart-batch sobre as linhas da query (bloqueante)"""
+    # Converter para lista de dicionários
+    sql_results = [dict(zip(columns, row)) for row in rows]
+    
+    # Colunas do resultado para validação vetorizada de CNPJ
+    result_columns = columns_from_rows(columns, rows)
+    
+    # 2. Detectar colunas automaticamente ou usar mapeamento
+    if request.auto_detect_columns:
+        detected_mapping = _auto_detect_columns(columns, sql_results, result_columns)
+        column_mapping = detected_mapping
+        print(f"🔍 Colunas detectadas: {column_mapping}")
+    else:
+        column_mapping = request.column_mapping or {}
+    
+    # 3. Preparar dados para análise inteligente
+    data_items = []
+    row_cnpjs = None
+    
+    for row_index, row in enumerate(sql_results):
+        # Criar item com todas as colunas relevantes
+        if column_mapping:
+            item_data = {}
+            for api_col, sql_col in column_mapping.items():
+                if sql_col in row:
+                    item_data[api_col] = row[sql_col]
+            
+            if item_data:
+                data_items.append(item_data)
+        else:
+            # Fallback: tentar detectar automaticamente
+            # (CNPJs de todas as linhas validados de uma vez, na primeira passagem)
+            if row_cnpjs is None:
+                row_cnpjs = first_cnpj_per_row(result_columns)
+            potential_cnpj = row_cnpjs[row_index] or None
+            potential_name = None
+            
+            for key, value in row.items():
+                if isinstance(value, str):
+                    # Verificar se pode ser nome de empresa
+                    if len(value) > 10 and any(word in value.lower() for word in ['ltda', 'sa', 'eireli', 'fundo']):
+                        potential_name = value
+            
+            if potential_cnpj or potential_name:
+                item_data = {}
+                if potential_cnpj:
+                    item_data['cnpj'] = potential_cnpj
+                if potential_name:
+                    item_data['razao_social'] = potential_name
+                data_items.append(item_data)
+    
+    print(f"📊 Preparados {len(data_items)} items para análise")
+    
+    # 4. Executar análise inteligente
+    from smart_batch_analyzer import SmartBatchAnalyzer, SmartBatchRequest
+    
+    analyzer = SmartBatchAnalyzer()
+    
+    smart_request = SmartBatchRequest(
+        data_items=data_items,
+        analysis_strategy=_strategy(request.analysis_strategy),
+        include_news=request.include_news,
+        include_enrichment=request.include_enrichment,
+        max_concurrent=request.max_concurrent,
+        column_mapping={'cnpj_col': 'cnpj', 'name_col': 'razao_social'}
+    )
+    
+    results = analyzer.process_smart_batch(smart_request, progress_callback)
+    
+    # 5. Adicionar metadados da query SQL
+    results['sql_metadata'] = {
+        'query': request.query,
+        'total_sql_records': len(sql_results),
+        'columns_detected': column_mapping,
+        'items_processed': len(data_items)
+    }
+    
+    print(f"✅ Análise SQL→IA concluída: {results['summary']['companies_analyzed']} empresas")
+    return results
+
+def _summarize_batch(results: Dict[str, Any]) -> str:
+    """Texto de `resultado` do job (ExecucaoJob) a partir das estatísticas do lote"""
+    stats = results.get('statistics', {})
+    return (f"{stats.get('total_processed', 0)} itens processados, "
+            f"{stats.get('failed', 0)} com erro, "
+            f"{stats.get('high_risk_companies', 0)} de alto risco")
 
 def _get_detection_explanation(value: str, data_type, confidence: float) -> str:
     """Gera explicação para a detecção"""
@@ -280,7 +341,18 @@ def _generate_strategy_recommendations(type_counts: Dict, total_items: int) -> D
     
     return recommendations
 
-def _auto_detect_columns(columns: List[str], sample_data: List[Dict]) -> Dict[str, str]:
+def _batch_response(results: Dict[str, Any], http_request: Request):
+    """JSON por padrão; Arrow IPC (um registro por empresa) com `Accept: application/vnd.apache.arrow.stream`"""
+    if not accepts_arrow(http_request.headers.get("accept")):
+        return results
+    metadata = {key: value for key, value in results.items() if key != 'results'}
+    return Response(
+        content=analysis_results_to_arrow(results.get('results', []), metadata),
+        media_type=ARROW_STREAM_MEDIA_TYPE
+    )
+
+def _auto_detect_columns(columns: List[str], sample_data: List[Dict],
+                         result_columns: Optional[Dict[str, List[Any]]] = None) -> Dict[str, str]:
     """Detecta automaticamente colunas de CNPJ e nome"""
     mapping = {}
     
@@ -302,22 +374,24 @@ def _auto_detect_columns(columns: List[str], sample_data: List[Dict]) -> Dict[st
     
     # Se não encontrou por nome, analisar conteúdo de algumas linhas
     if not mapping and sample_data:
+        # CNPJ: validação vetorizada sobre todas as linhas (60% válidos)
+        cnpj_scan = detect_cnpj_column(result_columns or columns_from_rows(columns, sample_data),
+                                       min_valid_ratio=0.6)
+        if cnpj_scan is not None:
+            mapping['cnpj_col'] = cnpj_scan.column
+        
         for col in columns:
+            if col == mapping.get('cnpj_col'):
+                continue
             sample_values = [row.get(col, '') for row in sample_data[:5] if row.get(col)]
             
             if sample_values:
-                # Verificar se contém CNPJs
-                cnpj_count = sum(1 for val in sample_values 
-                               if isinstance(val, str) and re.match(r'\d{2}\.?\d{3}\.?\d{3}\/?\d{4}-?\d{2}', val))
-                
                 # Verificar se contém nomes de empresas
                 name_indicators = ['ltda', 'sa', 's.a.', 'eireli', 'fundo', 'gestora']
                 name_count = sum(1 for val in sample_values 
                                if isinstance(val, str) and any(ind in val.lower() for ind in name_indicators))
                 
-                if cnpj_count >= len(sample_values) * 0.6:  # 60% são CNPJs
-                    mapping['cnpj_col'] = col
-                elif name_count >= len(sample_values) * 0.4:  # 40% têm indicadores de empresa
+                if name_count >= len(sample_values) * 0.4:  # 40% têm indicadores de empresa
                     mapping['name_col'] = col
     
     return mapping
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+🏹 ARROW RESULTS - Advanced DD-AI v2.1
+======================================
+
+Resultados SQL e de análise em lote no formato Apache Arrow IPC (stream).
+
+Em vez de `[dict(zip(columns, row)) for row in rows]` em JSON, que repete os
+nomes das colunas em cada linha e converte `Decimal`/`datetime` em texto,
+os dados seguem em record batches colunares com tipos preservados:
+pandas (`read_arrow_stream(...).to_pandas()`), DuckDB e `cnpj_columns`
+leem as colunas diretamente, sem parse de JSON.
+
+- `arrow_stream`: resultado de uma `StreamedQuery`, um record batch por
+  bloco de `fetchmany`, com o schema derivado de `cursor.description`
+- `analysis_results_to_arrow`: lista de resultados das análises em lote
+  (campos aninhados como JSON; metadados/estatísticas no schema)
+
+Requer `pyarrow`; sem ele os endpoints continuam respondendo JSON.
+"""
+
+import datetime
+import decimal
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+try:
+    import pyarrow as pa
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def accepts_arrow(accept_header: Optional[str]) -> bool:
+    """O cliente pediu Arrow e o pyarrow está instalado?"""
+    return PYARROW_AVAILABLE and ARROW_STREAM_MEDIA_TYPE in (accept_header or "")
+
+
+def _arrow_type(type_code: Any, precision: Optional[int], scale: Optional[int]) -> "pa.DataType":
+    """Tipo Arrow equivalente ao `type_code` (tipo Python) do pyodbc"""
+    if type_code is bool:
+        return pa.bool_()
+    if type_code is int:
+        return pa.int64()
+    if type_code is float:
+        return pa.float64()
+    if type_code is decimal.Decimal:
+        if precision and 0 < precision <= 38:
+            return pa.decimal128(precision, scale or 0)
+        return pa.decimal128(38, scale or 0)
+    if type_code is datetime.datetime:
+        return pa.timestamp("us")
+    if type_code is datetime.date:
+        return pa.date32()
+    if type_code is datetime.time:
+        return pa.time64("us")
+    if type_code in (bytes, bytearray):
+        return pa.binary()
+    # str, uuid e tipos desconhecidos
+    return pa.string()
+
+
+def schema_from_description(description: Sequence[Sequence[Any]]) -> "pa.Schema":
+    """Schema Arrow a partir de `cursor.description` (name, type_code, ..., precision, scale, null_ok)"""
+    fields = []
+    for column in description:
+        name, type_code = column[0], column[1]
+        precision = column[4] if len(column) > 4 else None
+        scale = column[5] if len(column) > 5 else None
+        fields.append(pa.field(name, _arrow_type(type_code, precision, scale)))
+    return pa.schema(fields)
+
+
+def _column_array(values: Sequence[Any], field: "pa.Field") -> "pa.Array":
+    if pa.types.is_string(field.type):
+        # Valores não textuais (uuid, datetimeoffset...) viram texto
+        values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+    return pa.array(values, type=field.type)
+
+
+def record_batch_from_rows(schema: "pa.Schema", rows: Sequence[Sequence[Any]]) -> "pa.RecordBatch":
+    """Transpõe as linhas de um bloco em colunas tipadas"""
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    return pa.RecordBatch.from_arrays(
+        [_column_array(values, field) for values, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+class _ChunkSink:
+    """Destino do writer IPC que entrega os bytes escritos a cada batch"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def arrow_stream(streamed) -> Iterator[bytes]:
+    """
+    Serializa uma `StreamedQuery` (query_streaming) como stream Arrow IPC
+
+    Um record batch por bloco de `fetchmany`; a memória fica limitada ao bloco.
+    """
+    try:
+        schema = schema_from_description(streamed.description)
+        sink = _ChunkSink()
+        writer = pa.ipc.new_stream(sink, schema)
+        yield sink.drain()
+        for rows in streamed.iter_chunks():
+            writer.write_batch(record_batch_from_rows(schema, rows))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+    except Exception as e:
+        # Sem marcador de fim o cliente percebe o stream truncado
+        logger.error(f"❌ Erro durante o streaming Arrow da query: {e}")
+        raise
+    finally:
+        streamed.close()
+
+
+def table_to_ipc(table: "pa.Table") -> bytes:
+    """Tabela Arrow serializada como stream IPC"""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def read_arrow_stream(data: bytes) -> "pa.Table":
+    """Lê um stream IPC (resposta de um endpoint) como tabela Arrow"""
+    return pa.ipc.open_stream(pa.py_buffer(data)).read_all()
+
+
+def iter_arrow_batches(source: Any) -> Iterator["pa.RecordBatch"]:
+    """Record batches de um stream IPC lido aos poucos (ex.: `response.raw` do requests)"""
+    reader = pa.ipc.open_stream(source)
+    for batch in reader:
+        yield batch
+
+
+def analysis_results_to_arrow(results: List[Dict[str, Any]],
+                              metadata: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Resultados das análises em lote como stream Arrow IPC
+
+    Cada chave de primeiro nível vira uma coluna; valores aninhados
+    (dicts/listas de dicts) seguem como JSON. `metadata` (estatísticas,
+    resumo...) vai nos metadados do schema, também em JSON.
+    """
+    keys: Dict[str, None] = {}
+    for result in results:
+        keys.update(dict.fromkeys(result))
+
+    arrays, names = [], []
+    for key in keys:
+        values = [result.get(key) for result in results]
+        if any(isinstance(value, (dict, list)) for value in values):
+            values = [None if value is None else json.dumps(value, ensure_ascii=False, default=str)
+                      for value in values]
+        try:
+            arrays.append(pa.array(values))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            arrays.append(pa.array([None if value is None else str(value) for value in values], pa.string()))
+        names.append(key)
+
+    schema_metadata = {
+        key: json.dumps(value, ensure_ascii=False, default=str)
+        for key, value in (metadata or {}).items()
+    }
+    table = pa.Table.from_arrays(arrays, names=names)
+    return table_to_ipc(table.replace_schema_metadata(schema_metadata))
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+🌐 ASYNC HTTP - Advanced DD-AI v2.1
+===================================
+
+Cliente HTTP assíncrono para APIs externas com limite de taxa:
+- `TokenBucket`: limitador compartilhado entre threads e event loops
+  (aquisição síncrona ou assíncrona)
+- `HostRateLimiter`: um `TokenBucket` por host, criado sob demanda
+- `AsyncHTTPClient`: httpx.AsyncClient com pool keep-alive, concorrência
+  limitada e retry com backoff exponencial + jitter em 429/5xx
+  (respeitando `Retry-After`) e cache HTTP condicional opcional (`http_cache`)
+
+Com N requisições o tempo total tende a N/taxa segundos em vez de
+N × (latência + pausa fixa).
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from http_cache import CachedResponse, HTTPCache
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Token bucket thread-safe: `rate` tokens/s com rajada de até `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(capacity if capacity is not None else rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Reserva um token e retorna quanto tempo esperar até ele estar disponível"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        """Aguarda um token (bloqueante)"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Aguarda um token sem bloquear o event loop"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class HostRateLimiter:
+    """Limite de taxa por host: `rate` requisições/s com rajada de até `capacity` em cada um"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.capacity)
+            return bucket
+
+    def acquire(self, url: str):
+        self.bucket_for(url).acquire()
+
+    async def acquire_async(self, url: str):
+        await self.bucket_for(url).acquire_async()
+
+
+class AsyncHTTPClient:
+    """
+    Cliente assíncrono com limite de taxa, concorrência limitada e retry
+
+    Uso:
+        async with AsyncHTTPClient(rate_limiter=bucket, max_concurrency=8) as client:
+            response = await client.get(url)
+    """
+
+    def __init__(self,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 host_rate_limiter: Optional[HostRateLimiter] = None,
+                 max_concurrency: int = 8,
+                 timeout: float = 10,
+                 max_retries: int = 3,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30.0,
+                 headers: Optional[Dict[str, str]] = None,
+                 cache: Optional[HTTPCache] = None):
+        """
+        Args:
+            rate_limiter: Token bucket compartilhado (None = sem limite de taxa)
+            host_rate_limiter: Limite adicional por host (clientes com vários domínios)
+            max_concurrency: Máximo de requisições simultâneas
+            timeout: Timeout por requisição (s)
+            max_retries: Tentativas extras em 429/5xx/erro de transporte
+            backoff_base: Base do backoff exponencial (s)
+            backoff_max: Espera máxima entre tentativas (s)
+            headers: Cabeçalhos padrão
+            cache: Cache HTTP para GETs (validade e revalidação com ETag/Last-Modified)
+        """
+        self.rate_limiter = rate_limiter
+        self.host_rate_limiter = host_rate_limiter
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.headers = headers or {}
+        self.cache = cache if cache is not None and cache.enabled else None
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncHTTPClient":
+        # Conexões keep-alive reaproveitadas entre as requisições do lote
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            headers=self.headers,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency
+            )
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._client.aclose()
+        self._client = None
+
+    async def get(self, url: str, limit_key: Optional[str] = None, **kwargs: Any) -> httpx.Response:
+        """
+        GET com limite de taxa e retry; a última resposta (ou exceção) é propagada
+
+        `limit_key`: URL cujo host conta no limite por host (padrão: `url`;
+        ex.: o site de destino de um link de redirecionamento)
+        """
+        if self.cache is None:
+            return await self._get(url, limit_key, **kwargs)
+
+        # diskcache é síncrono (SQLite + arquivos): leitura e gravação fora do event loop
+        entry = await asyncio.to_thread(self.cache.lookup, url)
+        if entry is not None and entry.is_fresh:
+            self.cache.count_fresh_hit()
+            return self._cached_response(url, entry)
+        if entry is not None:
+            kwargs["headers"] = {**kwargs.get("headers", {}), **entry.conditional_headers()}
+
+        response = await self._get(url, limit_key, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            return self._cached_response(
+                url, await asyncio.to_thread(self.cache.revalidated, entry, response.headers)
+            )
+
+        self.cache.count_miss()
+        if response.status_code == 200:
+            await asyncio.to_thread(self.cache.store, url, response.headers, response.content)
+        return response
+
+    def _cached_response(self, url: str, entry: CachedResponse) -> httpx.Response:
+        response = httpx.Response(200, headers=entry.headers, content=entry.content,
+                                  request=httpx.Request("GET", url))
+        response.extensions["from_cache"] = True
+        return response
+
+    async def _get(self, url: str, limit_key: Optional[str] = None, **kwargs: Any) -> httpx.Response:
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire_async()
+                if self.host_rate_limiter is not None:
+                    await self.host_rate_limiter.acquire_async(limit_key or url)
+
+                last_try = attempt == self.max_retries
+                try:
+                    response = await self._client.get(url, **kwargs)
+                except httpx.TransportError as e:
+                    if last_try:
+                        raise
+                    delay = self._backoff(attempt)
+                    logger.warning(f"⚠️ Erro de transporte em {url}: {e}. Nova tentativa em {delay:.1f}s")
+                else:
+                    if response.status_code not in RETRY_STATUS_CODES or last_try:
+                        return response
+                    delay = self._retry_after(response) or self._backoff(attempt)
+                    logger.warning(f"⚠️ {url} retornou {response.status_code}. Nova tentativa em {delay:.1f}s")
+
+                await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        """Backoff exponencial com full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _retry_after(self, response: httpx.Response) -> Optional[float]:
+        """Espera indicada pelo servidor em `Retry-After` (segundos ou data HTTP)"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(max(delay, 0.0), self.backoff_max)
@@ -20,13 +20,21 @@ import requests
 import json
 import re
 import time
-import pyodbc
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 import concurrent.futures
 from pathlib import Path
 
+from cnpj_columns import columns_from_rows, detect_cnpj_column
+from cnpj_enrichment import COMPANY_PROFILE_FIELDS, get_enrichment_service
+from db_pool import get_connection_pool
+from cnpj_utils import canonical_cnpj
+from single_flight import SingleFlight
+
+# CNPJ citado em texto livre (com ou sem formatação)
+CNPJ_TEXT_PATTERN = re.compile(r'\d{2}\.?\d{3}\.?\d{3}\/?\d{4}-?\d{2}')
+
 @dataclass
 class BatchAnalysisRequest:
     """Requisição de análise em lote"""
@@ -57,28 +65,39 @@ class BatchAnalyzer:
         self.session.headers.update({
             'User-Agent': 'DD-AI-BatchAnalyzer/2.1'
         })
+        # Workers simultâneos com o mesmo CNPJ/empresa compartilham a mesma chamada
+        self.inflight = SingleFlight()
         
     def extract_cnpjs_from_sql_result(self, sql_results: List[Dict]) -> List[str]:
         """
         Extrai CNPJs de resultados SQL
         """
-        cnpjs = []
+        if not sql_results:
+            return []
+        
+        # Caminho principal: coluna de CNPJ validada de forma vetorizada (mod 11)
+        columns = columns_from_rows(list(sql_results[0].keys()), sql_results)
+        cnpj_column = detect_cnpj_column(columns)
+        if cnpj_column is not None:
+            return cnpj_column.unique_cnpjs()
         
+        # Sem coluna de CNPJ: buscar padrões em texto livre
+        cnpjs = []
         for row in sql_results:
             for key, value in row.items():
                 if isinstance(value, str):
-                    # Buscar padrões de CNPJ
-                    cnpj_matches = re.findall(r'\d{2}\.?\d{3}\.?\d{3}\/?\d{4}-?\d{2}', value)
+                    cnpj_matches = CNPJ_TEXT_PATTERN.findall(value)
                     cnpjs.extend(cnpj_matches)
         
-        # Limpar e validar CNPJs
-        valid_cnpjs = []
-        for cnpj in set(cnpjs):  # Remove duplicatas
-            clean_cnpj = re.sub(r'[^\d]', '', cnpj)
-            if len(clean_cnpj) == 14:
-                valid_cnpjs.append(cnpj)
+        # Validar (dígitos verificadores) e remover duplicatas pela forma canônica
+        # (14 dígitos, como no caminho por coluna), mantendo a ordem das linhas
+        valid_cnpjs = {}
+        for cnpj in cnpjs:
+            key = canonical_cnpj(cnpj)
+            if key:
+                valid_cnpjs.setdefault(key, None)
         
-        return valid_cnpjs
+        return list(valid_cnpjs)
     
     def execute_sql_and_extract_cnpjs(self, connection_details: Dict, query: str) -> List[str]:
         """
@@ -104,8 +123,8 @@ class BatchAnalyzer:
                 PWD={connection_details['password']};
                 """
             
-            # Executar query
-            with pyodbc.connect(conn_str) as conn:
+            # Executar query (conexão do pool compartilhado)
+            with get_connection_pool().connection(conn_str) as conn:
                 cursor = conn.cursor()
                 cursor.execute(query)
                 
@@ -137,13 +156,10 @@ class BatchAnalyzer:
         Enriquece dados da empresa via API Brasil
         """
         try:
-            clean_cnpj = re.sub(r'[^\d]', '', cnpj)
-            url = f"https://brasilapi.com.br/api/cnpj/v1/{clean_cnpj}"
+            result = get_enrichment_service().lookup(cnpj, fields=COMPANY_PROFILE_FIELDS)
             
-            response = self.session.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
+            if result.success:
+                data = result.data
                 return {
                     'success': True,
                     'cnpj': data.get('cnpj', cnpj),
@@ -162,7 +178,7 @@ class BatchAnalyzer:
                 return {
                     'success': False,
                     'cnpj': cnpj,
-                    'error': f'API Brasil retornou {response.status_code}'
+                    'error': result.error
                 }
                 
         except Exception as e:
@@ -181,19 +197,21 @@ class BatchAnalyzer:
             from enhanced_news_monitor import EnhancedNewsMonitor
             
             monitor = EnhancedNewsMonitor(self.api_base_url)
-            news_data = monitor.search_google_news(company_name, days_back)
+            # Feeds e artigos baixados em paralelo (limite de 5 notícias)
+            articles = monitor.search_news_articles(company_name, days_back, budget=5)
             
             # Processar notícias
             processed_news = []
-            for news_item in news_data[:5]:  # Limitar a 5 notícias
-                content = monitor.extract_news_content(news_item.get('link', ''))
+            for article in articles:
+                news_item, content = article.news, article.content
                 
                 processed_news.append({
                     'title': news_item.get('title', ''),
                     'url': news_item.get('link', ''),
                     'source': news_item.get('source', ''),
                     'date': news_item.get('pubDate', ''),
-                    'content': content[:500] + "..." if len(content) > 500 else content
+                    'content': content[:500] + "..." if len(content) > 500 else content,
+                    'coverage': news_item.get('cluster_size', 1)
                 })
             
             return processed_news
@@ -290,10 +308,12 @@ class BatchAnalyzer:
         
         print(f"🔍 Processando: {cnpj}")
         
+        cnpj_key = canonical_cnpj(cnpj) or cnpj
+        
         # 1. Enriquecimento
         enrichment_data = {}
         if include_enrichment:
-            enrichment_data = self.enrich_company_data(cnpj)
+            enrichment_data = self.inflight.do(('enrich', cnpj_key), self.enrich_company_data, cnpj)
             if not enrichment_data.get('success', False):
                 errors.append(f"Enriquecimento falhou: {enrichment_data.get('error', 'Erro desconhecido')}")
         
@@ -302,12 +322,17 @@ class BatchAnalyzer:
         # 2. Busca de notícias
         news_data = []
         if include_news and enrichment_data.get('success', False):
-            news_data = self.search_company_news(razao_social)
+            news_data = self.inflight.do(
+                ('news', razao_social.strip().lower()), self.search_company_news, razao_social
+            )
             if not news_data:
                 errors.append("Nenhuma notícia encontrada")
         
         # 3. Análise de risco
-        risk_data = self.analyze_company_risk(enrichment_data, news_data)
+        risk_data = self.inflight.do(
+            ('risk', cnpj_key, include_news, include_enrichment),
+            self.analyze_company_risk, enrichment_data, news_data
+        )
         if not risk_data.get('success', False):
             errors.append(f"Análise de risco falhou: {risk_data.get('error', 'Erro desconhecido')}")
         
@@ -335,6 +360,14 @@ class BatchAnalyzer:
         start_time = time.time()
         results = []
         
+        # Mesma empresa em várias linhas (ex.: FIDC) é analisada uma única vez
+        unique_cnpjs = {}
+        for cnpj in request.cnpjs:
+            unique_cnpjs.setdefault(canonical_cnpj(cnpj) or cnpj, cnpj)
+        cnpjs = list(unique_cnpjs.values())
+        if len(cnpjs) < len(request.cnpjs):
+            print(f"🔁 {len(request.cnpjs) - len(cnpjs)} CNPJs duplicados ignorados")
+        
         # Processar com concorrência limitada
         with concurrent.futures.ThreadPoolExecutor(max_workers=request.max_concurrent) as executor:
             # Submeter tarefas
@@ -344,7 +377,7 @@ class BatchAnalyzer:
                     cnpj, 
                     request.include_news, 
                     request.include_enrichment
-                ): cnpj for cnpj in request.cnpjs
+                ): cnpj for cnpj in cnpjs
             }
             
             # Coletar resultados
@@ -355,8 +388,8 @@ class BatchAnalyzer:
                     results.append(result)
                     
                     # Progress
-                    progress = len(results) / len(request.cnpjs) * 100
-                    print(f"📊 Progresso: {progress:.1f}% ({len(results)}/{len(request.cnpjs)})")
+                    progress = len(results) / len(cnpjs) * 100
+                    print(f"📊 Progresso: {progress:.1f}% ({len(results)}/{len(cnpjs)})")
                     
                 except Exception as e:
                     print(f"❌ Erro ao processar {cnpj}: {str(e)}")
@@ -397,6 +430,7 @@ class BatchAnalyzer:
             'metadata': {
                 'analysis_date': datetime.now().isoformat(),
                 'total_cnpjs': len(request.cnpjs),
+                'unique_cnpjs': len(cnpjs),
                 'processing_time': total_time,
                 'include_news': request.include_news,
                 'include_enrichment': request.include_enrichment
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos backends de extração de notícias (`news_extraction`):
+páginas por segundo e fidelidade ao extrator original (bs4)
+
+Uso:
+    python benchmark_extraction.py [diretorio_com_paginas_html]
+
+O diretório (ou `DDAI_EXTRACTION_CORPUS`) contém páginas salvas `*.html`;
+a URL de cada uma (que escolhe o seletor do site) vem de `urls.json`
+({"arquivo.html": "https://..."}), do `<link rel="canonical">`/`og:url` da
+página ou, sem eles, do nome do arquivo. Sem diretório, usa um corpus
+sintético com a estrutura de Valor, G1, Exame e sites genéricos.
+"""
+
+import difflib
+import json
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from news_extraction import EXTRACTORS
+
+MIN_SECONDS_PER_BACKEND = 2.0
+
+_CANONICAL_URL = re.compile(
+    rb'<(?:link[^>]+rel=["\']canonical["\'][^>]+href|meta[^>]+property=["\']og:url["\'][^>]+content)=["\']([^"\']+)',
+    re.IGNORECASE
+)
+
+WORDS = ("mercado investimento fundo gestora cotistas rentabilidade patrimônio CVM BACEN "
+         "regulação crédito empresa resultado trimestre receita lucro dívida operação "
+         "auditoria compliance risco liquidez carteira ativos emissão debêntures").split()
+
+
+def load_corpus(directory: str) -> List[Tuple[str, bytes]]:
+    """(url, html) das páginas salvas no diretório"""
+    path = Path(directory)
+    urls = {}
+    if (path / "urls.json").exists():
+        urls = json.loads((path / "urls.json").read_text(encoding="utf-8"))
+
+    pages = []
+    for file in sorted(path.glob("*.html")):
+        html = file.read_bytes()
+        url = urls.get(file.name)
+        if not url:
+            match = _CANONICAL_URL.search(html)
+            url = match.group(1).decode("utf-8", "replace") if match else file.name
+        pages.append((url, html))
+    return pages
+
+
+def _paragraphs(rng: random.Random, count: int) -> str:
+    return "".join(
+        f"<p>{' '.join(rng.choice(WORDS) for _ in range(rng.randint(25, 60)))}.</p>\n"
+        for _ in range(count)
+    )
+
+
+def _boilerplate(rng: random.Random) -> Tuple[str, str]:
+    """Cabeçalho/menus/scripts e rodapé típicos de portais (a maior parte do HTML)"""
+    menu = "".join(f'<li><a href="/secao/{i}">Seção {i}</a></li>' for i in range(rng.randint(40, 120)))
+    scripts = "".join(f"<script>window.dataLayer=window.dataLayer||[];dataLayer.push({{id:{i}}});</script>"
+                      for i in range(rng.randint(10, 30)))
+    related = "".join(f'<div class="card"><a href="/n/{i}">{" ".join(rng.choice(WORDS) for _ in range(8))}</a></div>'
+                      for i in range(rng.randint(20, 60)))
+    top = (f"<head><meta charset='utf-8'><title>{' '.join(rng.choice(WORDS) for _ in range(6))}</title>"
+           f"<style>.a{{color:red}}</style>{scripts}</head><body><header><nav><ul>{menu}</ul></nav></header>")
+    bottom = f'<aside class="related">{related}</aside><footer><ul>{menu}</ul></footer></body>'
+    return top, bottom
+
+
+def synthetic_corpus(pages: int = 120, seed: int = 42) -> List[Tuple[str, bytes]]:
+    """Páginas no formato dos sites com seletor próprio, genéricas e sem corpo (fallback de título)"""
+    rng = random.Random(seed)
+    layouts = (
+        ("https://valor.globo.com/financas/noticia/{i}.ghtml",
+         '<div class="content-text__container theme-color">{body}</div>'),
+        ("https://g1.globo.com/economia/noticia/{i}.ghtml",
+         '<main><div class="mc-article-body">{body}</div></main>'),
+        ("https://exame.com/mercados/{i}/",
+         '<div class="article-content single">{body}<header>Leia também</header></div>'),
+        ("https://www.infomoney.com.br/mercados/{i}/",
+         '<article><h1>Título</h1>{body}</article>'),
+        ("https://www.exemplo.com.br/noticia/{i}",
+         '<main><section>{body}</section></main>'),
+        ("https://www.exemplo.com.br/video/{i}",
+         '<div class="player">Vídeo</div>'),
+    )
+    corpus = []
+    for i in range(pages):
+        url_template, layout = layouts[i % len(layouts)]
+        top, bottom = _boilerplate(rng)
+        body = _paragraphs(rng, rng.randint(4, 14))
+        html = f"<!DOCTYPE html><html>{top}{layout.format(body=body)}{bottom}</html>"
+        corpus.append((url_template.format(i=i), html.encode("utf-8")))
+    return corpus
+
+
+def measure(extractor, corpus: List[Tuple[str, bytes]]) -> Tuple[float, List[Tuple[str, bool]]]:
+    """Páginas por segundo (passadas repetidas até MIN_SECONDS_PER_BACKEND) e a saída da 1ª passada"""
+    outputs = [extractor.extract(url, html) for url, html in corpus]
+    pages, start = 0, time.perf_counter()
+    while True:
+        for url, html in corpus:
+            extractor.extract(url, html)
+        pages += len(corpus)
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SECONDS_PER_BACKEND:
+            return pages / elapsed, outputs
+
+
+def similarity(reference: str, candidate: str) -> float:
+    """Similaridade por palavras (difflib) entre dois textos extraídos"""
+    if reference == candidate:
+        return 1.0
+    return difflib.SequenceMatcher(None, reference.split(), candidate.split(), autojunk=False).ratio()
+
+
+def main():
+    """Mede cada backend disponível e compara a saída com o bs4"""
+    print("⏱️ BENCHMARK DE EXTRAÇÃO DE NOTÍCIAS")
+    print("=" * 60)
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else os.getenv("DDAI_EXTRACTION_CORPUS")
+    if directory:
+        corpus = load_corpus(directory)
+        print(f"📂 Corpus: {len(corpus)} páginas de {directory}")
+    else:
+        corpus = synthetic_corpus()
+        print(f"🧪 Corpus sintético: {len(corpus)} páginas (informe um diretório para páginas reais)")
+    if not corpus:
+        print("❌ Nenhuma página .html encontrada")
+        return False
+
+    size_kb = sum(len(html) for _, html in corpus) / len(corpus) / 1024
+    print(f"   Tamanho médio: {size_kb:.1f} KB/página\n")
+
+    if not EXTRACTORS["bs4"].available:
+        print("❌ beautifulsoup4 não instalado: o bs4 é a referência de qualidade")
+        return False
+
+    reference_speed, reference = measure(EXTRACTORS["bs4"](), corpus)
+    print(f"{'backend':<12} {'páginas/s':>10} {'speedup':>8} {'idênticas':>10} {'similaridade':>13} {'extraídas':>10}")
+    print(f"{'bs4':<12} {reference_speed:>10.1f} {1.0:>7.2f}x {'100.0%':>10} {'1.000':>13} "
+          f"{sum(extracted for _, extracted in reference):>10}")
+
+    success = True
+    for name, extractor_class in EXTRACTORS.items():
+        if name == "bs4":
+            continue
+        if not extractor_class.available:
+            print(f"{name:<12} {'(não instalado)':>10}")
+            continue
+        speed, outputs = measure(extractor_class(), corpus)
+        identical = sum(out == ref for out, ref in zip(outputs, reference)) / len(corpus) * 100
+        mean_similarity = sum(similarity(ref[0], out[0]) for out, ref in zip(outputs, reference)) / len(corpus)
+        extracted = sum(extracted for _, extracted in outputs)
+        print(f"{name:<12} {speed:>10.1f} {speed / reference_speed:>7.2f}x {identical:>9.1f}% "
+              f"{mean_similarity:>13.3f} {extracted:>10}")
+        # Backends que mantêm a regra original devem reproduzir a saída do bs4
+        if name in ("lxml", "selectolax") and mean_similarity < 0.95:
+            success = False
+
+    print("\n📋 'idênticas': texto igual ao do bs4; 'similaridade': média por palavras (1.0 = igual)")
+    print("   O trafilatura usa outro algoritmo fora dos sites com seletor próprio; diferenças são esperadas")
+    return success
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark do preprocessing financeiro: passadas separadas (legado)
+x passada única com regex pré-compiladas (`financial_patterns`)
+"""
+
+import re
+import sys
+import time
+
+from advanced_financial_bert import AdvancedFinancialBERT
+from financial_patterns import FinancialPatternSet
+
+SAMPLE_DOCUMENT = """
+Em 15/03/2024 a empresa XPTO LTDA, CNPJ 12.345.678/0001-90, recebeu R$ 150.000,00
+do sócio (CPF 123.456.789-09) e transferiu R$ 2.500.000,00 para conta offshore.
+Em 02/04/2024 novo aporte de R$ 75000 e pagamento de R$ 1.200,50 ao fornecedor
+98765432000110. A CVM e o BACEN foram notificados sobre a operação estruturada.
+"""
+
+ITERATIONS = 5000
+
+
+def legacy_preprocess(text: str, patterns: dict) -> str:
+    """Implementação anterior: um re.sub por padrão, com strings não compiladas"""
+    text = re.sub(r'R\$\s*(\d{1,3}(?:\.\d{3})*(?:,\d{2})?)', r'VALOR_MONETARIO_\1', text)
+    text = re.sub(patterns['cpf'], 'CPF_NORMALIZADO', text)
+    text = re.sub(patterns['cnpj'], 'CNPJ_NORMALIZADO', text)
+    text = re.sub(r'\d{1,2}/\d{1,2}/\d{4}', 'DATA_NORMALIZADA', text)
+    return text.strip()
+
+
+def legacy_entities(text: str, patterns: dict) -> dict:
+    """Implementação anterior: um re.findall por entidade sobre o texto original"""
+    return {
+        'cpfs': re.findall(patterns['cpf'], text),
+        'cnpjs': re.findall(patterns['cnpj'], text),
+        'valores': re.findall(patterns['currency_brl'], text),
+        'large_amounts': re.findall(patterns['large_amounts'], text),
+    }
+
+
+def measure(label: str, func, documents: list) -> float:
+    """Tempo médio por documento em microssegundos"""
+    start = time.perf_counter()
+    for document in documents:
+        func(document)
+    elapsed = time.perf_counter() - start
+    per_doc_us = elapsed / len(documents) * 1e6
+    print(f"   {label:<28} {per_doc_us:8.1f} µs/doc")
+    return per_doc_us
+
+
+def main():
+    """Executa o benchmark e confere se as duas versões extraem as mesmas entidades"""
+    print("⏱️ BENCHMARK DE PREPROCESSING FINANCEIRO")
+    print("=" * 50)
+
+    # Apenas os padrões; o modelo não é carregado
+    patterns = AdvancedFinancialBERT._init_compliance_patterns(None)
+    pattern_set = FinancialPatternSet(patterns)
+
+    scan = pattern_set.scan(SAMPLE_DOCUMENT)
+    legacy = legacy_entities(SAMPLE_DOCUMENT, patterns)
+    print("\n🔍 Entidades (legado x passada única):")
+    for name in ('cpfs', 'cnpjs', 'valores', 'large_amounts'):
+        status = "✅" if legacy[name] == getattr(scan, name) else "⚠️"
+        print(f"   {status} {name}: {legacy[name]} x {getattr(scan, name)}")
+    # Diferença esperada: o legado também lia os 11 primeiros dígitos de um CNPJ
+    # sem formatação como CPF; na passada única o CNPJ tem precedência
+    print("   ℹ️ CNPJ sem formatação não é mais contado também como CPF")
+
+    documents = [SAMPLE_DOCUMENT] * ITERATIONS
+    print(f"\n📊 Custo por documento ({len(SAMPLE_DOCUMENT)} caracteres, {ITERATIONS} iterações):")
+    before = measure(
+        "legado (sub + findall)",
+        lambda doc: (legacy_preprocess(doc, patterns), legacy_entities(doc, patterns)),
+        documents
+    )
+    after = measure("passada única compilada", pattern_set.scan, documents)
+    print(f"\n🚀 Speedup: {before / after:.2f}x")
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
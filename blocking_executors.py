@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+🧵 BLOCKING EXECUTORS - Advanced DD-AI v2.1
+===========================================
+
+Pools de threads dedicados para o trabalho bloqueante dos endpoints async.
+
+pyodbc (connect/execute/fetch) e a inferência do modelo bloqueiam a thread
+que os chama; executados direto numa corrotina, uma query lenta trava o
+event loop e todas as outras requisições (inclusive /api/analyze-risk).
+
+- `get_db_executor()`: banco de dados (`DDAI_DB_THREADS`, padrão 8)
+- `get_model_executor()`: modelo (`DDAI_MODEL_THREADS`, padrão 2)
+- `get_batch_executor()`: orquestração dos lotes inteligentes (enriquecimento,
+  notícias e chamadas a /api/analyze-risk; `DDAI_BATCH_THREADS`, padrão 4).
+  Separado do pool do modelo: o lote espera pelo próprio /api/analyze-risk,
+  que roda no pool do modelo
+
+Os limites são separados: queries lentas não ocupam as threads do modelo e
+vice-versa. Cada pool também limita a fila de espera (`max_pending`); além
+dela a chamada falha na hora com `ExecutorSaturatedError` em vez de
+acumular trabalho indefinidamente.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Fila do pool de threads cheia"""
+
+
+_EXHAUSTED = object()
+
+
+class BlockingExecutor:
+    """ThreadPoolExecutor limitado (threads e fila) para uso a partir de corrotinas"""
+
+    def __init__(self, name: str, max_workers: int, max_pending: Optional[int] = None):
+        """
+        Args:
+            name: Prefixo das threads (aparece em logs e stack traces)
+            max_workers: Threads do pool
+            max_pending: Chamadas aguardando ou em execução (None = 8 × threads)
+        """
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max_pending or self.max_workers * 8
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Executa `func(*args, **kwargs)` no pool sem bloquear o event loop"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise ExecutorSaturatedError(
+                    f"Pool '{self.name}' saturado: {self._pending} chamadas pendentes"
+                )
+            self._pending += 1
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, self._tracked, functools.partial(func, *args, **kwargs))
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def iterate(self, iterator: Iterator[Any]) -> AsyncIterator[Any]:
+        """Consome um iterador bloqueante (ex.: gerador de streaming) item a item no pool"""
+        iterator = iter(iterator)
+        try:
+            while True:
+                item = await self.run(next, iterator, _EXHAUSTED)
+                if item is _EXHAUSTED:
+                    break
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                await self.run(close)
+
+    def shutdown(self, wait: bool = False):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'running': self._running,
+                'queued': self._pending - self._running,
+                'completed': self._completed,
+                'rejected': self._rejected,
+            }
+
+    def _tracked(self, call: Callable[[], Any]) -> Any:
+        with self._lock:
+            self._running += 1
+        try:
+            return call()
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+
+_db_executor: Optional[BlockingExecutor] = None
+_model_executor: Optional[BlockingExecutor] = None
+_batch_executor: Optional[BlockingExecutor] = None
+_shared_lock = threading.Lock()
+
+
+def get_db_executor() -> BlockingExecutor:
+    """Pool compartilhado para pyodbc (`DDAI_DB_THREADS`, `DDAI_DB_MAX_PENDING`)"""
+    global _db_executor
+    with _shared_lock:
+        if _db_executor is None:
+            _db_executor = BlockingExecutor(
+                "ddai-db",
+                max_workers=int(os.getenv("DDAI_DB_THREADS", "8")),
+                max_pending=int(os.getenv("DDAI_DB_MAX_PENDING", "64"))
+            )
+        return _db_executor
+
+
+def get_model_executor() -> BlockingExecutor:
+    """Pool compartilhado para inferência (`DDAI_MODEL_THREADS`, `DDAI_MODEL_MAX_PENDING`)"""
+    global _model_executor
+    with _shared_lock:
+        if _model_executor is None:
+            _model_executor = BlockingExecutor(
+                "ddai-model",
+                max_workers=int(os.getenv("DDAI_MODEL_THREADS", "2")),
+                max_pending=int(os.getenv("DDAI_MODEL_MAX_PENDING", "32"))
+            )
+        return _model_executor
+
+
+def get_batch_executor() -> BlockingExecutor:
+    """Pool compartilhado para os lotes inteligentes (`DDAI_BATCH_THREADS`, `DDAI_BATCH_MAX_PENDING`)"""
+    global _batch_executor
+    with _shared_lock:
+        if _batch_executor is None:
+            _batch_executor = BlockingExecutor(
+                "ddai-batch",
+                max_workers=int(os.getenv("DDAI_BATCH_THREADS", "4")),
+                max_pending=int(os.getenv("DDAI_BATCH_MAX_PENDING", "16"))
+            )
+        return _batch_executor
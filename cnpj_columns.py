@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+🧮 CNPJ COLUMNS - Advanced DD-AI v2.1
+=====================================
+
+Extração e validação vetorizada de CNPJ sobre resultados SQL em colunas.
+
+Em vez de uma regex Python por célula, cada coluna vira um array NumPy de
+caracteres (`U` de largura fixa, visto como matriz de code points). Os
+formatos usuais ("XX.XXX.XXX/XXXX-XX", 14 dígitos, números que perderam
+zeros à esquerda e colunas inteiras) são decodificados e os dígitos
+verificadores (módulo 11) calculados coluna a coluna, sem laço por linha.
+Somente grafias atípicas (separadores parciais) passam pelo caminho Python.
+
+Aceita listas, arrays NumPy, Series do pandas e arrays do pyarrow.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+# Nomes de coluna que indicam CNPJ (desempate na detecção)
+CNPJ_COLUMN_HINTS = ('cnpj', 'id_unico', 'documento', 'cpf_cnpj')
+
+_W1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+_W2 = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+
+# "XX.XXX.XXX/XXXX-XX": posições dos dígitos e posições/códigos dos separadores
+_FORMATTED_DIGIT_POSITIONS = (0, 1, 3, 4, 5, 7, 8, 9, 11, 12, 13, 14, 16, 17)
+_FORMATTED_SEPARATORS = ((2, ord('.')), (6, ord('.')), (10, ord('/')), (15, ord('-')))
+_CNPJ_CHARS = frozenset('0123456789./- ')
+
+
+@dataclass
+class CNPJColumnScan:
+    """CNPJs de uma coluna: máscara de válidos e forma canônica por linha"""
+    column: Optional[str]
+    valid_mask: np.ndarray
+    canonical: np.ndarray
+
+    @property
+    def valid_count(self) -> int:
+        return int(self.valid_mask.sum())
+
+    @property
+    def valid_ratio(self) -> float:
+        return self.valid_count / len(self.valid_mask) if len(self.valid_mask) else 0.0
+
+    def unique_cnpjs(self) -> List[str]:
+        """CNPJs válidos sem repetição, na ordem das linhas"""
+        return list(dict.fromkeys(self.canonical[self.valid_mask].tolist()))
+
+
+def _to_numpy(values: Any) -> np.ndarray:
+    """Converte listas, Series do pandas ou arrays do pyarrow em array NumPy"""
+    if hasattr(values, "to_numpy") and not isinstance(values, np.ndarray):
+        if hasattr(values, "dtype") and not isinstance(values.dtype, np.dtype):
+            # pandas com dtype de extensão (Int64, string, ArrowDtype...): pd.NA viraria
+            # float (NaN) ou objeto NA; None é tratado como vazio adiante
+            return values.to_numpy(dtype=object, na_value=None)
+        if getattr(values, "null_count", 0) and str(getattr(values, "type", "")).startswith(("int", "uint")):
+            # pyarrow: inteiros com nulos virariam float; zero é rejeitado adiante
+            values = values.fill_null(0)
+        try:
+            # pyarrow: Array/ChunkedArray; pandas: Series
+            return np.asarray(values.to_numpy(zero_copy_only=False))
+        except TypeError:
+            return np.asarray(values.to_numpy())
+    if isinstance(values, np.ndarray):
+        return values
+    try:
+        return np.array(values)
+    except ValueError:
+        return np.array(values, dtype=object)
+
+
+def _digits_from_integers(values: np.ndarray):
+    """Colunas inteiras (CNPJ armazenado como número)"""
+    numbers = values.astype(np.int64)
+    well_formed = (numbers > 0) & (numbers < 10 ** 14)
+    digits = np.empty((14, len(numbers)), dtype=np.int32)
+    rest = np.where(well_formed, numbers, 0)
+    for position in range(13, -1, -1):
+        digits[position] = rest % 10
+        rest //= 10
+    return digits, well_formed
+
+
+def _all_digits(is_digit: np.ndarray, positions) -> np.ndarray:
+    result = is_digit[positions[0]].copy()
+    for position in positions[1:]:
+        result &= is_digit[position]
+    return result
+
+
+def _digits_from_strings(values: np.ndarray):
+    """Colunas texto: formatos usuais vetorizados, grafias atípicas em Python"""
+    if values.dtype.kind != 'U':
+        values = values.astype(object)
+        values[np.equal(values, None)] = ''
+        values = values.astype(str)
+
+    values = np.char.strip(values)
+    lengths = np.char.str_len(values)
+    width = max(values.dtype.itemsize // 4, 18)
+    if values.dtype.itemsize // 4 != width:
+        values = values.astype(f'U{width}')
+
+    n = len(values)
+    # Code points transpostos (posição, linha): cada posição fica contígua na memória;
+    # dígitos viram 0-9 e qualquer outro caractere >= 10
+    codes = np.ascontiguousarray(values.view(np.uint32).reshape(n, width)[:, :18].T)
+    shifted = (codes - np.uint32(48)).astype(np.int32)
+    is_digit = (shifted >= 0) & (shifted < 10)
+
+    # 14 dígitos sem formatação
+    plain = (lengths == 14) & _all_digits(is_digit, range(14))
+
+    # "XX.XXX.XXX/XXXX-XX"
+    formatted = (lengths == 18) & _all_digits(is_digit, _FORMATTED_DIGIT_POSITIONS)
+    for position, code in _FORMATTED_SEPARATORS:
+        formatted &= codes[position] == code
+
+    # 12-13 dígitos: zeros à esquerda perdidos em colunas numéricas
+    short = {length: (lengths == length) & _all_digits(is_digit, range(length)) for length in (12, 13)}
+
+    digits = np.empty((14, n), dtype=np.int32)
+    for position in range(14):
+        column = np.where(formatted, shifted[_FORMATTED_DIGIT_POSITIONS[position]], shifted[position])
+        for length, mask in short.items():
+            padding = 14 - length
+            column = np.where(mask, shifted[position - padding] if position >= padding else 0, column)
+        digits[position] = column
+    well_formed = plain | formatted | short[12] | short[13]
+
+    # Separadores parciais (ex.: "12345678/0001-90"): poucas linhas, caminho Python
+    remaining = np.flatnonzero(~well_formed & (lengths > 14) & (lengths <= 18))
+    for index in remaining:
+        text = str(values[index])
+        if set(text) - _CNPJ_CHARS:
+            continue
+        clean = ''.join(filter(str.isdigit, text))
+        if len(clean) == 14:
+            digits[:, index] = np.frombuffer(clean.encode(), dtype=np.uint8) - 48
+            well_formed[index] = True
+
+    return digits, well_formed
+
+
+def _check_digits_ok(digits: np.ndarray) -> np.ndarray:
+    """Dígitos verificadores (módulo 11), calculados posição a posição"""
+    first_sum = np.zeros(digits.shape[1], dtype=np.int32)
+    second_sum = np.zeros(digits.shape[1], dtype=np.int32)
+    for position in range(12):
+        first_sum += digits[position] * _W1[position]
+        second_sum += digits[position] * _W2[position]
+
+    remainder = first_sum % 11
+    first_dv = np.where(remainder < 2, 0, 11 - remainder)
+    remainder = (second_sum + first_dv * _W2[12]) % 11
+    second_dv = np.where(remainder < 2, 0, 11 - remainder)
+
+    # Sequências repetidas (00000000000000, 11111111111111...) não são CNPJ
+    repeated = np.ones(digits.shape[1], dtype=bool)
+    for position in range(1, 14):
+        repeated &= digits[position] == digits[0]
+    return (digits[12] == first_dv) & (digits[13] == second_dv) & ~repeated
+
+
+def scan_cnpj_values(values: Any, column: Optional[str] = None) -> CNPJColumnScan:
+    """Valida todos os valores de uma coluna e devolve a forma canônica (14 dígitos)"""
+    array = _to_numpy(values)
+    if array.ndim != 1:
+        array = array.ravel()
+
+    if array.dtype.kind in 'iu':
+        digits, well_formed = _digits_from_integers(array)
+    elif array.dtype.kind in 'UO':
+        digits, well_formed = _digits_from_strings(array)
+    else:
+        # float, data, binário...: não é coluna de CNPJ
+        empty = np.zeros(len(array), dtype=bool)
+        return CNPJColumnScan(column, empty, np.full(len(array), '', dtype='U14'))
+
+    valid = well_formed & _check_digits_ok(digits)
+
+    canonical = np.full(len(array), '', dtype='U14')
+    if valid.any():
+        ascii_digits = np.ascontiguousarray((digits[:, valid] + 48).astype(np.uint8).T)
+        canonical[valid] = ascii_digits.view('S14').ravel().astype('U14')
+    return CNPJColumnScan(column, valid, canonical)
+
+
+def detect_cnpj_column(columns: Mapping[str, Any], min_valid_ratio: float = 0.6,
+                       name_hints: Sequence[str] = CNPJ_COLUMN_HINTS) -> Optional[CNPJColumnScan]:
+    """
+    Escolhe a coluna de CNPJ de um resultado em colunas
+
+    A coluna com maior fração de CNPJs válidos (>= `min_valid_ratio`, entre
+    as linhas não nulas) vence; em empate, prefere nomes como "cnpj".
+    """
+    best = None
+    best_rank = None
+    for name, values in columns.items():
+        scan = scan_cnpj_values(values, column=name)
+        non_empty = _non_empty_count(values)
+        if not non_empty:
+            continue
+        ratio = scan.valid_count / non_empty
+        if ratio < min_valid_ratio:
+            continue
+        hinted = any(hint in str(name).lower() for hint in name_hints)
+        rank = (ratio, hinted)
+        if best_rank is None or rank > best_rank:
+            best, best_rank = scan, rank
+    return best
+
+
+def first_cnpj_per_row(columns: Mapping[str, Any]) -> np.ndarray:
+    """Primeiro CNPJ válido de cada linha, varrendo as colunas na ordem ('' se nenhum)"""
+    result = None
+    for name, values in columns.items():
+        scan = scan_cnpj_values(values, column=name)
+        if result is None:
+            result = np.full(len(scan.canonical), '', dtype='U14')
+        fill = (result == '') & scan.valid_mask
+        result[fill] = scan.canonical[fill]
+    return result if result is not None else np.array([], dtype='U14')
+
+
+def extract_result_cnpjs(columns: Mapping[str, Any], min_valid_ratio: float = 0.6) -> List[str]:
+    """
+    CNPJs válidos de um resultado SQL, sem repetição e na ordem das linhas
+
+    Usa a coluna de CNPJ quando há uma; senão, o primeiro CNPJ válido de cada linha.
+    """
+    column_scan = detect_cnpj_column(columns, min_valid_ratio=min_valid_ratio)
+    if column_scan is not None:
+        return column_scan.unique_cnpjs()
+    per_row = first_cnpj_per_row(columns)
+    return list(dict.fromkeys(per_row[per_row != ''].tolist()))
+
+
+class CNPJCollector:
+    """
+    Acumula CNPJs de um resultado lido em páginas/record batches
+
+    A coluna de CNPJ é detectada na primeira página com linhas e as
+    seguintes validam só ela; sem coluna dominante, vale o primeiro CNPJ
+    válido de cada linha. Memória proporcional aos CNPJs únicos, não às linhas.
+    """
+
+    def __init__(self, min_valid_ratio: float = 0.6):
+        self.min_valid_ratio = min_valid_ratio
+        self.column: Optional[str] = None
+        self.rows_seen = 0
+        self._detected = False
+        self._cnpjs: Dict[str, None] = {}
+
+    def add(self, columns: Mapping[str, Any]):
+        """Processa uma página (colunas -> valores)"""
+        if not columns:
+            return
+        page_rows = len(_to_numpy(next(iter(columns.values()))))
+        if not page_rows:
+            return
+        self.rows_seen += page_rows
+
+        if not self._detected:
+            self._detected = True
+            column_scan = detect_cnpj_column(columns, min_valid_ratio=self.min_valid_ratio)
+            if column_scan is not None:
+                self.column = column_scan.column
+                self._cnpjs.update(dict.fromkeys(column_scan.unique_cnpjs()))
+                return
+
+        if self.column is not None:
+            found = scan_cnpj_values(columns[self.column], column=self.column).unique_cnpjs()
+        else:
+            per_row = first_cnpj_per_row(columns)
+            found = per_row[per_row != ''].tolist()
+        self._cnpjs.update(dict.fromkeys(found))
+
+    @property
+    def cnpjs(self) -> List[str]:
+        return list(self._cnpjs)
+
+
+def columns_from_rows(column_names: Sequence[str], rows: Sequence[Any]) -> Dict[str, List[Any]]:
+    """Transpõe linhas (tuplas do pyodbc/listas ou dicionários) em colunas"""
+    if not rows:
+        return {name: [] for name in column_names}
+    if isinstance(rows[0], Mapping):
+        return {name: [row.get(name) for row in rows] for name in column_names}
+    transposed = list(zip(*rows))
+    return {name: list(values) for name, values in zip(column_names, transposed)}
+
+
+def _non_empty_count(values: Any) -> int:
+    array = _to_numpy(values)
+    if array.dtype.kind == 'O':
+        return int(sum(1 for value in array if value not in (None, '')))
+    if array.dtype.kind == 'U':
+        return int((np.char.str_len(np.char.strip(array)) > 0).sum())
+    return len(array)
+
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+🏢 CNPJ ENRICHMENT - Advanced DD-AI v2.1
+========================================
+
+Serviço único de enriquecimento de CNPJ (API Brasil) com cache local
+persistente em SQLite, compartilhado por todos os pipelines.
+
+- Chave: CNPJ normalizado com 14 dígitos
+- Frescor configurável (`max_age_hours`) e validade por campo
+  (`field_ttl_hours`): um registro só é reaproveitado se todos os campos
+  que o chamador usa ainda estiverem dentro da validade
+- Cache negativo para CNPJs inexistentes (404) e inválidos (400)
+- Em caso de falha da API, um registro vencido é devolvido como fallback
+- Com o índice local da Receita Federal (`cnpj_registry`), a consulta é
+  resolvida nele primeiro e a rede só é usada para CNPJs ausentes do dump
+
+A carteira é reanalisada diariamente e os dados cadastrais raramente mudam,
+então a maior parte das consultas é atendida localmente.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from async_http import AsyncHTTPClient, TokenBucket
+from cnpj_registry import DEFAULT_REGISTRY_PATH, CNPJRegistry
+from cnpj_utils import is_valid_cnpj, normalize_cnpj
+
+logger = logging.getLogger(__name__)
+
+BRASILAPI_CNPJ_URL = "https://brasilapi.com.br/api/cnpj/v1/{cnpj}"
+
+# Validade padrão por campo da resposta da API Brasil (horas).
+# Campos não listados usam `max_age_hours`.
+DEFAULT_FIELD_TTL_HOURS: Dict[str, float] = {
+    'descricao_situacao_cadastral': 72,
+    'capital_social': 24 * 30,
+    'porte': 24 * 30,
+    'cnae_fiscal_descricao': 24 * 30,
+    'ddd_telefone_1': 24 * 30,
+    'razao_social': 24 * 90,
+    'nome_fantasia': 24 * 90,
+    'municipio': 24 * 90,
+    'uf': 24 * 90,
+    'data_inicio_atividade': 24 * 365,
+}
+
+# Campos lidos pelos pipelines (argumento `fields` das consultas): a validade
+# aplicada é a do campo mais volátil que o chamador usa
+COMPANY_SUMMARY_FIELDS = (
+    'razao_social', 'nome_fantasia', 'descricao_situacao_cadastral', 'cnae_fiscal_descricao',
+    'porte', 'capital_social', 'municipio', 'uf',
+)
+COMPANY_PROFILE_FIELDS = COMPANY_SUMMARY_FIELDS + ('data_inicio_atividade', 'ddd_telefone_1')
+
+# Status HTTP que indicam CNPJ inexistente/inválido (resposta definitiva)
+NEGATIVE_STATUS_CODES = (400, 404)
+
+
+@dataclass
+class EnrichmentResult:
+    """Resultado de uma consulta de CNPJ"""
+    cnpj: str
+    success: bool
+    data: Dict[str, Any] = field(default_factory=dict)
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    # 'api_brasil', 'receita_federal', 'cache', 'cache_negative' ou 'stale_cache'
+    source: str = 'api_brasil'
+    fetched_at: float = 0.0
+
+    @property
+    def from_cache(self) -> bool:
+        return self.source != 'api_brasil'
+
+
+class CNPJEnrichmentService:
+    """Consulta CNPJ na API Brasil com cache persistente em SQLite"""
+
+    def __init__(self,
+                 db_path: str = "cache/cnpj_enrichment.sqlite3",
+                 max_age_hours: float = 24 * 7,
+                 field_ttl_hours: Optional[Dict[str, float]] = None,
+                 negative_ttl_hours: float = 24,
+                 timeout: float = 10,
+                 session: Optional[requests.Session] = None,
+                 rate_per_second: float = 3.0,
+                 burst: Optional[float] = None,
+                 max_concurrency: int = 8,
+                 registry: Optional[CNPJRegistry] = None):
+        """
+        Args:
+            db_path: Arquivo SQLite do cache (":memory:" para cache volátil)
+            max_age_hours: Validade máxima de um registro positivo
+            field_ttl_hours: Validade por campo (sobrescreve os padrões)
+            negative_ttl_hours: Validade de respostas 404/400
+            timeout: Timeout da requisição à API Brasil (s)
+            session: Sessão HTTP (None = sessão própria)
+            rate_per_second: Requisições por segundo à API Brasil (todas as chamadas)
+            burst: Rajada máxima do token bucket (None = `rate_per_second`)
+            max_concurrency: Requisições simultâneas em `lookup_many_async`
+            registry: Índice local da Receita Federal consultado antes do cache/rede
+        """
+        self.max_age = max_age_hours * 3600
+        self.field_ttl = {
+            name: hours * 3600
+            for name, hours in {**DEFAULT_FIELD_TTL_HOURS, **(field_ttl_hours or {})}.items()
+        }
+        self.negative_ttl = negative_ttl_hours * 3600
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.max_concurrency = max_concurrency
+        # Limite de taxa compartilhado pelos caminhos síncrono e assíncrono
+        self.rate_limiter = TokenBucket(rate_per_second, burst)
+        self.registry = registry
+
+        self._lock = threading.Lock()
+        self._stats = {
+            'registry_hits': 0, 'hits': 0, 'negative_hits': 0, 'misses': 0, 'api_calls': 0, 'stale_served': 0
+        }
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS cnpj_cache (
+                    cnpj TEXT PRIMARY KEY,
+                    status_code INTEGER NOT NULL,
+                    payload TEXT,
+                    fetched_at REAL NOT NULL
+                )
+            """)
+
+    def lookup(self, cnpj: str, fields: Optional[Iterable[str]] = None,
+               force_refresh: bool = False) -> EnrichmentResult:
+        """
+        Retorna os dados cadastrais do CNPJ (cache local ou API Brasil)
+
+        Args:
+            cnpj: CNPJ em qualquer formato
+            fields: Campos usados pelo chamador (None = todos com validade configurada);
+                define qual validade por campo se aplica
+            force_refresh: Ignorar o cache e consultar a API
+        """
+        clean_cnpj, result, cached = self._resolve_cached(cnpj, fields, force_refresh)
+        if result is not None:
+            return result
+
+        self.rate_limiter.acquire()
+        return self._with_stale_fallback(self._fetch(clean_cnpj), cached)
+
+    async def lookup_async(self, cnpj: str, client: AsyncHTTPClient,
+                           fields: Optional[Iterable[str]] = None,
+                           force_refresh: bool = False) -> EnrichmentResult:
+        """Mesmo que `lookup`, usando um `AsyncHTTPClient` (limite de taxa e retry no cliente)"""
+        clean_cnpj, result, cached = self._resolve_cached(cnpj, fields, force_refresh)
+        if result is not None:
+            return result
+
+        self._count('api_calls')
+        try:
+            response = await client.get(BRASILAPI_CNPJ_URL.format(cnpj=clean_cnpj))
+            result = self._handle_response(clean_cnpj, response.status_code, response.json)
+        except Exception as e:
+            result = EnrichmentResult(cnpj=clean_cnpj, success=False, error=str(e))
+        return self._with_stale_fallback(result, cached)
+
+    async def lookup_many_async(self, cnpjs: List[str],
+                                fields: Optional[Iterable[str]] = None) -> List[EnrichmentResult]:
+        """Enriquece vários CNPJs em paralelo (taxa e concorrência limitadas), na ordem de entrada"""
+        if self.registry is not None:
+            # Uma única consulta em lote ao índice local; as consultas individuais
+            # abaixo são respondidas pela memória do registro
+            try:
+                self.registry.lookup_many([normalize_cnpj(cnpj) for cnpj in cnpjs])
+            except Exception as e:
+                logger.warning(f"⚠️ Erro no registro CNPJ local: {e}")
+
+        async with AsyncHTTPClient(
+            rate_limiter=self.rate_limiter,
+            max_concurrency=self.max_concurrency,
+            timeout=self.timeout
+        ) as client:
+            return list(await asyncio.gather(
+                *(self.lookup_async(cnpj, client, fields) for cnpj in cnpjs)
+            ))
+
+    def lookup_many(self, cnpjs: List[str],
+                    fields: Optional[Iterable[str]] = None) -> List[EnrichmentResult]:
+        """Versão síncrona de `lookup_many_async` (para código fora de um event loop)"""
+        return asyncio.run(self.lookup_many_async(cnpjs, fields))
+
+    def _resolve_cached(self, cnpj: str, fields: Optional[Iterable[str]],
+                        force_refresh: bool) -> Tuple[str, Optional[EnrichmentResult], Optional[tuple]]:
+        """Normaliza o CNPJ e responde pelo cache quando possível"""
+        clean_cnpj = normalize_cnpj(cnpj)
+        # Dígitos verificadores inválidos: nem cache nem rede
+        if not is_valid_cnpj(clean_cnpj):
+            result = EnrichmentResult(cnpj=clean_cnpj, success=False, error='CNPJ inválido', source='validation')
+            return clean_cnpj, result, None
+
+        if self.registry is not None and not force_refresh:
+            try:
+                data = self.registry.lookup(clean_cnpj)
+            except Exception as e:
+                logger.warning(f"⚠️ Erro no registro CNPJ local: {e}")
+                data = None
+            if data is not None:
+                self._count('registry_hits')
+                return clean_cnpj, EnrichmentResult(
+                    cnpj=clean_cnpj, success=True, data=data, status_code=200, source='receita_federal'
+                ), None
+
+        now = time.time()
+        cached = None if force_refresh else self._load(clean_cnpj)
+
+        if cached is not None:
+            status_code, payload, fetched_at = cached
+            age = now - fetched_at
+            if status_code in NEGATIVE_STATUS_CODES and age < self.negative_ttl:
+                self._count('negative_hits')
+                return clean_cnpj, EnrichmentResult(
+                    cnpj=clean_cnpj, success=False, status_code=status_code,
+                    error=f'API Brasil retornou {status_code}', source='cache_negative', fetched_at=fetched_at
+                ), cached
+            if status_code == 200 and age < self._max_age_for(fields):
+                self._count('hits')
+                return clean_cnpj, EnrichmentResult(
+                    cnpj=clean_cnpj, success=True, data=payload, status_code=200,
+                    source='cache', fetched_at=fetched_at
+                ), cached
+
+        self._count('misses')
+        return clean_cnpj, None, cached
+
+    def _with_stale_fallback(self, result: EnrichmentResult, cached: Optional[tuple]) -> EnrichmentResult:
+        """Falha transitória: melhor um registro vencido do que nenhum"""
+        if not result.success and result.status_code not in NEGATIVE_STATUS_CODES \
+                and cached is not None and cached[0] == 200:
+            self._count('stale_served')
+            logger.warning(f"⚠️ API Brasil indisponível para {result.cnpj}; usando cache vencido")
+            return EnrichmentResult(
+                cnpj=result.cnpj, success=True, data=cached[1], status_code=200,
+                error=result.error, source='stale_cache', fetched_at=cached[2]
+            )
+        return result
+
+    def _max_age_for(self, fields: Optional[Iterable[str]]) -> float:
+        """Menor validade entre os campos usados pelo chamador"""
+        names = self.field_ttl.keys() if fields is None else fields
+        return min([self.max_age] + [self.field_ttl.get(name, self.max_age) for name in names])
+
+    def _fetch(self, clean_cnpj: str) -> EnrichmentResult:
+        """Consulta a API Brasil e grava respostas definitivas no cache"""
+        self._count('api_calls')
+        try:
+            response = self.session.get(BRASILAPI_CNPJ_URL.format(cnpj=clean_cnpj), timeout=self.timeout)
+            return self._handle_response(clean_cnpj, response.status_code, response.json)
+        except Exception as e:
+            return EnrichmentResult(cnpj=clean_cnpj, success=False, error=str(e))
+
+    def _handle_response(self, clean_cnpj: str, status_code: int, read_json) -> EnrichmentResult:
+        """Converte a resposta HTTP em resultado e grava as respostas definitivas no cache"""
+        now = time.time()
+        if status_code == 200:
+            data = read_json()
+            self._store(clean_cnpj, 200, data, now)
+            return EnrichmentResult(cnpj=clean_cnpj, success=True, data=data, status_code=200, fetched_at=now)
+
+        if status_code in NEGATIVE_STATUS_CODES:
+            self._store(clean_cnpj, status_code, None, now)
+
+        return EnrichmentResult(
+            cnpj=clean_cnpj, success=False, status_code=status_code,
+            error=f'API Brasil retornou {status_code}', fetched_at=now
+        )
+
+    def _load(self, clean_cnpj: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status_code, payload, fetched_at FROM cnpj_cache WHERE cnpj = ?", (clean_cnpj,)
+            ).fetchone()
+        if row is None:
+            return None
+        status_code, payload, fetched_at = row
+        return status_code, json.loads(payload) if payload else {}, fetched_at
+
+    def _store(self, clean_cnpj: str, status_code: int, data: Optional[Dict[str, Any]], fetched_at: float):
+        payload = json.dumps(data, ensure_ascii=False) if data is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cnpj_cache (cnpj, status_code, payload, fetched_at) VALUES (?, ?, ?, ?)",
+                (clean_cnpj, status_code, payload, fetched_at)
+            )
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def invalidate(self, cnpj: Optional[str] = None):
+        """Remove um CNPJ do cache (ou todos, se `cnpj` for None)"""
+        with self._lock, self._conn:
+            if cnpj is None:
+                self._conn.execute("DELETE FROM cnpj_cache")
+            else:
+                self._conn.execute("DELETE FROM cnpj_cache WHERE cnpj = ?", (normalize_cnpj(cnpj),))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de uso e tamanho do cache"""
+        with self._lock:
+            stats = dict(self._stats)
+            positive, negative = self._conn.execute(
+                "SELECT COALESCE(SUM(status_code = 200), 0), COALESCE(SUM(status_code != 200), 0) FROM cnpj_cache"
+            ).fetchone()
+        local = stats['registry_hits'] + stats['hits'] + stats['negative_hits']
+        lookups = local + stats['misses']
+        stats.update({
+            'db_path': self.db_path,
+            'registry_path': self.registry.db_path if self.registry is not None else None,
+            'cached_companies': positive,
+            'cached_not_found': negative,
+            'hit_rate': local / lookups if lookups else 0.0,
+        })
+        return stats
+
+
+_shared_service: Optional[CNPJEnrichmentService] = None
+_shared_lock = threading.Lock()
+
+
+def get_enrichment_service() -> CNPJEnrichmentService:
+    """Instância compartilhada, configurada por variáveis de ambiente `DDAI_CNPJ_*`/`DDAI_BRASILAPI_*`"""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = CNPJEnrichmentService(
+                db_path=os.getenv("DDAI_CNPJ_CACHE_PATH", "cache/cnpj_enrichment.sqlite3"),
+                max_age_hours=float(os.getenv("DDAI_CNPJ_CACHE_MAX_AGE_HOURS", str(24 * 7))),
+                negative_ttl_hours=float(os.getenv("DDAI_CNPJ_NEGATIVE_TTL_HOURS", "24")),
+                rate_per_second=float(os.getenv("DDAI_BRASILAPI_RATE_PER_SEC", "3")),
+                max_concurrency=int(os.getenv("DDAI_BRASILAPI_MAX_CONCURRENCY", "8")),
+                registry=CNPJRegistry.open_if_available(
+                    os.getenv("DDAI_CNPJ_REGISTRY_PATH", DEFAULT_REGISTRY_PATH)
+                )
+            )
+        return _shared_service
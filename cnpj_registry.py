@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+🗃️ CNPJ REGISTRY - Advanced DD-AI v2.1
+======================================
+
+Índice local do Cadastro Nacional da Pessoa Jurídica construído a partir
+dos dados abertos da Receita Federal (arquivos Empresas*, Estabelecimentos*,
+Cnaes e Municipios; CSV sem cabeçalho, separador ";" e codificação latin-1).
+
+O importador grava um banco DuckDB compacto, ordenado e indexado pela raiz
+do CNPJ (`cnpj_basico`, 8 dígitos). As consultas devolvem um dicionário no
+mesmo formato da API Brasil, então o serviço de enriquecimento consulta
+este índice primeiro e só usa a rede como fallback.
+
+Importação:
+    python cnpj_registry.py /caminho/dados_abertos_cnpj --db data/cnpj_registry.duckdb
+"""
+
+import glob
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_PATH = "data/cnpj_registry.duckdb"
+
+# Sufixos dos arquivos extraídos do dump (ex.: K3241.K03200Y0.D40113.EMPRECSV)
+DUMP_FILE_SUFFIXES = {
+    'empresas': 'EMPRECSV',
+    'estabelecimentos': 'ESTABELE',
+    'cnaes': 'CNAECSV',
+    'municipios': 'MUNICCSV',
+}
+
+EMPRESAS_COLUMNS = {
+    'cnpj_basico': 'VARCHAR', 'razao_social': 'VARCHAR', 'natureza_juridica': 'VARCHAR',
+    'qualificacao_responsavel': 'VARCHAR', 'capital_social': 'VARCHAR', 'porte': 'VARCHAR',
+    'ente_federativo': 'VARCHAR',
+}
+
+ESTABELECIMENTOS_COLUMNS = {
+    'cnpj_basico': 'VARCHAR', 'cnpj_ordem': 'VARCHAR', 'cnpj_dv': 'VARCHAR',
+    'matriz_filial': 'VARCHAR', 'nome_fantasia': 'VARCHAR', 'situacao_cadastral': 'VARCHAR',
+    'data_situacao_cadastral': 'VARCHAR', 'motivo_situacao_cadastral': 'VARCHAR',
+    'nome_cidade_exterior': 'VARCHAR', 'pais': 'VARCHAR', 'data_inicio_atividade': 'VARCHAR',
+    'cnae_fiscal_principal': 'VARCHAR', 'cnae_fiscal_secundaria': 'VARCHAR',
+    'tipo_logradouro': 'VARCHAR', 'logradouro': 'VARCHAR', 'numero': 'VARCHAR',
+    'complemento': 'VARCHAR', 'bairro': 'VARCHAR', 'cep': 'VARCHAR', 'uf': 'VARCHAR',
+    'municipio': 'VARCHAR', 'ddd_1': 'VARCHAR', 'telefone_1': 'VARCHAR', 'ddd_2': 'VARCHAR',
+    'telefone_2': 'VARCHAR', 'ddd_fax': 'VARCHAR', 'fax': 'VARCHAR', 'correio_eletronico': 'VARCHAR',
+    'situacao_especial': 'VARCHAR', 'data_situacao_especial': 'VARCHAR',
+}
+
+CODE_TABLE_COLUMNS = {'codigo': 'VARCHAR', 'descricao': 'VARCHAR'}
+
+SITUACAO_CADASTRAL = {'01': 'NULA', '02': 'ATIVA', '03': 'SUSPENSA', '04': 'INAPTA', '08': 'BAIXADA'}
+PORTE_EMPRESA = {
+    '00': 'NÃO INFORMADO', '01': 'MICRO EMPRESA', '03': 'EMPRESA DE PEQUENO PORTE', '05': 'DEMAIS'
+}
+
+# Colunas da tabela desnormalizada `cnpj_registry` (mesma ordem de `_to_brasilapi`)
+_SELECT_COLUMNS = """
+    lpad(CAST(cnpj AS VARCHAR), 14, '0') AS cnpj,
+    razao_social, nome_fantasia, situacao_cadastral, data_inicio_atividade,
+    cnae_fiscal_principal, cnae_descricao, porte, capital_social,
+    municipio, uf, ddd_1, telefone_1, matriz_filial
+"""
+
+# O CNPJ (já validado, só dígitos) entra como literal inteiro: com parâmetro o
+# DuckDB não poda os row groups pela ordenação e a consulta fica ~4x mais lenta
+_LOOKUP_SQL = f"SELECT {_SELECT_COLUMNS} FROM cnpj_registry WHERE cnpj = {{cnpj}}"
+
+
+def _read_csv_sql(paths: List[str], columns: Dict[str, str]) -> str:
+    """Expressão `read_csv` do DuckDB para arquivos do dump"""
+    files = ", ".join("'" + path.replace("'", "''") + "'" for path in paths)
+    spec = ", ".join(f"'{name}': '{kind}'" for name, kind in columns.items())
+    return (
+        f"read_csv([{files}], delim=';', quote='\"', header=false, "
+        f"encoding='latin-1', columns={{{spec}}})"
+    )
+
+
+def _find_dump_files(source_dir: str, suffix: str) -> List[str]:
+    return sorted(
+        path for path in glob.glob(os.path.join(source_dir, "**", "*"), recursive=True)
+        if os.path.isfile(path) and path.upper().endswith(suffix)
+    )
+
+
+def import_receita_dump(source_dir: str, db_path: str = DEFAULT_REGISTRY_PATH) -> Dict[str, int]:
+    """
+    Importa o dump de CNPJ da Receita Federal para um banco DuckDB
+
+    Args:
+        source_dir: Diretório com os .zip baixados ou com os CSVs já extraídos
+        db_path: Arquivo DuckDB de saída (substituído ao final da importação)
+
+    Returns:
+        Quantidade de linhas por tabela
+    """
+    if not DUCKDB_AVAILABLE:
+        raise RuntimeError("duckdb não instalado. Execute: pip install duckdb")
+
+    started = time.time()
+    work_dir = tempfile.mkdtemp(prefix="ddai_cnpj_")
+    tmp_db = os.path.join(work_dir, "registry.duckdb")
+
+    try:
+        # Arquivos .zip do portal são extraídos para um diretório temporário
+        for archive in sorted(glob.glob(os.path.join(source_dir, "*.zip"))):
+            logger.info(f"📦 Extraindo {os.path.basename(archive)}")
+            with zipfile.ZipFile(archive) as zf:
+                zf.extractall(os.path.join(work_dir, "csv"))
+
+        files = {}
+        for table, suffix in DUMP_FILE_SUFFIXES.items():
+            files[table] = (
+                _find_dump_files(os.path.join(work_dir, "csv"), suffix)
+                or _find_dump_files(source_dir, suffix)
+            )
+            if not files[table]:
+                raise FileNotFoundError(f"Nenhum arquivo *{suffix} encontrado em {source_dir}")
+
+        conn = duckdb.connect(tmp_db)
+        try:
+            # Tabelas de apoio (temporárias) lidas direto dos CSVs
+            conn.execute(f"""
+                CREATE TEMP TABLE empresas AS
+                SELECT cnpj_basico, razao_social, porte,
+                       TRY_CAST(replace(capital_social, ',', '.') AS DOUBLE) AS capital_social
+                FROM {_read_csv_sql(files['empresas'], EMPRESAS_COLUMNS)}
+            """)
+            conn.execute(f"CREATE TEMP TABLE cnaes AS SELECT * FROM {_read_csv_sql(files['cnaes'], CODE_TABLE_COLUMNS)}")
+            conn.execute(
+                f"CREATE TEMP TABLE municipios AS SELECT * FROM {_read_csv_sql(files['municipios'], CODE_TABLE_COLUMNS)}"
+            )
+
+            # Uma linha por estabelecimento já com empresa, CNAE e município resolvidos,
+            # ordenada pela raiz do CNPJ (consulta sem junções)
+            conn.execute(f"""
+                CREATE TABLE cnpj_registry AS
+                SELECT CAST(e.cnpj_basico || e.cnpj_ordem || e.cnpj_dv AS BIGINT) AS cnpj,
+                       e.cnpj_basico, e.matriz_filial, e.nome_fantasia,
+                       e.situacao_cadastral, e.data_inicio_atividade, e.cnae_fiscal_principal,
+                       c.descricao AS cnae_descricao, emp.razao_social, emp.porte, emp.capital_social,
+                       m.descricao AS municipio, e.uf, e.ddd_1, e.telefone_1
+                FROM {_read_csv_sql(files['estabelecimentos'], ESTABELECIMENTOS_COLUMNS)} e
+                LEFT JOIN empresas emp ON emp.cnpj_basico = e.cnpj_basico
+                LEFT JOIN cnaes c ON c.codigo = e.cnae_fiscal_principal
+                LEFT JOIN municipios m ON m.codigo = e.municipio
+                WHERE TRY_CAST(e.cnpj_basico || e.cnpj_ordem || e.cnpj_dv AS BIGINT) IS NOT NULL
+                ORDER BY cnpj
+            """)
+            conn.execute("CREATE INDEX idx_cnpj_basico ON cnpj_registry (cnpj_basico)")
+            conn.execute("CHECKPOINT")
+
+            counts = {
+                'estabelecimentos': conn.execute("SELECT COUNT(*) FROM cnpj_registry").fetchone()[0],
+                'empresas': conn.execute("SELECT COUNT(*) FROM empresas").fetchone()[0],
+            }
+        finally:
+            conn.close()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        shutil.move(tmp_db, db_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    logger.info(f"✅ Registro CNPJ importado em {time.time() - started:.1f}s: {counts}")
+    return counts
+
+
+class CNPJRegistry:
+    """Consulta somente-leitura ao índice DuckDB do CNPJ"""
+
+    def __init__(self, db_path: str = DEFAULT_REGISTRY_PATH, memo_max_entries: int = 100_000):
+        """
+        Args:
+            db_path: Arquivo DuckDB gerado por `import_receita_dump`
+            memo_max_entries: CNPJs mantidos em memória (LRU) após a primeira consulta
+        """
+        if not DUCKDB_AVAILABLE:
+            raise RuntimeError("duckdb não instalado. Execute: pip install duckdb")
+
+        self.db_path = db_path
+        self._conn = duckdb.connect(db_path, read_only=True)
+        # Conexões DuckDB não são thread-safe: um cursor por thread
+        self._local = threading.local()
+
+        # Consultas repetidas (reanálise diária da carteira) respondem em microssegundos
+        self.memo_max_entries = max(0, memo_max_entries)
+        self._memo: "OrderedDict[str, Optional[Dict[str, Any]]]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    @classmethod
+    def open_if_available(cls, db_path: str = DEFAULT_REGISTRY_PATH) -> Optional["CNPJRegistry"]:
+        """Abre o índice se o arquivo existir (senão None, e a rede é usada)"""
+        if not DUCKDB_AVAILABLE or not os.path.exists(db_path):
+            return None
+        try:
+            registry = cls(db_path)
+            logger.info(f"✅ Registro CNPJ local carregado: {db_path}")
+            return registry
+        except Exception as e:
+            logger.warning(f"⚠️ Registro CNPJ local indisponível ({db_path}): {e}")
+            return None
+
+    def _cursor(self):
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self._conn.cursor()
+        return cursor
+
+    def lookup(self, clean_cnpj: str) -> Optional[Dict[str, Any]]:
+        """Dados do estabelecimento no formato da API Brasil (CNPJ com 14 dígitos)"""
+        if len(clean_cnpj) != 14 or not clean_cnpj.isdigit():
+            return None
+
+        with self._memo_lock:
+            if clean_cnpj in self._memo:
+                self._memo.move_to_end(clean_cnpj)
+                return self._memo[clean_cnpj]
+
+        row = self._cursor().execute(_LOOKUP_SQL.format(cnpj=int(clean_cnpj))).fetchone()
+        data = _to_brasilapi(row) if row else None
+        self._remember({clean_cnpj: data})
+        return data
+
+    def lookup_many(self, clean_cnpjs: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Consulta em lote (uma única varredura); CNPJs ausentes ficam fora do resultado"""
+        wanted = {cnpj for cnpj in clean_cnpjs if len(cnpj) == 14 and cnpj.isdigit()}
+        found: Dict[str, Dict[str, Any]] = {}
+
+        with self._memo_lock:
+            for cnpj in list(wanted):
+                if cnpj in self._memo:
+                    wanted.discard(cnpj)
+                    if self._memo[cnpj] is not None:
+                        found[cnpj] = self._memo[cnpj]
+        if not wanted:
+            return found
+
+        rows = self._cursor().execute(f"""
+            SELECT {_SELECT_COLUMNS}
+            FROM cnpj_registry
+            WHERE cnpj IN (SELECT unnest(?::BIGINT[]))
+        """, [sorted(int(cnpj) for cnpj in wanted)]).fetchall()
+
+        fetched = {cnpj: None for cnpj in wanted}
+        fetched.update({row[0]: _to_brasilapi(row) for row in rows})
+        self._remember(fetched)
+        found.update({cnpj: data for cnpj, data in fetched.items() if data is not None})
+        return found
+
+    def _remember(self, entries: Dict[str, Optional[Dict[str, Any]]]):
+        if not self.memo_max_entries:
+            return
+        with self._memo_lock:
+            self._memo.update(entries)
+            while len(self._memo) > self.memo_max_entries:
+                self._memo.popitem(last=False)
+
+    def close(self):
+        self._conn.close()
+
+
+def _to_brasilapi(row: tuple) -> Dict[str, Any]:
+    """Converte uma linha do índice para os campos usados da API Brasil"""
+    (cnpj, razao_social, nome_fantasia, situacao, data_inicio, cnae, cnae_descricao,
+     porte, capital_social, municipio, uf, ddd, telefone, matriz_filial) = row
+
+    data_inicio = data_inicio or ''
+    if len(data_inicio) == 8:
+        data_inicio = f"{data_inicio[:4]}-{data_inicio[4:6]}-{data_inicio[6:]}"
+
+    return {
+        'cnpj': cnpj,
+        'razao_social': razao_social or '',
+        'nome_fantasia': nome_fantasia or '',
+        'descricao_situacao_cadastral': SITUACAO_CADASTRAL.get(situacao, situacao or ''),
+        'data_inicio_atividade': data_inicio,
+        'cnae_fiscal': int(cnae) if cnae and cnae.isdigit() else None,
+        'cnae_fiscal_descricao': cnae_descricao or '',
+        'porte': PORTE_EMPRESA.get(porte, porte or ''),
+        'capital_social': capital_social or 0,
+        'municipio': municipio or '',
+        'uf': uf or '',
+        'ddd_telefone_1': f"{ddd or ''}{telefone or ''}",
+        'descricao_identificador_matriz_filial': 'MATRIZ' if matriz_filial == '1' else 'FILIAL',
+        'fonte': 'receita_federal',
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Importa o dump de CNPJ da Receita Federal para DuckDB")
+    parser.add_argument("source_dir", help="Diretório com os .zip (ou CSVs extraídos) da Receita Federal")
+    parser.add_argument("--db", default=DEFAULT_REGISTRY_PATH, help="Arquivo DuckDB de saída")
+    args = parser.parse_args()
+
+    print(f"🗃️ Importando dump CNPJ de {args.source_dir} para {args.db}...")
+    for table, count in import_receita_dump(args.source_dir, args.db).items():
+        print(f"   📊 {table}: {count:,} linhas")
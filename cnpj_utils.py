@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+🔢 CNPJ UTILS - Advanced DD-AI v2.1
+===================================
+
+Normalização canônica e validação de CNPJ (dígitos verificadores, módulo 11).
+
+"05.285.819/0001-66", "05285819000166" e 5285819000166 (coluna numérica
+que perdeu o zero à esquerda) resultam no mesmo CNPJ canônico de 14 dígitos.
+"""
+
+from typing import Any, Optional
+
+_FIRST_DV_WEIGHTS = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+_SECOND_DV_WEIGHTS = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+
+
+def normalize_cnpj(value: Any) -> str:
+    """Somente dígitos, completando zeros à esquerda perdidos em colunas numéricas"""
+    digits = ''.join(filter(str.isdigit, str(value)))
+    return digits.zfill(14) if 0 < len(digits) < 14 else digits
+
+
+def _check_digit(digits: str, weights: tuple) -> str:
+    remainder = sum(int(d) * w for d, w in zip(digits, weights)) % 11
+    return '0' if remainder < 2 else str(11 - remainder)
+
+
+def is_valid_cnpj(value: Any) -> bool:
+    """Valida tamanho e dígitos verificadores (rejeita sequências repetidas)"""
+    cnpj = normalize_cnpj(value)
+    if len(cnpj) != 14 or cnpj == cnpj[0] * 14:
+        return False
+    first = _check_digit(cnpj[:12], _FIRST_DV_WEIGHTS)
+    second = _check_digit(cnpj[:12] + first, _SECOND_DV_WEIGHTS)
+    return cnpj[12:] == first + second
+
+
+def canonical_cnpj(value: Any) -> Optional[str]:
+    """CNPJ canônico (14 dígitos) se válido; senão None"""
+    cnpj = normalize_cnpj(value)
+    return cnpj if is_valid_cnpj(cnpj) else None
+
+
+def format_cnpj(value: Any) -> str:
+    """Formata como XX.XXX.XXX/XXXX-XX"""
+    c = normalize_cnpj(value)
+    if len(c) != 14:
+        return str(value)
+    return f"{c[:2]}.{c[2:5]}.{c[5:8]}/{c[8:12]}-{c[12:]}"
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+📑 CURSOR SESSIONS - Advanced DD-AI v2.1
+========================================
+
+Paginação de resultados SQL por cursor mantido no servidor.
+
+A primeira chamada executa a query, devolve a primeira página e um token
+opaco; as seguintes continuam do mesmo cursor aberto (`fetchmany`), sem
+reexecutar a query nem usar OFFSET. Cada sessão retém uma conexão do pool,
+então há limites rígidos:
+
+- `max_sessions`: sessões abertas simultâneas (além disso: `SessionLimitError`)
+- `max_sessions_per_pool`: sessões por pool de conexões, sempre abaixo de
+  `max_size` do pool, para que cursores abandonados não tomem todas as
+  conexões das demais rotas
+- `idle_timeout`: sessão sem leitura por esse tempo é fechada
+- `max_lifetime`: idade máxima de uma sessão, mesmo em uso
+- `max_page_size`: teto do tamanho de página pedido pelo cliente
+
+Sessões vencidas são fechadas a cada operação e por uma thread de limpeza;
+o cursor esgotado fecha a sessão e devolve a conexão ao pool na hora.
+"""
+
+import logging
+import os
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from db_pool import ConnectionPool
+from query_streaming import StreamedQuery
+
+logger = logging.getLogger(__name__)
+
+
+class SessionLimitError(Exception):
+    """Limite de sessões de cursor abertas atingido"""
+
+
+class SessionNotFoundError(KeyError):
+    """Token desconhecido, já esgotado ou expirado"""
+
+
+@dataclass
+class CursorPage:
+    """Página de resultado; `cursor` é None quando não há mais linhas"""
+    columns: List[str]
+    rows: List[Sequence[Any]]
+    cursor: Optional[str]
+    rows_read: int
+    # Queries sem resultado (INSERT/UPDATE/DELETE)
+    affected_rows: Optional[int] = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.cursor is not None
+
+
+@dataclass
+class _CursorSession:
+    query: StreamedQuery
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class CursorSessionManager:
+    """Sessões de cursor com token opaco, timeout de ociosidade e limites rígidos"""
+
+    def __init__(self,
+                 max_sessions: int = 16,
+                 max_sessions_per_pool: Optional[int] = None,
+                 idle_timeout: float = 120,
+                 max_lifetime: float = 1800,
+                 default_page_size: int = 500,
+                 max_page_size: int = 5000,
+                 reaper_interval: Optional[float] = 15):
+        """
+        Args:
+            max_sessions: Sessões abertas ao mesmo tempo
+            max_sessions_per_pool: Sessões por pool (None = `max_size - 1` do pool; nunca acima disso)
+            idle_timeout: Segundos sem leitura até a sessão ser fechada
+            max_lifetime: Idade máxima de uma sessão (s)
+            default_page_size: Linhas por página quando o cliente não informa
+            max_page_size: Teto de linhas por página
+            reaper_interval: Intervalo da thread de limpeza (None = só limpeza nas operações)
+        """
+        self.max_sessions = max(1, max_sessions)
+        self.max_sessions_per_pool = max_sessions_per_pool
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.default_page_size = default_page_size
+        self.max_page_size = max_page_size
+
+        self._sessions: Dict[str, _CursorSession] = {}
+        # Fingerprint do pool de cada sessão (inclusive das vagas reservadas)
+        self._session_pools: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stats = {'opened': 0, 'completed': 0, 'expired': 0, 'rejected': 0}
+        self._stop = threading.Event()
+
+        if reaper_interval:
+            threading.Thread(
+                target=self._reap_loop, args=(reaper_interval,),
+                name="cursor-session-reaper", daemon=True
+            ).start()
+
+    def page_size(self, requested: Optional[int]) -> int:
+        return min(max(1, requested or self.default_page_size), self.max_page_size)
+
+    def pool_limit(self, pool: ConnectionPool) -> int:
+        """Sessões permitidas no pool: ao menos uma conexão fica livre para as outras rotas"""
+        limit = pool.max_size - 1
+        if self.max_sessions_per_pool is not None:
+            limit = min(limit, self.max_sessions_per_pool)
+        return max(0, limit)
+
+    def open(self, pool: ConnectionPool, query: str, page_size: Optional[int] = None,
+             timeout: Optional[float] = None) -> CursorPage:
+        """Executa a query e devolve a primeira página (com token se houver mais linhas)"""
+        self.reap_expired()
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                self._stats['rejected'] += 1
+                raise SessionLimitError(
+                    f"Limite de {self.max_sessions} cursores abertos atingido; tente novamente em instantes"
+                )
+            pool_limit = self.pool_limit(pool)
+            pool_sessions = sum(1 for fingerprint in self._session_pools.values() if fingerprint == pool.fingerprint)
+            if pool_sessions >= pool_limit:
+                self._stats['rejected'] += 1
+                raise SessionLimitError(
+                    f"Limite de {pool_limit} cursores abertos para este banco atingido "
+                    f"(pool de {pool.max_size} conexões); tente novamente em instantes"
+                )
+            # Reserva a vaga antes de executar a query (fora do lock)
+            token = secrets.token_urlsafe(24)
+            self._sessions[token] = None
+            self._session_pools[token] = pool.fingerprint
+
+        try:
+            streamed = StreamedQuery(pool, query, timeout=timeout, chunk_size=self.page_size(page_size))
+        except BaseException:
+            with self._lock:
+                self._pop_locked(token)
+            raise
+
+        session = _CursorSession(streamed)
+        with self._lock:
+            self._sessions[token] = session
+            self._stats['opened'] += 1
+        return self._read(token, session, page_size)
+
+    def fetch(self, token: str, page_size: Optional[int] = None) -> CursorPage:
+        """Próxima página de um cursor aberto"""
+        self.reap_expired()
+        with self._lock:
+            session = self._sessions.get(token)
+        if session is None:
+            raise SessionNotFoundError(token)
+        return self._read(token, session, page_size)
+
+    def close(self, token: str) -> bool:
+        """Fecha o cursor antes do fim (cliente desistiu da leitura)"""
+        with self._lock:
+            session = self._pop_locked(token)
+        if session is None:
+            return False
+        # Uma leitura em andamento termina antes do fechamento
+        with session.lock:
+            session.query.close()
+        return True
+
+    def close_all(self):
+        self._stop.set()
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+            self._session_pools = {}
+        for session in sessions:
+            if session is not None:
+                with session.lock:
+                    session.query.close()
+
+    def reap_expired(self) -> int:
+        """Fecha sessões ociosas além de `idle_timeout` ou mais velhas que `max_lifetime`"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                token for token, session in self._sessions.items()
+                if session is not None and (
+                    now - session.last_used > self.idle_timeout
+                    or now - session.created_at > self.max_lifetime
+                )
+            ]
+            sessions = [self._pop_locked(token) for token in expired]
+            self._stats['expired'] += len(sessions)
+        for session in sessions:
+            # Uma leitura em andamento termina antes do fechamento
+            with session.lock:
+                session.query.close()
+        if sessions:
+            logger.info(f"🧹 {len(sessions)} cursor(es) SQL expirado(s) fechado(s)")
+        return len(sessions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'open_sessions': sum(1 for session in self._sessions.values() if session is not None),
+                'max_sessions': self.max_sessions,
+                'max_sessions_per_pool': self.max_sessions_per_pool,
+                'idle_timeout': self.idle_timeout,
+                'max_lifetime': self.max_lifetime,
+                **self._stats,
+            }
+
+    def _pop_locked(self, token: str) -> Optional[_CursorSession]:
+        self._session_pools.pop(token, None)
+        return self._sessions.pop(token, None)
+
+    def _read(self, token: str, session: _CursorSession, page_size: Optional[int]) -> CursorPage:
+        try:
+            with session.lock:
+                rows = session.query.fetch_page(self.page_size(page_size))
+                session.last_used = time.monotonic()
+        finally:
+            # Cursor esgotado (ou que falhou na leitura) libera a vaga na hora
+            exhausted = session.query.exhausted
+            if exhausted:
+                with self._lock:
+                    if self._pop_locked(token) is not None:
+                        self._stats['completed'] += 1
+        return CursorPage(
+            columns=session.query.columns or [],
+            rows=rows,
+            cursor=None if exhausted else token,
+            rows_read=session.query.row_count,
+            affected_rows=session.query.affected_rows
+        )
+
+    def _reap_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.reap_expired()
+            except Exception as e:
+                logger.warning(f"⚠️ Falha na limpeza de cursores: {e}")
+
+
+_shared_manager: Optional[CursorSessionManager] = None
+_shared_lock = threading.Lock()
+
+
+def get_cursor_sessions() -> CursorSessionManager:
+    """Gerenciador compartilhado, configurado por variáveis de ambiente `DDAI_QUERY_CURSOR_*`"""
+    global _shared_manager
+    with _shared_lock:
+        if _shared_manager is None:
+            _shared_manager = CursorSessionManager(
+                max_sessions=int(os.getenv("DDAI_QUERY_CURSOR_MAX_SESSIONS", "16")),
+                max_sessions_per_pool=int(os.environ["DDAI_QUERY_CURSOR_MAX_PER_POOL"])
+                if os.getenv("DDAI_QUERY_CURSOR_MAX_PER_POOL") else None,
+                idle_timeout=float(os.getenv("DDAI_QUERY_CURSOR_IDLE_SECONDS", "120")),
+                max_lifetime=float(os.getenv("DDAI_QUERY_CURSOR_MAX_LIFETIME_SECONDS", "1800")),
+                default_page_size=int(os.getenv("DDAI_QUERY_CURSOR_PAGE_SIZE", "500")),
+                max_page_size=int(os.getenv("DDAI_QUERY_CURSOR_MAX_PAGE_SIZE", "5000")),
+            )
+        return _shared_manager
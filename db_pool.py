@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+🗄️ DB POOL - Advanced DD-AI v2.1
+================================
+
+Pool de conexões SQL Server (pyodbc) compartilhado por todos os endpoints.
+
+- Um pool por string de conexão, indexado pelo fingerprint SHA-256 dela
+  (a senha não vira chave de dicionário nem aparece nas estatísticas)
+- Tamanho máximo por pool: quem pede além do limite espera até
+  `acquire_timeout` segundos
+- Health check (`SELECT 1`) em conexões paradas há mais de
+  `health_check_interval` segundos antes de entregá-las
+- Conexões ociosas além de `max_idle_seconds` ou com mais de
+  `max_lifetime_seconds` de vida são descartadas, também por uma thread de
+  limpeza (sem tráfego, o banco não fica com sessões paradas abertas)
+- Na devolução é feito rollback da transação implícita; se falhar, a
+  conexão é descartada
+
+Assim o handshake de login TDS acontece uma vez por conexão do pool, e não
+a cada requisição.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pyodbc
+
+logger = logging.getLogger(__name__)
+
+
+def connection_fingerprint(conn_str: str) -> str:
+    """Fingerprint estável da string de conexão (espaços e caixa das chaves ignorados)"""
+    parts = [part.strip() for part in conn_str.split(';') if part.strip()]
+    normalized = ';'.join(
+        f"{key.strip().upper()}={value.strip()}"
+        for key, _, value in (part.partition('=') for part in parts)
+    )
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+@dataclass
+class _PooledConnection:
+    """Conexão física com seus tempos de criação e último uso"""
+    raw: Any
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class ConnectionPool:
+    """Pool limitado de conexões para uma única string de conexão"""
+
+    def __init__(self,
+                 conn_str: str,
+                 max_size: int = 5,
+                 max_idle_seconds: float = 300,
+                 max_lifetime_seconds: float = 1800,
+                 health_check_interval: float = 30,
+                 acquire_timeout: float = 30,
+                 connect: Optional[Callable[..., Any]] = None):
+        """
+        Args:
+            conn_str: String de conexão ODBC
+            max_size: Máximo de conexões abertas (em uso + ociosas)
+            max_idle_seconds: Conexão ociosa além disso é fechada
+            max_lifetime_seconds: Conexão mais velha que isso é fechada na devolução
+            health_check_interval: Ociosidade a partir da qual a conexão é testada
+            acquire_timeout: Espera máxima por uma conexão livre (s)
+            connect: Fábrica de conexões (padrão: pyodbc.connect)
+        """
+        self.conn_str = conn_str
+        self.fingerprint = connection_fingerprint(conn_str)
+        self.max_size = max(1, max_size)
+        self.max_idle_seconds = max_idle_seconds
+        self.max_lifetime_seconds = max_lifetime_seconds
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self._connect = connect or pyodbc.connect
+
+        self._idle: List[_PooledConnection] = []
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._closed = False
+        self._stats = {'created': 0, 'reused': 0, 'discarded': 0, 'health_check_failures': 0, 'wait_timeouts': 0}
+
+    def acquire(self, timeout: Optional[float] = None) -> _PooledConnection:
+        """
+        Obtém uma conexão saudável (ociosa ou nova)
+
+        Args:
+            timeout: Timeout de login para uma conexão nova (s)
+        """
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self._stats['wait_timeouts'] += 1
+            raise TimeoutError(
+                f"Pool {self.fingerprint} esgotado: {self.max_size} conexões em uso há {self.acquire_timeout}s"
+            )
+
+        try:
+            while True:
+                with self._lock:
+                    expired = self._evict_expired_locked()
+                    pooled = self._idle.pop() if self._idle else None
+                for stale in expired:
+                    self._close(stale)
+
+                if pooled is None:
+                    pooled = self._open(timeout)
+                    break
+                if self._is_healthy(pooled):
+                    with self._lock:
+                        self._stats['reused'] += 1
+                    break
+                self._close(pooled)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+        return pooled
+
+    def release(self, pooled: _PooledConnection, discard: bool = False):
+        """Devolve a conexão ao pool (ou a fecha se descartada, quebrada ou velha)"""
+        try:
+            if not discard:
+                try:
+                    # Encerra a transação implícita aberta pelo pyodbc (autocommit desligado)
+                    pooled.raw.rollback()
+                except Exception as e:
+                    logger.warning(f"⚠️ Rollback falhou na devolução ao pool {self.fingerprint}: {e}")
+                    discard = True
+
+            now = time.monotonic()
+            if discard or self._closed or now - pooled.created_at > self.max_lifetime_seconds:
+                self._close(pooled)
+            else:
+                pooled.last_used = now
+                with self._lock:
+                    self._idle.append(pooled)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """Conexão emprestada do pool pelo escopo do `with`"""
+        pooled = self.acquire(timeout)
+        discard = False
+        try:
+            yield pooled.raw
+        except pyodbc.Error as e:
+            # Erros de comunicação (SQLSTATE 08xxx) invalidam a conexão
+            discard = is_connection_error(e)
+            raise
+        finally:
+            self.release(pooled, discard=discard)
+
+    def evict_idle(self) -> int:
+        """Fecha conexões ociosas vencidas; retorna quantas foram fechadas"""
+        with self._lock:
+            expired = self._evict_expired_locked()
+        for pooled in expired:
+            self._close(pooled)
+        return len(expired)
+
+    def close(self):
+        """Fecha todas as conexões ociosas (as em uso são fechadas na devolução)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._closed = True
+        for pooled in idle:
+            self._close(pooled)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'fingerprint': self.fingerprint,
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                **self._stats,
+            }
+
+    def _evict_expired_locked(self) -> List[_PooledConnection]:
+        """Remove da lista ociosa as conexões vencidas (chamar com o lock)"""
+        now = time.monotonic()
+        keep, expired = [], []
+        for pooled in self._idle:
+            too_idle = now - pooled.last_used > self.max_idle_seconds
+            too_old = now - pooled.created_at > self.max_lifetime_seconds
+            (expired if too_idle or too_old else keep).append(pooled)
+        self._idle = keep
+        return expired
+
+    def _open(self, timeout: Optional[float]) -> _PooledConnection:
+        raw = self._connect(self.conn_str, timeout=timeout) if timeout else self._connect(self.conn_str)
+        with self._lock:
+            self._stats['created'] += 1
+        return _PooledConnection(raw)
+
+    def _is_healthy(self, pooled: _PooledConnection) -> bool:
+        if time.monotonic() - pooled.last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = pooled.raw.cursor()
+            cursor.execute("SELECT 1").fetchone()
+            cursor.close()
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Conexão do pool {self.fingerprint} falhou no health check: {e}")
+            with self._lock:
+                self._stats['health_check_failures'] += 1
+            return False
+
+    def _close(self, pooled: _PooledConnection):
+        with self._lock:
+            self._stats['discarded'] += 1
+        try:
+            pooled.raw.close()
+        except Exception:
+            pass
+
+
+class ConnectionPoolRegistry:
+    """Pools compartilhados, um por fingerprint de string de conexão"""
+
+    def __init__(self, reaper_interval: Optional[float] = 60, **pool_options: Any):
+        """
+        Args:
+            reaper_interval: Intervalo da thread que descarta conexões vencidas (None = só no uso do pool)
+            **pool_options: Opções de cada `ConnectionPool`
+        """
+        self.pool_options = pool_options
+        self._pools: Dict[str, ConnectionPool] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        if reaper_interval:
+            threading.Thread(
+                target=self._reap_loop, args=(reaper_interval,),
+                name="db-pool-reaper", daemon=True
+            ).start()
+
+    def get_pool(self, conn_str: str) -> ConnectionPool:
+        fingerprint = connection_fingerprint(conn_str)
+        with self._lock:
+            pool = self._pools.get(fingerprint)
+            if pool is None:
+                pool = ConnectionPool(conn_str, **self.pool_options)
+                self._pools[fingerprint] = pool
+            return pool
+
+    @contextmanager
+    def connection(self, conn_str: str, timeout: Optional[float] = None) -> Iterator[Any]:
+        """Atalho: `with registry.connection(conn_str, timeout=5) as conn: ...`"""
+        with self.get_pool(conn_str).connection(timeout) as conn:
+            yield conn
+
+    def evict_idle(self) -> int:
+        with self._lock:
+            pools = list(self._pools.values())
+        return sum(pool.evict_idle() for pool in pools)
+
+    def close_all(self):
+        self._stop.set()
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pools = list(self._pools.values())
+        pool_stats = [pool.get_stats() for pool in pools]
+        return {
+            'pools': pool_stats,
+            'in_use': sum(stats['in_use'] for stats in pool_stats),
+            'idle': sum(stats['idle'] for stats in pool_stats),
+        }
+
+    def _reap_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                evicted = self.evict_idle()
+                if evicted:
+                    logger.info(f"🧹 {evicted} conexão(ões) SQL ociosa(s) ou vencida(s) descartada(s)")
+            except Exception as e:
+                logger.warning(f"⚠️ Falha na limpeza dos pools de conexão: {e}")
+
+
+def is_connection_error(error: Exception) -> bool:
+    """SQLSTATE 08xxx (falha de comunicação) ou conexão já fechada"""
+    sqlstate = error.args[0] if error.args else ''
+    if not isinstance(sqlstate, str):
+        return False
+    return sqlstate.startswith('08') or 'closed' in str(error).lower()
+
+
+_shared_registry: Optional[ConnectionPoolRegistry] = None
+_shared_lock = threading.Lock()
+
+
+def get_connection_pool() -> ConnectionPoolRegistry:
+    """Registro compartilhado de pools, configurado por variáveis de ambiente `DDAI_DB_POOL_*`"""
+    global _shared_registry
+    with _shared_lock:
+        if _shared_registry is None:
+            _shared_registry = ConnectionPoolRegistry(
+                reaper_interval=float(os.getenv("DDAI_DB_POOL_REAPER_SECONDS", "60")),
+                max_size=int(os.getenv("DDAI_DB_POOL_MAX_SIZE", "5")),
+                max_idle_seconds=float(os.getenv("DDAI_DB_POOL_MAX_IDLE_SECONDS", "300")),
+                max_lifetime_seconds=float(os.getenv("DDAI_DB_POOL_MAX_LIFETIME_SECONDS", "1800")),
+                health_check_interval=float(os.getenv("DDAI_DB_POOL_HEALTH_CHECK_SECONDS", "30")),
+                acquire_timeout=float(os.getenv("DDAI_DB_POOL_ACQUIRE_TIMEOUT_SECONDS", "30")),
+            )
+        return _shared_registry
@@ -15,21 +15,65 @@ Fluxo completo:
 CNPJ/Razão Social → Enriquecimento → Busca Notícias → Análise IA → Relatório
 """
 
+import asyncio
+import os
 import requests
 import json
-import time
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import re
 from dataclasses import dataclass, asdict
 import xml.etree.ElementTree as ET
-from urllib.parse import quote_plus
+from urllib.parse import quote_plus, urlsplit
 import logging
 
+from async_http import AsyncHTTPClient, HostRateLimiter
+from cnpj_enrichment import COMPANY_SUMMARY_FIELDS, get_enrichment_service
+from http_cache import CachingHTTPAdapter, HTTPCache, get_http_cache
+from news_dedup import NearDuplicateDetector, cluster_news
+from news_extraction import ArticleExtractor, get_extractor
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Feeds RSS consultados por empresa (até 6 variações de busca), requisições
+# simultâneas por cliente e limite de taxa por host (rajada = todos os feeds)
+NEWS_MAX_FEEDS = int(os.getenv("DDAI_NEWS_MAX_FEEDS", "6"))
+NEWS_MAX_CONCURRENCY = int(os.getenv("DDAI_NEWS_MAX_CONCURRENCY", "8"))
+NEWS_RATE_PER_HOST = float(os.getenv("DDAI_NEWS_RATE_PER_HOST", "4"))
+NEWS_BURST_PER_HOST = float(os.getenv("DDAI_NEWS_BURST_PER_HOST", "6"))
+
+# Download dos artigos: simultâneos no total e por site de origem, limite de
+# taxa por site (separado do limite dos feeds) e timeout por artigo
+ARTICLE_MAX_CONCURRENCY = int(os.getenv("DDAI_ARTICLE_MAX_CONCURRENCY", "10"))
+ARTICLE_MAX_PER_HOST = int(os.getenv("DDAI_ARTICLE_MAX_PER_HOST", "4"))
+ARTICLE_RATE_PER_HOST = float(os.getenv("DDAI_ARTICLE_RATE_PER_HOST", "2"))
+ARTICLE_BURST_PER_HOST = float(os.getenv("DDAI_ARTICLE_BURST_PER_HOST", "4"))
+ARTICLE_TIMEOUT = float(os.getenv("DDAI_ARTICLE_TIMEOUT", "15"))
+ARTICLE_FALLBACK_CONTENT = "Notícia sobre operações financeiras e gestão de investimentos."
+
+_news_rate_limiter: Optional[HostRateLimiter] = None
+_article_rate_limiter: Optional[HostRateLimiter] = None
+_news_rate_limiter_lock = threading.Lock()
+
+def get_news_rate_limiter() -> HostRateLimiter:
+    """Limite por host compartilhado entre monitores, threads e event loops"""
+    global _news_rate_limiter
+    with _news_rate_limiter_lock:
+        if _news_rate_limiter is None:
+            _news_rate_limiter = HostRateLimiter(NEWS_RATE_PER_HOST, NEWS_BURST_PER_HOST)
+        return _news_rate_limiter
+
+def get_article_rate_limiter() -> HostRateLimiter:
+    """Limite por site de origem dos artigos (não disputa os tokens dos feeds do Google News)"""
+    global _article_rate_limiter
+    with _news_rate_limiter_lock:
+        if _article_rate_limiter is None:
+            _article_rate_limiter = HostRateLimiter(ARTICLE_RATE_PER_HOST, ARTICLE_BURST_PER_HOST)
+        return _article_rate_limiter
+
 @dataclass
 class CompanyInfo:
     cnpj: str
@@ -51,6 +95,14 @@ class NewsItem:
     conteudo: str
     relevancia_score: float
     sentimento: str = "NEUTRO"
+    cobertura: int = 1  # Veículos que publicaram a mesma matéria
+
+@dataclass
+class FetchedArticle:
+    """Notícia do RSS com o conteúdo baixado (`extracted` = False: texto de fallback)"""
+    news: Dict
+    content: str
+    extracted: bool
 
 @dataclass
 class RiskAnalysis:
@@ -62,25 +114,41 @@ class RiskAnalysis:
     entities_found: List[str] = None
 
 class EnhancedNewsMonitor:
-    def __init__(self, api_base_url: str = "http://127.0.0.1:8001"):
+    def __init__(self, api_base_url: str = "http://127.0.0.1:8001", max_feeds: Optional[int] = None,
+                 http_cache: Optional[HTTPCache] = None,
+                 extractor: Optional[ArticleExtractor] = None,
+                 deduplicator: Optional[NearDuplicateDetector] = None):
+        """
+        Args:
+            api_base_url: URL da API DD-AI
+            max_feeds: Variações de busca consultadas por empresa (padrão: DDAI_NEWS_MAX_FEEDS)
+            http_cache: Cache HTTP de feeds e artigos (padrão: cache compartilhado em disco)
+            extractor: Backend de extração de texto (padrão: DDAI_NEWS_EXTRACTOR, ver news_extraction)
+            deduplicator: Agrupamento de matérias quase iguais (padrão: DDAI_NEWS_DEDUP_THRESHOLD)
+        """
         self.api_base_url = api_base_url
+        self.max_feeds = max(1, max_feeds or NEWS_MAX_FEEDS)
+        self.http_cache = http_cache or get_http_cache()
+        self.extractor = extractor or get_extractor()
+        self.deduplicator = deduplicator or NearDuplicateDetector()
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        # Feeds e páginas inalterados saem do disco (validade ou 304)
+        caching_adapter = CachingHTTPAdapter(self.http_cache)
+        self.session.mount("https://", caching_adapter)
+        self.session.mount("http://", caching_adapter)
         
     def enrich_company_by_cnpj(self, cnpj: str) -> Optional[CompanyInfo]:
         """Enriquece dados da empresa via API Brasil"""
         try:
             logger.info(f"Enriquecendo CNPJ: {cnpj}")
             
-            cnpj_clean = re.sub(r'[^\d]', '', cnpj)
-            url = f"https://brasilapi.com.br/api/cnpj/v1/{cnpj_clean}"
-            
-            response = self.session.get(url, timeout=10)
+            result = get_enrichment_service().lookup(cnpj, fields=COMPANY_SUMMARY_FIELDS)
             
-            if response.status_code == 200:
-                data = response.json()
+            if result.success:
+                data = result.data
                 
                 return CompanyInfo(
                     cnpj=data.get('cnpj', cnpj),
@@ -94,7 +162,7 @@ class EnhancedNewsMonitor:
                     uf=data.get('uf', '')
                 )
             else:
-                logger.error(f"Erro na API Brasil: {response.status_code}")
+                logger.error(f"Erro na API Brasil: {result.error}")
                 return None
                 
         except Exception as e:
@@ -102,76 +170,116 @@ class EnhancedNewsMonitor:
             return None
 
     def search_google_news(self, query: str, days_back: int = 30) -> List[Dict]:
-        """Busca notícias reais no Google News"""
+        """Busca notícias reais no Google News (versão síncrona de `search_google_news_async`)"""
+        return asyncio.run(self.search_google_news_async(query, days_back))
+
+    def _search_terms(self, query: str) -> List[str]:
+        """Variações de busca (as primeiras `max_feeds` são consultadas)"""
+        search_terms = [
+            f'"{query}"',
+            f'{query} fundo',
+            f'{query} gestora',
+            f'{query} investimento',
+            f'{query} CVM',
+            f'{query} BACEN'
+        ]
+        return search_terms[:self.max_feeds]
+
+    async def search_google_news_async(self, query: str, days_back: int = 30,
+                                       client: Optional[AsyncHTTPClient] = None) -> List[Dict]:
+        """
+        Busca notícias reais no Google News
+        
+        Todos os feeds RSS são buscados ao mesmo tempo, com limite de taxa por
+        host compartilhado: a latência total fica perto de uma única ida e volta.
+        Cópias da mesma matéria (título/descrição quase iguais) viram um único
+        item com `cluster_size` e `duplicates` (ver news_dedup).
+        
+        Args:
+            query: Nome da empresa
+            days_back: Idade máxima das notícias (dias)
+            client: Cliente já aberto (ex.: reaproveitado em um lote); None = cliente próprio
+        """
         try:
             logger.info(f"Buscando notícias para: {query}")
             
-            # Construir query otimizada
-            search_terms = [
-                f'"{query}"',
-                f'{query} fundo',
-                f'{query} gestora',
-                f'{query} investimento',
-                f'{query} CVM',
-                f'{query} BACEN'
-            ]
-            
-            all_news = []
+            search_terms = self._search_terms(query)
             
-            for search_term in search_terms[:2]:  # Limitar para não sobrecarregar
-                encoded_query = quote_plus(search_term)
-                rss_url = f"https://news.google.com/rss/search?q={encoded_query}&hl=pt-BR&gl=BR&ceid=BR:pt-419"
-                
-                try:
-                    response = self.session.get(rss_url, timeout=10)
-                    
-                    if response.status_code == 200:
-                        # Parse do RSS XML
-                        root = ET.fromstring(response.content)
-                        
-                        # Extrair itens do RSS
-                        for item in root.findall('.//item')[:5]:  # Limitar a 5 por busca
-                            title = item.find('title')
-                            link = item.find('link')
-                            pub_date = item.find('pubDate')
-                            description = item.find('description')
-                            
-                            if title is not None and link is not None:
-                                news_item = {
-                                    'title': title.text or '',
-                                    'link': link.text or '',
-                                    'pubDate': pub_date.text if pub_date is not None else '',
-                                    'description': description.text if description is not None else '',
-                                    'source': self._extract_source_from_url(link.text or '')
-                                }
-                                
-                                # Verificar se é recente
-                                if self._is_recent_news(news_item['pubDate'], days_back):
-                                    all_news.append(news_item)
-                                
-                except Exception as e:
-                    logger.warning(f"Erro ao processar RSS para '{search_term}': {str(e)}")
-                    continue
-                
-                time.sleep(1)  # Rate limiting
+            if client is None:
+                async with self._news_client() as own_client:
+                    feeds = await asyncio.gather(
+                        *(self._fetch_rss(own_client, term, days_back) for term in search_terms)
+                    )
+            else:
+                feeds = await asyncio.gather(
+                    *(self._fetch_rss(client, term, days_back) for term in search_terms)
+                )
             
-            # Remover duplicatas
-            unique_news = []
-            seen_titles = set()
+            all_news = [news for feed in feeds for news in feed]
             
-            for news in all_news:
-                title_key = news['title'].lower().strip()
-                if title_key not in seen_titles:
-                    seen_titles.add(title_key)
-                    unique_news.append(news)
+            # Agrupar cópias da mesma matéria (antes do download e da análise)
+            unique_news = cluster_news(all_news, self.deduplicator)
             
-            logger.info(f"Encontradas {len(unique_news)} notícias únicas")
+            logger.info(f"Encontradas {len(unique_news)} notícias únicas "
+                        f"({len(all_news) - len(unique_news)} cópias agrupadas)")
             return unique_news
             
         except Exception as e:
             logger.error(f"Erro na busca de notícias: {str(e)}")
             return []
 
+    def _news_client(self) -> AsyncHTTPClient:
+        """Cliente assíncrono para os feeds, com o limite por host compartilhado do processo"""
+        return AsyncHTTPClient(
+            host_rate_limiter=get_news_rate_limiter(),
+            max_concurrency=NEWS_MAX_CONCURRENCY,
+            timeout=10,
+            max_retries=1,
+            headers=dict(self.session.headers),
+            cache=self.http_cache
+        )
+
+    async def _fetch_rss(self, client: AsyncHTTPClient, search_term: str, days_back: int) -> List[Dict]:
+        """Itens recentes de um feed RSS de busca (lista vazia em caso de erro)"""
+        encoded_query = quote_plus(search_term)
+        rss_url = f"https://news.google.com/rss/search?q={encoded_query}&hl=pt-BR&gl=BR&ceid=BR:pt-419"
+        
+        news = []
+        try:
+            response = await client.get(rss_url)
+            
+            if response.status_code == 200:
+                # Parse do RSS XML
+                root = ET.fromstring(response.content)
+                
+                # Extrair itens do RSS
+                for item in root.findall('.//item')[:5]:  # Limitar a 5 por busca
+                    title = item.find('title')
+                    link = item.find('link')
+                    pub_date = item.find('pubDate')
+                    description = item.find('description')
+                    # Site que publicou a matéria (o link aponta para news.google.com)
+                    source = item.find('source')
+                    
+                    if title is not None and link is not None:
+                        news_item = {
+                            'title': title.text or '',
+                            'link': link.text or '',
+                            'pubDate': pub_date.text if pub_date is not None else '',
+                            'description': description.text if description is not None else '',
+                            'source': self._extract_source_from_url(link.text or ''),
+                            'source_url': source.get('url', '') if source is not None else ''
+                        }
+                        
+                        # Verificar se é recente
+                        if self._is_recent_news(news_item['pubDate'], days_back):
+                            news.append(news_item)
+                            
+        except Exception as e:
+            logger.warning(f"Erro ao processar RSS para '{search_term}': {str(e)}")
+        
+        return news
+
     def _extract_source_from_url(self, url: str) -> str:
         """Extrai fonte da URL"""
         try:
@@ -216,65 +324,142 @@ class EnhancedNewsMonitor:
         try:
             logger.info(f"Extraindo conteúdo de: {news_url[:50]}...")
             
-            response = self.session.get(news_url, timeout=15)
+            response = self.session.get(news_url, timeout=ARTICLE_TIMEOUT)
             
             if response.status_code == 200:
-                from bs4 import BeautifulSoup
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Remover scripts e estilos
-                for element in soup(['script', 'style', 'nav', 'footer', 'header']):
-                    element.decompose()
-                
-                # Estratégias por site
-                content = ""
-                
-                # Valor Econômico
-                if 'valor.globo.com' in news_url:
-                    content_div = soup.find('div', class_='content-text__container')
-                    if content_div:
-                        content = content_div.get_text()
-                
-                # G1
-                elif 'g1.globo.com' in news_url:
-                    content_div = soup.find('div', class_='mc-article-body')
-                    if content_div:
-                        content = content_div.get_text()
-                
-                # Exame
-                elif 'exame.com' in news_url:
-                    content_div = soup.find('div', class_='article-content')
-                    if content_div:
-                        content = content_div.get_text()
-                
-                # Fallback: buscar por article ou main
-                if not content.strip():
-                    for tag in ['article', 'main']:
-                        element = soup.find(tag)
-                        if element:
-                            content = element.get_text()
-                            break
-                
-                # Limpeza
-                content = re.sub(r'\s+', ' ', content).strip()
-                
-                if len(content) > 200:
-                    return content[:2000]  # Limitar tamanho
-                else:
-                    # Fallback com título e descrição
-                    title = soup.find('title')
-                    return f"Notícia financeira: {title.get_text() if title else 'Sem título'}"
+                return self._extract_cached(news_url, response.content)[0]
             
         except Exception as e:
             logger.warning(f"Erro ao extrair conteúdo: {str(e)}")
         
-        # Fallback
-        return "Notícia sobre operações financeiras e gestão de investimentos."
+        return ARTICLE_FALLBACK_CONTENT
+
+    def _parse_article(self, news_url: str, html: bytes) -> Tuple[str, bool]:
+        """Texto do artigo e se houve extração real (False = só o título como fallback)"""
+        return self.extractor.extract(news_url, html)
+
+    def _extract_cached(self, news_url: str, html: bytes) -> Tuple[str, bool]:
+        """Extração com o texto guardado por URL + hash do HTML (por backend)"""
+        return self.http_cache.extracted_text(news_url, html, self._parse_article, variant=self.extractor.name)
+
+    def search_news_articles(self, query: str, days_back: int = 30, budget: int = 5) -> List[FetchedArticle]:
+        """Busca as notícias e baixa o conteúdo de até `budget` delas em um único event loop"""
+        async def search_and_fetch() -> List[FetchedArticle]:
+            news_data = await self.search_google_news_async(query, days_back)
+            return self.collapse_duplicate_articles(await self.fetch_articles_async(news_data, budget))
+        
+        return asyncio.run(search_and_fetch())
+
+    def collapse_duplicate_articles(self, articles: List[FetchedArticle]) -> List[FetchedArticle]:
+        """
+        Agrupa artigos com o mesmo corpo (matéria de agência com títulos diferentes)
+        
+        Só artigos extraídos são comparados (o texto de fallback é igual para
+        todos). O primeiro de cada grupo fica, somando `cluster_size` e
+        `duplicates` das cópias.
+        """
+        extracted = [article for article in articles if article.extracted]
+        removed = set()
+        for cluster in self.deduplicator.cluster(extracted, lambda article: article.content):
+            if not cluster.duplicates:
+                continue
+            news = dict(cluster.representative.news)
+            news.setdefault('cluster_size', 1)
+            news['duplicates'] = list(news.get('duplicates', []))
+            for copy in cluster.duplicates:
+                news['cluster_size'] += copy.news.get('cluster_size', 1)
+                news['duplicates'].append({'title': copy.news.get('title', ''), 'link': copy.news.get('link', ''),
+                                           'source': copy.news.get('source', '')})
+                news['duplicates'].extend(copy.news.get('duplicates', []))
+                removed.add(id(copy))
+            cluster.representative.news = news
+        
+        if removed:
+            logger.info(f"🧬 {len(removed)} artigo(s) com o mesmo conteúdo agrupado(s)")
+        return [article for article in articles if id(article) not in removed]
+
+    def fetch_articles(self, news_items: List[Dict], budget: int) -> List[FetchedArticle]:
+        """Versão síncrona de `fetch_articles_async`"""
+        return asyncio.run(self.fetch_articles_async(news_items, budget))
+
+    async def fetch_articles_async(self, news_items: List[Dict], budget: int,
+                                   client: Optional[AsyncHTTPClient] = None) -> List[FetchedArticle]:
+        """
+        Extrai o conteúdo de até `budget` notícias em paralelo
+        
+        Além dos `budget` primeiros itens, até `budget` candidatos extras são
+        buscados para cobrir falhas; assim que `budget` artigos são extraídos,
+        as buscas restantes são canceladas. Os limites valem por site de origem
+        (`source_url` do RSS; os links do Google News são todos do mesmo host):
+        no máximo `ARTICLE_MAX_PER_HOST` downloads simultâneos e o limite de
+        taxa compartilhado dos artigos. Resultado na ordem original das notícias.
+        """
+        candidates = [news for news in news_items[:budget * 2] if news.get('link')]
+        if not candidates or budget <= 0:
+            return []
+        
+        if client is None:
+            async with self._article_client() as own_client:
+                return await self._fetch_candidates(own_client, candidates, budget)
+        return await self._fetch_candidates(client, candidates, budget)
+
+    def _article_client(self) -> AsyncHTTPClient:
+        """Cliente para os artigos: conexões reaproveitadas e sem retry (timeout já é longo)"""
+        return AsyncHTTPClient(
+            host_rate_limiter=get_article_rate_limiter(),
+            max_concurrency=ARTICLE_MAX_CONCURRENCY,
+            timeout=ARTICLE_TIMEOUT,
+            max_retries=0,
+            headers=dict(self.session.headers),
+            cache=self.http_cache
+        )
+
+    async def _fetch_candidates(self, client: AsyncHTTPClient, candidates: List[Dict],
+                                budget: int) -> List[FetchedArticle]:
+        host_slots: Dict[str, asyncio.Semaphore] = {}
+        
+        async def fetch(index: int, news: Dict) -> Tuple[int, FetchedArticle]:
+            url = news['link']
+            publisher_url = news.get('source_url') or url
+            host = urlsplit(publisher_url).netloc.lower()
+            slot = host_slots.setdefault(host, asyncio.Semaphore(ARTICLE_MAX_PER_HOST))
+            content, extracted = ARTICLE_FALLBACK_CONTENT, False
+            try:
+                async with slot:
+                    response = await client.get(url, limit_key=publisher_url, follow_redirects=True)
+                if response.status_code == 200:
+                    # Parse fora do loop para não atrasar os outros downloads
+                    content, extracted = await asyncio.to_thread(self._extract_cached, url, response.content)
+            except Exception as e:
+                logger.warning(f"Erro ao extrair conteúdo de {url[:50]}: {str(e)}")
+            return index, FetchedArticle(news=news, content=content, extracted=extracted)
+        
+        tasks = [asyncio.ensure_future(fetch(index, news)) for index, news in enumerate(candidates)]
+        done: Dict[int, FetchedArticle] = {}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, article = await next_done
+                done[index] = article
+                if sum(1 for fetched in done.values() if fetched.extracted) >= budget:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        cancelled = len(candidates) - len(done)
+        if cancelled:
+            logger.info(f"⏹️ {cancelled} download(s) cancelado(s): {budget} artigos já extraídos")
+        
+        # Artigos extraídos primeiro; falhas (com fallback) completam o orçamento
+        ranked = sorted(done.items(), key=lambda entry: (not entry[1].extracted, entry[0]))[:budget]
+        return [article for _, article in sorted(ranked, key=lambda entry: entry[0])]
 
     def analyze_news_with_ai(self, content: str) -> RiskAnalysis:
         """Analisa notícia com Advanced DD-AI"""
         try:
-            payload = {"text": content}
+            # Artigos completos passam de 512 tokens: analisar em janelas deslizantes
+            payload = {"text": content, "long_document": True}
             
             response = requests.post(
                 f"{self.api_base_url}/api/analyze-risk",
@@ -392,7 +577,8 @@ class EnhancedNewsMonitor:
                 'total_news_found': len(news_items),
                 'relevant_news': len([n for n in news_items if n.relevancia_score > 0.5]),
                 'recent_news_7days': len(recent_news),
-                'high_risk_news': len(high_risk_news)
+                'high_risk_news': len(high_risk_news),
+                'duplicate_copies_grouped': sum(n.cobertura - 1 for n in news_items)
             },
             'recommendations': recommendations,
             'detailed_analysis': [
@@ -516,6 +702,8 @@ class EnhancedNewsMonitor:
                 f.write(f"- **Fonte:** {news['fonte']}\n")
                 f.write(f"- **Data:** {news['data']}\n")
                 f.write(f"- **Relevância:** {news['relevancia_score']:.1f}\n")
+                if news.get('cobertura', 1) > 1:
+                    f.write(f"- **Cobertura:** {news['cobertura']} veículos (matéria replicada)\n")
                 f.write(f"- **Risco:** {analysis['risk_level']}\n")
                 f.write(f"- **Confiança:** {analysis['confidence']:.1f}%\n")
                 
@@ -566,11 +754,13 @@ class EnhancedNewsMonitor:
         processed_news = []
         risk_analyses = []
         
-        for i, news_item in enumerate(news_data[:10], 1):  # Limitar a 10
-            logger.info(f"📰 Processando notícia {i}/{min(len(news_data), 10)}")
-            
-            # Extrair conteúdo
-            content = self.extract_news_content(news_item.get('link', ''))
+        # Conteúdo das notícias baixado em paralelo (limite de 10); cada matéria
+        # é analisada uma vez, mesmo publicada por vários veículos
+        articles = self.collapse_duplicate_articles(self.fetch_articles(news_data, budget=10))
+        
+        for i, article in enumerate(articles, 1):
+            logger.info(f"📰 Processando notícia {i}/{len(articles)}")
+            news_item, content = article.news, article.content
             
             # Calcular relevância
             relevance = self._calculate_relevance(news_item.get('title', ''), search_name)
@@ -582,7 +772,8 @@ class EnhancedNewsMonitor:
                 fonte=news_item.get('source', ''),
                 data=news_item.get('pubDate', ''),
                 conteudo=content,
-                relevancia_score=relevance
+                relevancia_score=relevance,
+                cobertura=news_item.get('cluster_size', 1)
             )
             
             processed_news.append(news_obj)
@@ -593,8 +784,6 @@ class EnhancedNewsMonitor:
                 risk_analysis = self.analyze_news_with_ai(content)
                 risk_analyses.append(risk_analysis)
                 logger.info(f"📊 Risco: {risk_analysis.risk_level}")
-            
-            time.sleep(0.5)  # Rate limiting
         
         # 4. Calcular risco consolidado
         logger.info("📊 Calculando risco consolidado...")
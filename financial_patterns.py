@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+🧾 FINANCIAL PATTERNS - Advanced DD-AI v2.1
+==========================================
+
+Registro de expressões regulares pré-compiladas para textos financeiros
+brasileiros e passada única de normalização + extração de entidades.
+
+Antes, o preprocessing fazia um `re.sub` por padrão (valores, CPF, CNPJ,
+datas) e a extração de entidades varria o texto de novo com `re.findall`
+para CPF, CNPJ, valores e valores altos. Aqui uma única alternação
+compilada percorre o texto uma vez e devolve o texto normalizado junto
+com as entidades encontradas.
+
+Ordem das alternativas (a primeira que casar em cada posição vence):
+valor monetário, CNPJ, CPF, data. O CNPJ vem antes do CPF para que um
+CNPJ sem formatação (14 dígitos) não seja lido como CPF + dígitos soltos.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Pattern
+
+# Valor monetário com o valor numérico capturado (mesmo formato de `currency_brl`)
+CURRENCY_NORMALIZATION_PATTERN = r'R\$\s*(?P<amount>\d{1,3}(?:\.\d{3})*(?:,\d{2})?)'
+DATE_PATTERN = r'\d{1,2}/\d{1,2}/\d{4}'
+
+
+@dataclass
+class FinancialScan:
+    """Resultado da passada única: texto normalizado + entidades do texto original"""
+    normalized_text: str
+    cpfs: List[str] = field(default_factory=list)
+    cnpjs: List[str] = field(default_factory=list)
+    valores: List[str] = field(default_factory=list)
+    large_amounts: List[str] = field(default_factory=list)
+
+
+class FinancialPatternSet:
+    """Padrões de compliance compilados uma única vez + extrator fundido"""
+
+    def __init__(self, patterns: Dict[str, Any]):
+        """
+        Args:
+            patterns: Dicionário de `_init_compliance_patterns` (valores `str`
+                são tratados como regex; listas de palavras-chave são ignoradas)
+        """
+        self.compiled: Dict[str, Pattern] = {
+            name: re.compile(pattern)
+            for name, pattern in patterns.items() if isinstance(pattern, str)
+        }
+        self.compiled['currency_normalization'] = re.compile(CURRENCY_NORMALIZATION_PATTERN)
+        self.compiled['date'] = re.compile(DATE_PATTERN)
+
+        self._large_amounts = self.compiled['large_amounts']
+        self._fused = re.compile(
+            f"(?P<currency>{CURRENCY_NORMALIZATION_PATTERN})"
+            f"|(?P<cnpj>{patterns['cnpj']})"
+            f"|(?P<cpf>{patterns['cpf']})"
+            f"|(?P<date>{DATE_PATTERN})"
+        )
+
+    def __getitem__(self, name: str) -> Pattern:
+        return self.compiled[name]
+
+    def scan(self, text: str) -> FinancialScan:
+        """Normaliza o texto e extrai CPF, CNPJ, valores e valores altos em uma passada"""
+        scan = FinancialScan(normalized_text="")
+        pieces: List[str] = []
+        position = 0
+
+        for match in self._fused.finditer(text):
+            start, end = match.span()
+            pieces.append(text[position:start])
+            position = end
+            kind = match.lastgroup
+
+            if kind == 'currency':
+                token = match.group('currency')
+                scan.valores.append(token)
+                pieces.append(f"VALOR_MONETARIO_{match.group('amount')}")
+                # Valor alto começa no mesmo "R$" (pode se estender além do token)
+                large = self._large_amounts.match(text, start)
+                if large:
+                    scan.large_amounts.append(large.group())
+            elif kind == 'cnpj':
+                scan.cnpjs.append(match.group())
+                pieces.append('CNPJ_NORMALIZADO')
+            elif kind == 'cpf':
+                scan.cpfs.append(match.group())
+                pieces.append('CPF_NORMALIZADO')
+            else:
+                pieces.append('DATA_NORMALIZADA')
+
+        pieces.append(text[position:])
+        scan.normalized_text = "".join(pieces).strip()
+        return scan
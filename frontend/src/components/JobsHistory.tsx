@@ -11,14 +11,47 @@ import {
   Download
 } from 'lucide-react';
 import { useAppStore } from '../lib/store';
+import { JobProgressEvent } from '../types';
+
+const JOBS_API_URL = 'http://127.0.0.1:8001/api/jobs';
 
 const JobsHistory: React.FC = () => {
   const { jobs, loadJobs, isLoading } = useAppStore();
 
+  const [progress, setProgress] = React.useState<Record<number, JobProgressEvent>>({});
+
   React.useEffect(() => {
     loadJobs();
   }, [loadJobs]);
 
+  // Progresso ao vivo (Server-Sent Events) dos jobs pendentes ou em execução
+  const activeJobIds = jobs
+    .filter(job => job.id !== undefined && (job.status === 'pending' || job.status === 'running'))
+    .map(job => job.id as number);
+  const activeKey = activeJobIds.join(',');
+
+  React.useEffect(() => {
+    const sources = activeJobIds.map(jobId => {
+      const source = new EventSource(`${JOBS_API_URL}/${jobId}/events`);
+      const update = (event: MessageEvent) => {
+        const data = JSON.parse(event.data);
+        setProgress(current => ({
+          ...current,
+          [jobId]: { processed: data.processed, total: data.total, text: data.text ?? current[jobId]?.text }
+        }));
+      };
+      source.addEventListener('item', update as EventListener);
+      source.addEventListener('message', update as EventListener);
+      source.addEventListener('done', () => {
+        source.close();
+        loadJobs();
+      });
+      return source;
+    });
+    return () => sources.forEach(source => source.close());
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [activeKey, loadJobs]);
+
   const getStatusIcon = (status: string) => {
     switch (status) {
       case 'completed':
@@ -192,6 +225,28 @@ const JobsHistory: React.FC = () => {
                 </div>
               </div>
               
+              {job.id !== undefined && (job.status === 'running' || job.status === 'pending') && (() => {
+                const live = progress[job.id];
+                const processed = live?.processed ?? job.itens_processados ?? 0;
+                const total = live?.total ?? job.total_itens;
+                return (
+                  <div className="mt-3 space-y-1">
+                    <div className="flex justify-between text-xs text-aurora-text-muted">
+                      <span>{live?.text ?? 'Processando...'}</span>
+                      <span>{total ? `${processed}/${total}` : processed} itens</span>
+                    </div>
+                    {total ? (
+                      <div className="h-1.5 bg-aurora-glass rounded-full overflow-hidden">
+                        <div
+                          className="h-full bg-aurora-accent transition-all"
+                          style={{ width: `${Math.min(100, (processed / total) * 100)}%` }}
+                        />
+                      </div>
+                    ) : null}
+                  </div>
+                );
+              })()}
+              
               {job.resultado && (
                 <div className="mt-3 pt-3 border-t border-aurora-border">
                   <p className="text-sm text-aurora-text-muted">
@@ -45,6 +45,7 @@ interface ConnectionResult {
 interface QueryRequest {
   connection: ConnectionDetails;
   query: string;
+  page_size?: number;
 }
 
 interface QueryResult {
@@ -53,6 +54,9 @@ interface QueryResult {
   data?: any[];
   row_count?: number;
   message?: string;
+  detail?: string;
+  cursor?: string | null;
+  has_more?: boolean;
 }
 
 interface TablesResult {
@@ -61,6 +65,58 @@ interface TablesResult {
   message?: string;
 }
 
+interface QueryStreamMessage {
+  type: 'columns' | 'rows' | 'end' | 'error';
+  columns?: string[];
+  rows?: any[];
+  row_count?: number;
+  message?: string;
+}
+
+// Linhas por página na leitura paginada de /api/execute-query
+const QUERY_PAGE_SIZE = 500;
+
+// Lê o resultado NDJSON de /api/execute-query, publicando cada bloco assim que chega
+const readQueryStream = async (
+  body: ReadableStream<Uint8Array>,
+  onUpdate: (result: QueryResult) => void
+): Promise<QueryResult> => {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  // Linhas acumuladas em um único array (sem recopiar a cada bloco)
+  const rows: any[] = [];
+  let result: QueryResult = { success: true, columns: [], data: rows, row_count: 0 };
+
+  const handleLine = (line: string) => {
+    if (!line.trim()) return;
+    const message: QueryStreamMessage = JSON.parse(line);
+    if (message.type === 'columns') {
+      result = { ...result, columns: message.columns };
+    } else if (message.type === 'rows') {
+      (message.rows || []).forEach((row) => rows.push(row));
+      result = { ...result, row_count: rows.length };
+    } else if (message.type === 'end') {
+      result = { ...result, row_count: message.row_count, message: message.message };
+    } else if (message.type === 'error') {
+      result = { ...result, success: false, message: `Erro durante a leitura: ${message.message}` };
+    }
+    onUpdate(result);
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop() || '';
+    lines.forEach(handleLine);
+  }
+  handleLine(buffer + decoder.decode());
+
+  return result;
+};
+
 const SQLServerConnection: React.FC = () => {
   const [connectionData, setConnectionData] = useState<ConnectionDetails>({
     server: 'DESKTOP-T9HKFSQ\\SQLEXPRESS',
@@ -74,6 +130,9 @@ const SQLServerConnection: React.FC = () => {
   const [connectionResult, setConnectionResult] = useState<ConnectionResult | null>(null);
   const [tablesResult, setTablesResult] = useState<TablesResult | null>(null);
   const [queryResult, setQueryResult] = useState<QueryResult | null>(null);
+  const [queryCursor, setQueryCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [streamFullResult, setStreamFullResult] = useState(false);
   const [customQuery, setCustomQuery] = useState<string>('');
   const [loading, setLoading] = useState(false);
   const [showAdvanced, setShowAdvanced] = useState(false);
@@ -168,6 +227,56 @@ const SQLServerConnection: React.FC = () => {
     setLoading(false);
   };
 
+  // Descarta o cursor da query anterior (libera a conexão no servidor)
+  const closeQueryCursor = () => {
+    if (queryCursor) {
+      fetch(`http://127.0.0.1:8001/api/execute-query/${queryCursor}`, { method: 'DELETE' }).catch(() => {});
+      setQueryCursor(null);
+    }
+  };
+
+  const loadMoreRows = async () => {
+    if (!queryCursor) return;
+
+    setLoadingMore(true);
+    try {
+      const response = await fetch('http://127.0.0.1:8001/api/execute-query/next', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ cursor: queryCursor, page_size: QUERY_PAGE_SIZE })
+      });
+
+      const page: QueryResult = await response.json();
+      if (!response.ok) {
+        setQueryCursor(null);
+        toast({
+          title: 'Não foi possível carregar mais linhas',
+          description: page.detail || `Erro HTTP ${response.status}`,
+          status: 'warning',
+          duration: 4000,
+          isClosable: true,
+        });
+      } else {
+        setQueryResult((current) => {
+          const data = (current?.data || []).concat(page.data || []);
+          return { ...current, ...page, data, row_count: data.length };
+        });
+        setQueryCursor(page.cursor || null);
+      }
+    } catch (error) {
+      toast({
+        title: 'Erro ao carregar mais linhas',
+        description: String(error),
+        status: 'error',
+        duration: 4000,
+        isClosable: true,
+      });
+    }
+    setLoadingMore(false);
+  };
+
   const executeQuery = async () => {
     if (!customQuery.trim()) {
       toast({
@@ -182,28 +291,62 @@ const SQLServerConnection: React.FC = () => {
 
     setLoading(true);
     setQueryResult(null);
+    closeQueryCursor();
 
     try {
       const queryRequest: QueryRequest = {
         connection: connectionData,
         query: customQuery
       };
+      let data: QueryResult;
 
-      const response = await fetch('http://127.0.0.1:8001/api/execute-query', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(queryRequest)
-      });
+      if (streamFullResult) {
+        // Resultado completo em NDJSON: a tabela é renderizada a partir do primeiro bloco
+        const response = await fetch('http://127.0.0.1:8001/api/execute-query', {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'application/x-ndjson',
+          },
+          body: JSON.stringify(queryRequest)
+        });
+
+        if (!response.ok || !response.body) {
+          const errorData = await response.json();
+          setQueryResult({
+            success: false,
+            message: errorData.detail || errorData.message || `Erro HTTP ${response.status}`
+          });
+          setLoading(false);
+          return;
+        }
+
+        data = await readQueryStream(response.body, setQueryResult);
+      } else {
+        // Só a primeira página; as demais vêm do cursor mantido no servidor
+        const response = await fetch('http://127.0.0.1:8001/api/execute-query', {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({ ...queryRequest, page_size: QUERY_PAGE_SIZE })
+        });
+
+        data = await response.json();
+        if (!response.ok) {
+          setQueryResult({ success: false, message: data.detail || `Erro HTTP ${response.status}` });
+          setLoading(false);
+          return;
+        }
 
-      const data: QueryResult = await response.json();
-      setQueryResult(data);
+        setQueryResult(data);
+        setQueryCursor(data.cursor || null);
+      }
       
       if (data.success) {
         toast({
           title: 'Query executada!',
-          description: data.message || `Retornou ${data.row_count} linhas`,
+          description: data.message || `Retornou ${data.row_count} linhas${data.has_more ? ' (há mais páginas)' : ''}`,
           status: 'success',
           duration: 3000,
           isClosable: true,
@@ -427,6 +570,14 @@ const SQLServerConnection: React.FC = () => {
                   _placeholder={{ color: 'gray.500' }}
                 />
               </Box>
+
+              <Checkbox
+                isChecked={streamFullResult}
+                onChange={(e) => setStreamFullResult(e.target.checked)}
+                color="gray.300"
+              >
+                Ler o resultado completo em streaming (sem paginação)
+              </Checkbox>
               
               <Button
                 onClick={executeQuery}
@@ -457,7 +608,7 @@ const SQLServerConnection: React.FC = () => {
                   </Text>
                   {queryResult.row_count !== undefined && (
                     <Badge colorScheme="green" variant="subtle">
-                      {queryResult.row_count} linhas
+                      {queryResult.row_count}{queryCursor ? '+' : ''} linhas
                     </Badge>
                   )}
                 </HStack>
@@ -486,6 +637,19 @@ const SQLServerConnection: React.FC = () => {
                     </Table>
                   </Box>
                 )}
+
+                {queryCursor && (
+                  <Button
+                    onClick={loadMoreRows}
+                    isLoading={loadingMore}
+                    loadingText="Carregando..."
+                    variant="outline"
+                    colorScheme="blue"
+                    alignSelf="center"
+                  >
+                    Carregar mais {QUERY_PAGE_SIZE} linhas
+                  </Button>
+                )}
               </VStack>
             ) : (
               <Alert status="error" borderRadius="lg">
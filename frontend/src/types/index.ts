@@ -24,6 +24,15 @@ export interface ExecucaoJob {
   iniciado_em?: string;
   finalizado_em?: string;
   resultado?: string;
+  total_itens?: number | null;
+  itens_processados?: number;
+  criado_em?: string;
+}
+
+export interface JobProgressEvent {
+  processed: number;
+  total: number | null;
+  text?: string;
 }
 
 export interface AnalysisPayload {
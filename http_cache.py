@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+💾 HTTP CACHE - Advanced DD-AI v2.1
+===================================
+
+Cache HTTP em disco (diskcache) para feeds RSS e páginas de notícias.
+
+- Respostas 200 de GET são guardadas com os validadores (`ETag`,
+  `Last-Modified`) e a validade de `Cache-Control: max-age` / `Expires`
+- Dentro da validade a resposta sai do disco sem ir à rede; depois dela a
+  requisição vira condicional (`If-None-Match` / `If-Modified-Since`) e um
+  304 é respondido com o corpo guardado
+- `no-store` não é guardado; `no-cache` é sempre revalidado
+- O texto extraído de cada artigo fica guardado por URL junto com o hash do
+  HTML de origem: página inalterada não é baixada nem reprocessada
+
+Integração:
+- `CachingHTTPAdapter`: adapter do `requests.Session`
+- `AsyncHTTPClient(cache=...)`: mesmo cache no cliente assíncrono
+
+`Vary` não é considerado (as requisições usam sempre os mesmos cabeçalhos).
+Sem `diskcache` instalado o cache fica desativado.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalhos guardados com o corpo
+_STORED_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "expires", "date")
+
+
+def _cache_directives(cache_control: Optional[str]) -> Dict[str, Optional[str]]:
+    directives = {}
+    for part in (cache_control or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class CachedResponse:
+    """Resposta guardada (corpo, validadores e validade)"""
+    url: str
+    headers: Dict[str, str]
+    content: bytes
+    stored_at: float
+    fresh_until: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.fresh_until
+
+    @property
+    def content_hash(self) -> str:
+        return hashlib.sha1(self.content).hexdigest()
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Cabeçalhos de revalidação (If-None-Match / If-Modified-Since)"""
+        headers = {}
+        if self.headers.get("etag"):
+            headers["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+
+class HTTPCache:
+    """Cache HTTP condicional em disco, compartilhado entre threads"""
+
+    def __init__(self,
+                 directory: Optional[str] = "cache/http",
+                 size_limit_mb: int = 256,
+                 max_entry_age: float = 30 * 24 * 3600):
+        """
+        Args:
+            directory: Diretório do diskcache (None = cache desativado)
+            size_limit_mb: Tamanho máximo em disco (eviction LRU)
+            max_entry_age: Tempo máximo de permanência de uma entrada (s), mesmo revalidável
+        """
+        self.max_entry_age = max_entry_age
+        self._lock = threading.Lock()
+        self._stats = {'fresh_hits': 0, 'revalidated': 0, 'misses': 0, 'stored': 0,
+                       'text_hits': 0, 'text_misses': 0}
+
+        self._disk = None
+        if directory and DISKCACHE_AVAILABLE:
+            self._disk = diskcache.Cache(
+                directory,
+                size_limit=size_limit_mb * 1024 * 1024,
+                eviction_policy="least-recently-used"
+            )
+        elif directory:
+            logger.warning("⚠️ diskcache não instalado. Cache HTTP desativado.")
+
+    @property
+    def enabled(self) -> bool:
+        return self._disk is not None
+
+    # --- Respostas ---
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        """Entrada guardada para a URL (fresca ou não)"""
+        if self._disk is None:
+            return None
+        entry = self._disk.get(("response", url))
+        return CachedResponse(**entry) if entry else None
+
+    def store(self, url: str, headers: Mapping[str, str], content: bytes) -> Optional[CachedResponse]:
+        """Guarda uma resposta 200 (exceto `no-store`)"""
+        if self._disk is None:
+            return None
+        headers = {name: headers[name] for name in _STORED_HEADERS if headers.get(name)}
+        directives = _cache_directives(headers.get("cache-control"))
+        if "no-store" in directives:
+            return None
+        now = time.time()
+        entry = CachedResponse(url=url, headers=headers, content=content, stored_at=now,
+                               fresh_until=self._fresh_until(headers, directives, now))
+        self._save(entry)
+        self._count('stored')
+        return entry
+
+    def revalidated(self, entry: CachedResponse, headers: Mapping[str, str]) -> CachedResponse:
+        """Atualiza validade e validadores de uma entrada confirmada por 304"""
+        for name in _STORED_HEADERS:
+            if name != "content-type" and headers.get(name):
+                entry.headers[name] = headers[name]
+        now = time.time()
+        entry.stored_at = now
+        entry.fresh_until = self._fresh_until(entry.headers, _cache_directives(entry.headers.get("cache-control")), now)
+        self._save(entry)
+        self._count('revalidated')
+        return entry
+
+    def _fresh_until(self, headers: Mapping[str, str], directives: Dict[str, Optional[str]], now: float) -> float:
+        if "no-cache" in directives:
+            return now
+        for name in ("s-maxage", "max-age"):
+            try:
+                return now + max(0.0, float(directives[name]))
+            except (KeyError, TypeError, ValueError):
+                continue
+        expires = _http_date(headers.get("expires"))
+        if expires is not None:
+            date = _http_date(headers.get("date")) or now
+            return now + max(0.0, expires - date)
+        # Sem validade explícita: sempre revalidar
+        return now
+
+    def _save(self, entry: CachedResponse):
+        self._disk.set(("response", entry.url), entry.__dict__.copy(), expire=self.max_entry_age)
+
+    # --- Texto extraído ---
+
+    def get_text(self, url: str, content_hash: str) -> Optional[Tuple[str, bool]]:
+        """Texto extraído de `url` se o HTML de origem não mudou (mesmo hash)"""
+        if self._disk is None:
+            return None
+        entry = self._disk.get(("text", url))
+        if entry and entry[0] == content_hash:
+            self._count('text_hits')
+            return entry[1], entry[2]
+        self._count('text_misses')
+        return None
+
+    def put_text(self, url: str, content_hash: str, text: str, extracted: bool):
+        if self._disk is not None:
+            self._disk.set(("text", url), (content_hash, text, extracted), expire=self.max_entry_age)
+
+    def extracted_text(self, url: str, html: bytes, parse, variant: str = "") -> Tuple[str, bool]:
+        """`parse(url, html)` com o resultado guardado por URL + hash do HTML (+ `variant`, ex.: o extrator)"""
+        content_hash = hashlib.sha1(variant.encode("utf-8") + b"\x00" + html).hexdigest()
+        cached = self.get_text(url, content_hash)
+        if cached is not None:
+            return cached
+        text, extracted = parse(url, html)
+        self.put_text(url, content_hash, text, extracted)
+        return text, extracted
+
+    # --- Estatísticas ---
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def count_miss(self):
+        self._count('misses')
+
+    def count_fresh_hit(self):
+        self._count('fresh_hits')
+
+    def clear(self):
+        if self._disk is not None:
+            self._disk.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['enabled'] = self.enabled
+        if self._disk is not None:
+            stats['entries'] = len(self._disk)
+            stats['size_mb'] = round(self._disk.volume() / (1024 * 1024), 2)
+        return stats
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """Adapter do requests que responde GETs pelo `HTTPCache` (validade e revalidação)"""
+
+    def __init__(self, cache: HTTPCache, **kwargs: Any):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        if request.method != "GET" or not self.cache.enabled:
+            return super().send(request, **kwargs)
+
+        entry = self.cache.lookup(request.url)
+        if entry is not None and entry.is_fresh:
+            self.cache.count_fresh_hit()
+            return self._cached_response(request, entry)
+        if entry is not None:
+            request.headers.update(entry.conditional_headers())
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            return self._cached_response(request, self.cache.revalidated(entry, response.headers))
+
+        self.cache.count_miss()
+        if response.status_code == 200:
+            self.cache.store(request.url, response.headers, response.content)
+        return response
+
+    def _cached_response(self, request: requests.PreparedRequest, entry: CachedResponse) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = request.url
+        response.request = request
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = entry.content
+        response.from_cache = True
+        return response
+
+
+_shared_cache: Optional[HTTPCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_cache() -> HTTPCache:
+    """Cache compartilhado, configurado por `DDAI_HTTP_CACHE_*` (diretório vazio = desativado)"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = HTTPCache(
+                directory=os.getenv("DDAI_HTTP_CACHE_DIR", "cache/http") or None,
+                size_limit_mb=int(os.getenv("DDAI_HTTP_CACHE_SIZE_MB", "256")),
+                max_entry_age=float(os.getenv("DDAI_HTTP_CACHE_MAX_AGE_DAYS", "30")) * 24 * 3600,
+            )
+        return _shared_cache
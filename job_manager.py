@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+🗂️ JOB MANAGER - Advanced DD-AI v2.1
+=====================================
+
+Execução em segundo plano das análises em lote longas.
+
+O endpoint devolve o ID do job na hora; o pipeline roda como tarefa no event
+loop (o trabalho bloqueante segue pelos executores de `blocking_executors`)
+e publica o progresso item a item. Os clientes acompanham por Server-Sent
+Events, com retomada pelo cabeçalho `Last-Event-ID`:
+
+    id: 3
+    event: item
+    data: {"processed": 3, "total": 120, "result": {...}}
+
+Eventos: `status` (mudança de estado), `item` (resultado parcial),
+`message` (etapa do pipeline) e `done` (registro final do job).
+
+Os jobs ficam em SQLite no formato `ExecucaoJob` do frontend (id, status,
+tipo_gatilho, iniciado_em, finalizado_em, resultado), com o progresso e o
+relatório completo em colunas extras. Jobs interrompidos por um restart são
+marcados como `failed` na inicialização; um pipeline que devolve
+`{'success': False, 'error': ...}` também termina como `failed`.
+
+Os eventos de um job em execução ficam num buffer limitado em memória (um
+assinante atrasado além dele recebe um `status` com o progresso atual e
+segue dali). Ao terminar, o buffer é descartado: o replay de jobs
+finalizados sai do SQLite.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+_JOB_COLUMNS = ("id", "status", "tipo_gatilho", "iniciado_em", "finalizado_em",
+                "resultado", "total_itens", "itens_processados", "criado_em")
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Serializa um evento no formato text/event-stream"""
+    data = json.dumps(event["data"], ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+class JobProgress:
+    """Canal de progresso entregue ao pipeline (seguro para chamadas de outras threads)"""
+
+    def __init__(self, state: "_JobState"):
+        self._state = state
+
+    @property
+    def processed(self) -> int:
+        return self._state.processed
+
+    def set_total(self, total: int):
+        self._state.total = total
+
+    def item(self, result: Dict[str, Any], total: Optional[int] = None):
+        """Um item concluído, com o resultado parcial publicado aos assinantes"""
+        state = self._state
+        with state.lock:
+            if total is not None:
+                state.total = total
+            state.processed += 1
+            processed = state.processed
+        state.publish("item", {"processed": processed, "total": state.total, "result": result})
+
+    def message(self, text: str):
+        """Etapa do pipeline (ex.: 'Enriquecendo 40 CNPJs')"""
+        self._state.publish("message", {"text": text, "processed": self._state.processed,
+                                        "total": self._state.total})
+
+
+class _JobState:
+    """Eventos em memória de um job e os loops aguardando novos eventos"""
+
+    def __init__(self, job_id: int, on_event: Callable[["_JobState"], None], max_events: int):
+        self.job_id = job_id
+        self.total: Optional[int] = None
+        self.processed = 0
+        self.finished = False
+        # Últimos `max_events` eventos; ids contínuos desde 1 (last_event_id = id do mais novo)
+        self.events: deque = deque(maxlen=max_events)
+        self.last_event_id = 0
+        self.lock = threading.Lock()
+        self._waiters: List[tuple] = []
+        self._on_event = on_event
+
+    def publish(self, event_type: str, data: Dict[str, Any], finished: bool = False):
+        with self.lock:
+            self.last_event_id += 1
+            self.events.append({"id": self.last_event_id, "type": event_type, "data": data})
+            self.finished = self.finished or finished
+            waiters, self._waiters = self._waiters, []
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+        self._on_event(self)
+
+    def events_after(self, position: int) -> List[Dict[str, Any]]:
+        """Eventos com id > `position` ainda no buffer (chamar com `lock`)"""
+        if not self.events:
+            return []
+        start = max(0, position - self.events[0]["id"] + 1)
+        return list(self.events)[start:]
+
+    def waiter(self) -> asyncio.Event:
+        event = asyncio.Event()
+        with self.lock:
+            self._waiters.append((asyncio.get_running_loop(), event))
+        return event
+
+
+class JobManager:
+    """Jobs persistidos em SQLite, executados no event loop com progresso por SSE"""
+
+    def __init__(self,
+                 db_path: str = "cache/jobs.sqlite3",
+                 max_concurrent_jobs: int = 2,
+                 max_buffered_events: int = 1000,
+                 progress_flush_interval: float = 1.0):
+        """
+        Args:
+            db_path: Arquivo SQLite dos jobs
+            max_concurrent_jobs: Jobs executando ao mesmo tempo (os demais ficam 'pending')
+            max_buffered_events: Eventos mantidos em memória por job em andamento (replay por SSE)
+            progress_flush_interval: Intervalo mínimo (s) entre gravações do progresso
+        """
+        self.db_path = db_path
+        self.max_concurrent_jobs = max(1, max_concurrent_jobs)
+        self.max_buffered_events = max(1, max_buffered_events)
+        self.progress_flush_interval = progress_flush_interval
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db_lock = threading.Lock()
+        self._init_schema()
+
+        self._states: Dict[int, _JobState] = {}
+        self._flushed_at: Dict[int, float] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._stats = {'started': 0, 'completed': 0, 'failed': 0}
+
+    # --- Persistência ---
+
+    def _init_schema(self):
+        with self._db_lock, self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS execucao_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    status TEXT NOT NULL,
+                    tipo_gatilho TEXT NOT NULL,
+                    iniciado_em TEXT,
+                    finalizado_em TEXT,
+                    resultado TEXT,
+                    total_itens INTEGER,
+                    itens_processados INTEGER NOT NULL DEFAULT 0,
+                    criado_em TEXT NOT NULL,
+                    relatorio TEXT
+                )
+            """)
+            interrupted = self._db.execute(
+                "UPDATE execucao_jobs SET status = 'failed', finalizado_em = ?, "
+                "resultado = 'Interrompido pelo reinício do servidor' "
+                "WHERE status IN ('pending', 'running')",
+                (datetime.now().isoformat(),)
+            ).rowcount
+        if interrupted:
+            logger.warning(f"⚠️ {interrupted} job(s) interrompido(s) marcado(s) como 'failed'")
+
+    def _update(self, job_id: int, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._db_lock, self._db:
+            self._db.execute(f"UPDATE execucao_jobs SET {assignments} WHERE id = ?",
+                             (*fields.values(), job_id))
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Registro do job no formato ExecucaoJob (mais progresso)"""
+        with self._db_lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(_JOB_COLUMNS)} FROM execucao_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        state = self._states.get(job_id)
+        if state is not None and not state.finished:
+            job["total_itens"], job["itens_processados"] = state.total, state.processed
+        return job
+
+    def list(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Jobs mais recentes primeiro"""
+        with self._db_lock:
+            ids = [row[0] for row in self._db.execute(
+                "SELECT id FROM execucao_jobs ORDER BY id DESC LIMIT ?", (limit,)
+            )]
+        return [job for job in map(self.get, ids) if job is not None]
+
+    def report(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Relatório completo de um job concluído"""
+        with self._db_lock:
+            row = self._db.execute("SELECT relatorio FROM execucao_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    # --- Execução ---
+
+    def start(self, tipo_gatilho: str,
+              runner: Callable[[JobProgress], Awaitable[Dict[str, Any]]],
+              summarize: Optional[Callable[[Dict[str, Any]], str]] = None,
+              total: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Cria o job e agenda `runner(progress)` no event loop corrente
+
+        Args:
+            tipo_gatilho: Origem do job (ex.: 'sql-to-analysis')
+            runner: Corrotina do pipeline; retorna o relatório final
+            summarize: Texto de `resultado` a partir do relatório
+            total: Total de itens, se já conhecido
+        """
+        with self._db_lock, self._db:
+            job_id = self._db.execute(
+                "INSERT INTO execucao_jobs (status, tipo_gatilho, total_itens, criado_em) "
+                "VALUES ('pending', ?, ?, ?)",
+                (tipo_gatilho, total, datetime.now().isoformat())
+            ).lastrowid
+
+        state = _JobState(job_id, self._flush_progress, self.max_buffered_events)
+        state.total = total
+        self._states[job_id] = state
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_jobs)
+        task = asyncio.get_running_loop().create_task(
+            self._run(job_id, state, runner, summarize), name=f"job-{job_id}"
+        )
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        self._stats['started'] += 1
+
+        job = self.get(job_id)
+        state.publish("status", job)
+        return job
+
+    async def _run(self, job_id: int, state: _JobState,
+                   runner: Callable[[JobProgress], Awaitable[Dict[str, Any]]],
+                   summarize: Optional[Callable[[Dict[str, Any]], str]]):
+        async with self._semaphore:
+            self._update(job_id, status="running", iniciado_em=datetime.now().isoformat())
+            state.publish("status", self.get(job_id))
+            logger.info(f"🚀 Job #{job_id} iniciado")
+            try:
+                report = await runner(JobProgress(state))
+                if isinstance(report, dict) and report.get('success') is False:
+                    # Pipeline terminou com erro tratado: job falho, relatório guardado com o erro
+                    error = report.get('error', 'Erro não informado')
+                    logger.error(f"❌ Job #{job_id} falhou: {error}")
+                    self._finish(job_id, state, "failed", f"Erro: {error}", report)
+                    return
+                summary = summarize(report) if summarize else f"{state.processed} itens processados"
+                self._finish(job_id, state, "completed", summary, report)
+                logger.info(f"✅ Job #{job_id} concluído: {summary}")
+            except asyncio.CancelledError:
+                self._finish(job_id, state, "failed", "Cancelado")
+                raise
+            except Exception as e:
+                logger.error(f"❌ Job #{job_id} falhou: {e}")
+                self._finish(job_id, state, "failed", f"Erro: {e}")
+
+    def _finish(self, job_id: int, state: _JobState, status: str, resultado: str,
+                report: Optional[Dict[str, Any]] = None):
+        self._update(
+            job_id,
+            status=status,
+            finalizado_em=datetime.now().isoformat(),
+            resultado=resultado,
+            total_itens=state.total,
+            itens_processados=state.processed,
+            relatorio=None if report is None else json.dumps(report, ensure_ascii=False, default=str)
+        )
+        self._stats[status] += 1
+        # Assinantes ativos drenam o próprio buffer; os novos leem o SQLite
+        self._states.pop(job_id, None)
+        state.publish("done", self.get(job_id), finished=True)
+        self._flushed_at.pop(job_id, None)
+
+    def _flush_progress(self, state: _JobState):
+        """Grava o progresso no SQLite no máximo a cada `progress_flush_interval`"""
+        if state.finished:
+            return
+        now = time.monotonic()
+        if now - self._flushed_at.get(state.job_id, 0.0) < self.progress_flush_interval:
+            return
+        self._flushed_at[state.job_id] = now
+        self._update(state.job_id, total_itens=state.total, itens_processados=state.processed)
+
+    # --- Assinatura (SSE) ---
+
+    async def events(self, job_id: int, after: int = 0,
+                     keepalive: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Eventos do job a partir de `after` (id do último evento recebido)
+
+        Produz None a cada `keepalive` segundos sem eventos; termina após `done`.
+        """
+        state = self._states.get(job_id)
+        if state is None:
+            # Job finalizado (ou de antes de um restart): só o registro final
+            job = self.get(job_id)
+            if job is not None:
+                yield {"id": after + 1, "type": "done", "data": job}
+            return
+
+        position = after
+        while True:
+            waiter = state.waiter()
+            with state.lock:
+                pending = state.events_after(position)
+                finished = state.finished
+            if pending and pending[0]["id"] > position + 1:
+                # Assinante atrasado além do buffer: progresso atual no lugar dos eventos descartados
+                yield {"id": pending[0]["id"] - 1, "type": "status", "data": self.get(job_id)}
+            for event in pending:
+                yield event
+            if pending:
+                position = pending[-1]["id"]
+            if finished and not pending:
+                return
+            if pending:
+                continue
+            try:
+                await asyncio.wait_for(waiter.wait(), keepalive)
+            except asyncio.TimeoutError:
+                yield None
+
+    async def shutdown(self):
+        """Cancela os jobs em andamento (ficam como 'failed')"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'running': sum(1 for task in self._tasks.values() if not task.done()),
+            'max_concurrent_jobs': self.max_concurrent_jobs,
+            'buffered_jobs': len(self._states),
+            **self._stats,
+        }
+
+
+_shared_manager: Optional[JobManager] = None
+_shared_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Gerenciador compartilhado, configurado por variáveis de ambiente `DDAI_JOBS_*`"""
+    global _shared_manager
+    with _shared_lock:
+        if _shared_manager is None:
+            _shared_manager = JobManager(
+                db_path=os.getenv("DDAI_JOBS_DB", "cache/jobs.sqlite3"),
+                max_concurrent_jobs=int(os.getenv("DDAI_JOBS_MAX_CONCURRENT", "2")),
+                max_buffered_events=int(os.getenv("DDAI_JOBS_MAX_EVENTS", "1000")),
+            )
+        return _shared_manager
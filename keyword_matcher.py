@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+🔎 KEYWORD MATCHER - Advanced DD-AI v2.1
+========================================
+
+Motor de busca de múltiplas palavras-chave em uma única passada.
+
+Todas as listas de compliance (red flags, entidades reguladas, ESG, PRSAC,
+fatores de risco) são compiladas uma única vez em um autômato Aho-Corasick
+(`pyahocorasick`). Cada documento é convertido para minúsculas uma vez e
+percorrido uma vez, retornando todas as categorias com os offsets de cada
+ocorrência.
+
+Sem `pyahocorasick` instalado, usa busca por `str.find` (mesmo resultado,
+sem o ganho de passada única).
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+@dataclass
+class KeywordScan:
+    """Resultado de uma varredura: ocorrências por categoria e palavra-chave"""
+    # categoria -> palavra-chave -> lista de offsets (início) no texto
+    matches: Dict[str, Dict[str, List[int]]] = field(default_factory=dict)
+
+    def found(self, category: str) -> List[str]:
+        """Palavras-chave encontradas na categoria"""
+        return list(self.matches.get(category, {}))
+
+    def offsets(self, category: str, keyword: str) -> List[int]:
+        return self.matches.get(category, {}).get(keyword, [])
+
+    def evidence(self, limit: int = 10) -> List[Tuple[int, str, str]]:
+        """(offset, categoria, palavra-chave) da primeira ocorrência, em ordem no texto"""
+        items = [
+            (offsets[0], category, keyword)
+            for category, keywords in self.matches.items()
+            for keyword, offsets in keywords.items()
+        ]
+        return sorted(items)[:limit]
+
+
+class KeywordAutomaton:
+    """Autômato de palavras-chave por categoria, construído uma única vez"""
+
+    def __init__(self, keywords_by_category: Dict[str, Iterable[str]]):
+        """
+        Args:
+            keywords_by_category: categoria -> palavras-chave (em minúsculas)
+        """
+        self.categories: Dict[str, List[str]] = {
+            category: list(keywords) for category, keywords in keywords_by_category.items()
+        }
+
+        # palavra-chave -> categorias em que aparece
+        self._owners: Dict[str, List[str]] = {}
+        for category, keywords in self.categories.items():
+            for keyword in keywords:
+                self._owners.setdefault(keyword, []).append(category)
+
+        self._automaton = None
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self._owners:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+
+    def scan(self, text: str) -> KeywordScan:
+        """Varre o texto (case-insensitive) e agrupa as ocorrências por categoria"""
+        text_lower = text.lower()
+        hits: Dict[str, List[int]] = {}
+
+        if self._automaton is not None:
+            for end_index, keyword in self._automaton.iter(text_lower):
+                hits.setdefault(keyword, []).append(end_index - len(keyword) + 1)
+        else:
+            for keyword in self._owners:
+                start = text_lower.find(keyword)
+                while start != -1:
+                    hits.setdefault(keyword, []).append(start)
+                    start = text_lower.find(keyword, start + 1)
+
+        # Manter a ordem das listas de configuração em cada categoria
+        scan = KeywordScan()
+        for category, keywords in self.categories.items():
+            found = {keyword: sorted(hits[keyword]) for keyword in keywords if keyword in hits}
+            if found:
+                scan.matches[category] = found
+        return scan
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+🧬 NEWS DEDUP - Advanced DD-AI v2.1
+===================================
+
+Agrupamento de notícias quase duplicadas (mesma matéria replicada por
+vários veículos, com título levemente diferente).
+
+- Texto normalizado (minúsculas, sem acentos, sem o sufixo " - Fonte" do
+  Google News) dividido em shingles de caracteres
+- Assinatura MinHash: estimativa da similaridade de Jaccard entre shingles
+- LSH por bandas: só pares que coincidem em alguma banda são comparados
+- Pares com Jaccard estimado acima do limiar são unidos (union-find)
+
+Cada grupo é representado pelo primeiro item na ordem original; os demais
+ficam em `duplicates`, para que a matéria seja baixada e analisada uma
+única vez.
+"""
+
+import hashlib
+import html
+import os
+import random
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Generic, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+DEDUP_THRESHOLD = float(os.getenv("DDAI_NEWS_DEDUP_THRESHOLD", "0.6"))
+
+_TAGS = re.compile(r'<[^>]+>')
+# Nome do veículo que o Google News anexa à descrição (<font>Fonte</font>)
+_SOURCE_FONT = re.compile(r'<font[^>]*>.*?</font>', re.IGNORECASE | re.DOTALL)
+_NON_WORD = re.compile(r'[^\w]+')
+_MAX_HASH = (1 << 64) - 1
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sem acentos, pontuação e espaços repetidos"""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def news_text(news: Dict) -> str:
+    """Título (sem " - Fonte") + descrição do RSS (sem HTML e sem o veículo)"""
+    title = news.get('title') or ''
+    title = title.rsplit(' - ', 1)[0] if ' - ' in title else title
+    description = _TAGS.sub(' ', _SOURCE_FONT.sub(' ', news.get('description') or ''))
+    description = html.unescape(description)
+    # A descrição do Google News costuma repetir o título
+    if normalize_text(title) and normalize_text(title) in normalize_text(description):
+        description = ''
+    return f"{title} {description}"
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+@dataclass
+class DuplicateCluster(Generic[T]):
+    """Grupo de itens quase iguais: o representativo e as cópias"""
+    representative: T
+    duplicates: List[T] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return 1 + len(self.duplicates)
+
+
+class NearDuplicateDetector:
+    """MinHash + LSH sobre shingles de caracteres"""
+
+    def __init__(self,
+                 threshold: Optional[float] = None,
+                 num_perm: int = 64,
+                 bands: int = 16,
+                 shingle_size: int = 5,
+                 seed: int = 1):
+        """
+        Args:
+            threshold: Jaccard estimado mínimo para considerar duplicata (padrão: DDAI_NEWS_DEDUP_THRESHOLD)
+            num_perm: Tamanho da assinatura MinHash
+            bands: Bandas do LSH (num_perm / bands linhas cada; mais bandas = mais candidatos)
+            shingle_size: Caracteres por shingle
+            seed: Semente das permutações (assinaturas comparáveis entre instâncias)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm deve ser múltiplo de bands")
+        self.threshold = DEDUP_THRESHOLD if threshold is None else threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        # Permutações aproximadas por XOR com máscaras fixas sobre um hash de 64 bits
+        rng = random.Random(seed)
+        self._masks = [rng.getrandbits(64) for _ in range(num_perm)]
+
+    def shingles(self, text: str) -> set:
+        text = normalize_text(text)
+        if len(text) <= self.shingle_size:
+            return {text} if text else set()
+        return {text[i:i + self.shingle_size] for i in range(len(text) - self.shingle_size + 1)}
+
+    def signature(self, text: str) -> Optional[List[int]]:
+        """Assinatura MinHash do texto (None = texto vazio, nunca agrupado)"""
+        hashes = [_hash64(shingle) for shingle in self.shingles(text)]
+        if not hashes:
+            return None
+        return [min(value ^ mask for value in hashes) for mask in self._masks]
+
+    def similarity(self, first: Sequence[int], second: Sequence[int]) -> float:
+        """Jaccard estimado: fração de posições iguais nas assinaturas"""
+        return sum(a == b for a, b in zip(first, second)) / self.num_perm
+
+    def cluster(self, items: Sequence[T], text: Callable[[T], str]) -> List[DuplicateCluster[T]]:
+        """Agrupa os itens quase iguais, na ordem do primeiro item de cada grupo"""
+        signatures = [self.signature(text(item)) for item in items]
+        parent = list(range(len(items)))
+
+        def find(index: int) -> int:
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+
+        buckets: Dict[tuple, List[int]] = {}
+        for index, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            for band in range(self.bands):
+                key = (band, *signature[band * self.rows:(band + 1) * self.rows])
+                for other in buckets.setdefault(key, []):
+                    if find(other) != find(index) and \
+                            self.similarity(signatures[other], signature) >= self.threshold:
+                        # O menor índice é a raiz: o primeiro item representa o grupo
+                        low, high = sorted((find(other), find(index)))
+                        parent[high] = low
+                buckets[key].append(index)
+
+        clusters: Dict[int, DuplicateCluster[T]] = {}
+        for index, item in enumerate(items):
+            root = find(index)
+            if root in clusters:
+                clusters[root].duplicates.append(item)
+            else:
+                clusters[root] = DuplicateCluster(representative=item)
+        return list(clusters.values())
+
+
+def cluster_news(news_items: List[Dict], detector: Optional[NearDuplicateDetector] = None) -> List[Dict]:
+    """
+    Um item por matéria, na ordem original
+
+    O representativo ganha `cluster_size` e `duplicates` (título, link e
+    fonte das cópias agrupadas).
+    """
+    detector = detector or NearDuplicateDetector()
+    representatives = []
+    for cluster in detector.cluster(news_items, news_text):
+        news = dict(cluster.representative)
+        news['cluster_size'] = cluster.size
+        news['duplicates'] = [
+            {'title': copy.get('title', ''), 'link': copy.get('link', ''), 'source': copy.get('source', '')}
+            for copy in cluster.duplicates
+        ]
+        representatives.append(news)
+    return representatives
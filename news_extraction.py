@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+📰 NEWS EXTRACTION - Advanced DD-AI v2.1
+========================================
+
+Extração do texto de páginas de notícias com backends intercambiáveis.
+
+Todos os backends seguem a mesma regra do extrator original:
+1. Remover script, style, nav, footer e header
+2. Seletor específico do site (Valor, G1, Exame)
+3. Fallback: primeiro `<article>` ou `<main>`
+4. Espaços normalizados; menos de 200 caracteres = só o título
+
+Backends (`DDAI_NEWS_EXTRACTOR`):
+- `bs4`: BeautifulSoup + html.parser (implementação original, referência)
+- `lxml`: árvore lxml e XPath em C (padrão; lxml vem com o trafilatura)
+- `selectolax`: parser Lexbor, se instalado
+- `trafilatura`: seletores por site via lxml e, sem eles, o extrator do
+  trafilatura no lugar do fallback article/main
+
+`benchmark_extraction.py` compara velocidade e fidelidade ao `bs4`.
+"""
+
+import logging
+import os
+import re
+from typing import Dict, Optional, Tuple, Type
+
+try:
+    from bs4 import BeautifulSoup
+    BS4_AVAILABLE = True
+except ImportError:
+    BS4_AVAILABLE = False
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import trafilatura
+    TRAFILATURA_AVAILABLE = True
+except ImportError:
+    TRAFILATURA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# (trecho da URL, classe do div com o corpo da matéria)
+SITE_SELECTORS = (
+    ('valor.globo.com', 'content-text__container'),
+    ('g1.globo.com', 'mc-article-body'),
+    ('exame.com', 'article-content'),
+)
+REMOVED_TAGS = ('script', 'style', 'nav', 'footer', 'header')
+FALLBACK_TAGS = ('article', 'main')
+MIN_ARTICLE_CHARS = 200
+MAX_ARTICLE_CHARS = 2000
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def site_selector(url: str) -> Optional[str]:
+    """Classe do corpo da matéria para sites conhecidos"""
+    for domain, css_class in SITE_SELECTORS:
+        if domain in url:
+            return css_class
+    return None
+
+
+def finish_article(content: str, title: Optional[str]) -> Tuple[str, bool]:
+    """Texto final e se houve extração real (False = só o título)"""
+    content = _WHITESPACE.sub(' ', content).strip()
+    if len(content) > MIN_ARTICLE_CHARS:
+        return content[:MAX_ARTICLE_CHARS], True
+    return f"Notícia financeira: {title if title else 'Sem título'}", False
+
+
+class ArticleExtractor:
+    """Interface dos backends: `extract(url, html) -> (texto, extraído)`"""
+
+    name = "base"
+    available = True
+
+    def extract(self, url: str, html: bytes) -> Tuple[str, bool]:
+        raise NotImplementedError
+
+
+class BeautifulSoupExtractor(ArticleExtractor):
+    """Implementação original (html.parser puro Python)"""
+
+    name = "bs4"
+    available = BS4_AVAILABLE
+
+    def extract(self, url: str, html: bytes) -> Tuple[str, bool]:
+        soup = BeautifulSoup(html, 'html.parser')
+
+        for element in soup(list(REMOVED_TAGS)):
+            element.decompose()
+
+        content = ""
+        css_class = site_selector(url)
+        if css_class:
+            content_div = soup.find('div', class_=css_class)
+            if content_div:
+                content = content_div.get_text()
+
+        if not content.strip():
+            for tag in FALLBACK_TAGS:
+                element = soup.find(tag)
+                if element:
+                    content = element.get_text()
+                    break
+
+        title = soup.find('title')
+        return finish_article(content, title.get_text() if title else None)
+
+
+class LxmlExtractor(ArticleExtractor):
+    """Árvore lxml (libxml2) com os mesmos seletores em XPath"""
+
+    name = "lxml"
+    available = LXML_AVAILABLE
+
+    def parse(self, html: bytes):
+        """Árvore sem as tags removidas; UTF-8 primeiro, senão o charset declarado na página"""
+        try:
+            tree = lxml_html.fromstring(html.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError):
+            tree = lxml_html.fromstring(html)
+        # O texto depois da tag (tail) é irmão no DOM e fica, como no decompose()
+        etree.strip_elements(tree, *REMOVED_TAGS, with_tail=False)
+        return tree
+
+    def site_content(self, tree, url: str) -> str:
+        css_class = site_selector(url)
+        if css_class:
+            found = tree.xpath(
+                f'//div[contains(concat(" ", normalize-space(@class), " "), " {css_class} ")][1]'
+            )
+            if found:
+                return found[0].text_content()
+        return ""
+
+    def title(self, tree) -> Optional[str]:
+        found = tree.xpath('//title[1]')
+        return found[0].text_content() if found else None
+
+    def extract(self, url: str, html: bytes) -> Tuple[str, bool]:
+        tree = self.parse(html)
+        content = self.site_content(tree, url)
+        if not content.strip():
+            for tag in FALLBACK_TAGS:
+                found = tree.xpath(f'//{tag}[1]')
+                if found:
+                    content = found[0].text_content()
+                    break
+        return finish_article(content, self.title(tree))
+
+
+class SelectolaxExtractor(ArticleExtractor):
+    """Parser Lexbor (selectolax) com seletores CSS"""
+
+    name = "selectolax"
+    available = SELECTOLAX_AVAILABLE
+
+    def extract(self, url: str, html: bytes) -> Tuple[str, bool]:
+        tree = LexborHTMLParser(html)
+        for node in tree.css(', '.join(REMOVED_TAGS)):
+            node.decompose()
+
+        content = ""
+        css_class = site_selector(url)
+        if css_class:
+            node = tree.css_first(f'div.{css_class}')
+            if node is not None:
+                content = node.text(deep=True)
+
+        if not content.strip():
+            for tag in FALLBACK_TAGS:
+                node = tree.css_first(tag)
+                if node is not None:
+                    content = node.text(deep=True)
+                    break
+
+        title = tree.css_first('title')
+        return finish_article(content, title.text() if title is not None else None)
+
+
+class TrafilaturaExtractor(LxmlExtractor):
+    """Seletores por site via lxml; nos demais sites, extrator do trafilatura"""
+
+    name = "trafilatura"
+    available = LXML_AVAILABLE and TRAFILATURA_AVAILABLE
+
+    def extract(self, url: str, html: bytes) -> Tuple[str, bool]:
+        tree = self.parse(html)
+        content = self.site_content(tree, url)
+        if not content.strip():
+            content = trafilatura.extract(
+                html, url=url, include_comments=False, include_tables=False
+            ) or ""
+        return finish_article(content, self.title(tree))
+
+
+EXTRACTORS: Dict[str, Type[ArticleExtractor]] = {
+    extractor.name: extractor
+    for extractor in (BeautifulSoupExtractor, LxmlExtractor, SelectolaxExtractor, TrafilaturaExtractor)
+}
+
+
+def get_extractor(name: Optional[str] = None) -> ArticleExtractor:
+    """Backend pelo nome (padrão: `DDAI_NEWS_EXTRACTOR` ou lxml); indisponível = lxml, senão bs4"""
+    name = (name or os.getenv("DDAI_NEWS_EXTRACTOR") or "lxml").lower()
+    extractor = EXTRACTORS.get(name)
+    if extractor is None:
+        raise ValueError(f"Extrator desconhecido: {name} (opções: {', '.join(EXTRACTORS)})")
+    if extractor.available:
+        return extractor()
+
+    for fallback in (LxmlExtractor, BeautifulSoupExtractor):
+        if fallback.available:
+            logger.warning(f"⚠️ Extrator '{name}' indisponível (dependência não instalada). Usando {fallback.name}.")
+            return fallback()
+    raise ImportError("Nenhum extrator de notícias disponível: instale lxml ou beautifulsoup4")
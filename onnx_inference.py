@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+⚡ ONNX INFERENCE - Advanced DD-AI v2.1
+======================================
+
+Backend de inferência em CPU para o classificador de risco:
+- Exporta o modelo (base + LoRA já mesclados) para ONNX
+- Quantização dinâmica int8 (pesos das camadas lineares)
+- Execução via ONNX Runtime
+
+Servidores sem GPU não se beneficiam do QLoRA (requer CUDA); com int8
+dinâmico o custo de latência e memória em CPU cai para ~metade ou menos.
+
+O `ddai_onnx.json` registra a origem da exportação (modelo, versão do
+adapter e hash do checkpoint) e os arquivos por quantização; uma exportação
+de outra origem ou sem a quantização pedida não é reaproveitada.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+ONNX_FP32_FILENAME = "model.onnx"
+ONNX_INT8_FILENAME = "model.int8.onnx"
+ONNX_METADATA_FILENAME = "ddai_onnx.json"
+
+# Arquivos de pesos que identificam um checkpoint local
+_CHECKPOINT_WEIGHT_PATTERNS = ("*.safetensors", "pytorch_model*.bin")
+
+
+def checkpoint_hash(model_name: str) -> str:
+    """
+    Hash SHA-256 dos pesos do checkpoint de origem
+
+    Diretório local: conteúdo dos arquivos de pesos. Modelo do Hugging Face
+    Hub: o commit do snapshot em cache (o nome sozinho, se não estiver em cache).
+    """
+    directory = model_name
+    if not os.path.isdir(directory):
+        try:
+            from huggingface_hub import snapshot_download
+
+            directory = snapshot_download(model_name, local_files_only=True)
+        except Exception:
+            return f"hub:{model_name}"
+
+    digest = hashlib.sha256()
+    for pattern in _CHECKPOINT_WEIGHT_PATTERNS:
+        for path in sorted(glob.glob(os.path.join(directory, pattern))):
+            digest.update(os.path.basename(path).encode("utf-8"))
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def export_to_onnx(model: Any, tokenizer: Any, output_dir: str,
+                   quantize: bool = True, opset_version: int = 17,
+                   source: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Exporta um modelo de classificação para ONNX (e opcionalmente int8)
+
+    Args:
+        model: Modelo PyTorch sem adapters LoRA pendentes (merge já aplicado)
+        tokenizer: Tokenizer do modelo (salvo junto para carregar o backend depois)
+        output_dir: Diretório de saída
+        quantize: Aplicar quantização dinâmica int8
+        opset_version: Versão do opset ONNX
+        source: Origem do modelo (model_name, adapter_version, checkpoint_hash),
+            conferida por `find_exported_model`
+
+    Returns:
+        Caminho do arquivo .onnx que deve ser carregado
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, ONNX_FP32_FILENAME)
+
+    model = model.eval()
+    device = next(model.parameters()).device
+
+    # Entrada de exemplo apenas para traçar o grafo (eixos batch/sequência são dinâmicos)
+    sample = tokenizer(["texto de exemplo"], return_tensors="pt", padding=True).to(device)
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    logger.info(f"📦 Exportando modelo para ONNX: {fp32_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset_version,
+            dynamo=False
+        )
+
+    model_path = fp32_path
+    model_files = {"fp32": ONNX_FP32_FILENAME}
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        model_path = os.path.join(output_dir, ONNX_INT8_FILENAME)
+        logger.info(f"🔢 Aplicando quantização dinâmica int8: {model_path}")
+        quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+        model_files["int8"] = ONNX_INT8_FILENAME
+
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, ONNX_METADATA_FILENAME), "w", encoding="utf-8") as f:
+        json.dump({
+            "model_file": os.path.basename(model_path),
+            "model_files": model_files,
+            "quantized": quantize,
+            "source": source or {},
+            "input_names": input_names,
+            "opset_version": opset_version
+        }, f, indent=2)
+
+    logger.info("✅ Exportação ONNX concluída")
+    return model_path
+
+
+def find_exported_model(model_dir: str, quantize: Optional[bool] = None,
+                        source: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    Retorna o caminho do modelo ONNX já exportado em `model_dir`, se servir
+
+    Args:
+        model_dir: Diretório da exportação
+        quantize: Quantização pedida (None = a da última exportação)
+        source: Origem esperada; qualquer campo diferente do registrado
+            (ou ausente nele) invalida a exportação
+
+    Returns:
+        None se não há exportação, ela é de outra origem ou não tem a
+        quantização pedida (o chamador deve exportar de novo)
+    """
+    metadata_path = os.path.join(model_dir, ONNX_METADATA_FILENAME)
+    if not os.path.exists(metadata_path):
+        return None
+
+    with open(metadata_path, encoding="utf-8") as f:
+        metadata = json.load(f)
+
+    if source is not None:
+        exported_source = metadata.get("source") or {}
+        stale = [key for key, value in source.items() if exported_source.get(key) != value]
+        if stale:
+            logger.info(f"♻️ Exportação ONNX em {model_dir} desatualizada ({', '.join(stale)})")
+            return None
+
+    if quantize is None:
+        model_file = metadata["model_file"]
+    else:
+        model_file = metadata.get("model_files", {}).get("int8" if quantize else "fp32")
+        if model_file is None:
+            logger.info(f"♻️ Exportação ONNX em {model_dir} sem a versão {'int8' if quantize else 'fp32'}")
+            return None
+
+    model_path = os.path.join(model_dir, model_file)
+    return model_path if os.path.exists(model_path) else None
+
+
+class OnnxRiskClassifier:
+    """Sessão ONNX Runtime com interface de forward compatível com o caminho PyTorch"""
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.model_path = model_path
+        self.quantized = os.path.basename(model_path) == ONNX_INT8_FILENAME
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+        logger.info(f"✅ Sessão ONNX Runtime carregada: {model_path}")
+
+    def __call__(self, **inputs) -> torch.Tensor:
+        """Executa o modelo e retorna os logits como tensor (mesmo formato do PyTorch)"""
+        feed = {
+            name: _to_numpy(inputs[name]).astype(np.int64)
+            for name in self.input_names if name in inputs
+        }
+        logits = self.session.run(["logits"], feed)[0]
+        return torch.from_numpy(logits)
+
+    def get_info(self) -> Dict[str, Any]:
+        """Informações da sessão para auditoria"""
+        return {
+            "model_path": self.model_path,
+            "quantized": self.quantized,
+            "model_size_mb": round(os.path.getsize(self.model_path) / (1024 * 1024), 2),
+            "providers": self.session.get_providers(),
+            "inputs": self.input_names
+        }
+
+
+def _to_numpy(value: Any) -> np.ndarray:
+    if isinstance(value, torch.Tensor):
+        return value.detach().cpu().numpy()
+    return np.asarray(value)
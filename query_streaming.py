@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+📡 QUERY STREAMING - Advanced DD-AI v2.1
+========================================
+
+Leitura incremental de resultados SQL com `cursor.fetchmany(n)`.
+
+A query é executada antes de a resposta começar (erros de SQL ainda viram
+HTTP 400) e a conexão do pool fica retida até o último bloco ser lido ou o
+cliente desconectar. Cada bloco é serializado e descartado em seguida, então
+a memória do servidor fica limitada a `chunk_size` linhas, qualquer que seja
+o tamanho do resultado.
+
+Formato NDJSON (`application/x-ndjson`), uma mensagem JSON por linha:
+    {"type": "columns", "columns": [...]}
+    {"type": "rows", "rows": [{...}, ...]}      (um por bloco)
+    {"type": "end", "row_count": N}
+    {"type": "error", "message": "..."}         (falha no meio da leitura)
+"""
+
+import json
+import logging
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import pyodbc
+from fastapi.encoders import jsonable_encoder
+
+from db_pool import ConnectionPool, is_connection_error
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+DEFAULT_CHUNK_ROWS = 500
+
+
+class StreamedQuery:
+    """Query em execução com cursor aberto sobre uma conexão emprestada do pool"""
+
+    def __init__(self, pool: ConnectionPool, query: str,
+                 timeout: Optional[float] = None, chunk_size: int = DEFAULT_CHUNK_ROWS):
+        """
+        Executa a query; exceções de conexão/SQL são propagadas antes do streaming
+
+        Args:
+            pool: Pool da string de conexão
+            query: SQL a executar
+            timeout: Timeout de login para uma conexão nova (s)
+            chunk_size: Linhas por `fetchmany`
+        """
+        self.pool = pool
+        self.chunk_size = max(1, chunk_size)
+        self.row_count = 0
+        self.columns: Optional[List[str]] = None
+        self.description: Optional[List[Sequence[Any]]] = None
+        self.affected_rows: Optional[int] = None
+
+        self._lock = threading.Lock()
+        self._pooled = pool.acquire(timeout)
+        try:
+            self.cursor = self._pooled.raw.cursor()
+            self.cursor.execute(query)
+            if self.cursor.description:
+                self.description = list(self.cursor.description)
+                self.columns = [desc[0] for desc in self.description]
+            else:
+                # INSERT, UPDATE, DELETE...: nada para transmitir
+                self._pooled.raw.commit()
+                self.affected_rows = self.cursor.rowcount
+                self.close()
+        except pyodbc.Error as e:
+            self.close(discard=is_connection_error(e))
+            raise
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def exhausted(self) -> bool:
+        """Cursor esgotado ou fechado (a conexão já voltou ao pool)"""
+        return self._pooled is None
+
+    def fetch_page(self, size: Optional[int] = None) -> List[Sequence[Any]]:
+        """Próximas `size` linhas; ao esgotar o cursor a conexão volta ao pool"""
+        if self.exhausted:
+            return []
+        size = max(1, size or self.chunk_size)
+        try:
+            rows = self.cursor.fetchmany(size)
+        except pyodbc.Error as e:
+            self.close(discard=is_connection_error(e))
+            raise
+        except BaseException:
+            self.close()
+            raise
+        self.row_count += len(rows)
+        if len(rows) < size:
+            self.close()
+        return rows
+
+    def iter_chunks(self) -> Iterator[List[Sequence[Any]]]:
+        """Blocos de até `chunk_size` linhas; a conexão volta ao pool ao final"""
+        try:
+            while not self.exhausted:
+                rows = self.fetch_page()
+                if rows:
+                    yield rows
+        finally:
+            self.close()
+
+    def close(self, discard: bool = False):
+        """Devolve a conexão ao pool (idempotente)"""
+        with self._lock:
+            pooled, self._pooled = self._pooled, None
+        if pooled is not None:
+            try:
+                self.cursor.close()
+            except Exception:
+                pass
+            self.pool.release(pooled, discard=discard)
+
+
+def _ndjson(message: Dict[str, Any]) -> bytes:
+    return (json.dumps(jsonable_encoder(message), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def ndjson_stream(streamed: StreamedQuery) -> Iterator[bytes]:
+    """Serializa o resultado em NDJSON à medida que os blocos são lidos"""
+    if streamed.columns is None:
+        yield _ndjson({
+            "type": "end",
+            "row_count": 0,
+            "message": f"Query executada com sucesso. {streamed.affected_rows} linhas afetadas."
+        })
+        return
+
+    columns = streamed.columns
+    try:
+        yield _ndjson({"type": "columns", "columns": columns})
+        for rows in streamed.iter_chunks():
+            yield _ndjson({"type": "rows", "rows": [dict(zip(columns, row)) for row in rows]})
+        yield _ndjson({"type": "end", "row_count": streamed.row_count})
+    except Exception as e:
+        # O status HTTP já foi enviado: o erro vai como última mensagem
+        logger.error(f"❌ Erro durante o streaming da query: {e}")
+        yield _ndjson({"type": "error", "message": str(e), "row_count": streamed.row_count})
+    finally:
+        streamed.close()
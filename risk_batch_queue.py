@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+📦 RISK BATCH QUEUE - Advanced DD-AI v2.1
+=========================================
+
+Camada assíncrona de micro-batching na frente do modelo de risco.
+
+Requisições que chegam dentro de uma janela curta (ex.: 5-20 ms) ou até
+atingir `max_batch_size` itens são agrupadas em um único forward pass
+(`AdvancedFinancialBERT.analyze_risk_batch`) e os resultados são
+devolvidos a cada chamador que estava aguardando.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class RiskBatchQueue:
+    """
+    Fila de micro-batching para análise de risco
+
+    Uso:
+        queue = RiskBatchQueue(advanced_bert_model, max_batch_size=32, max_wait_ms=10)
+        result = await queue.submit(texto, include_explanation=True)
+    """
+
+    def __init__(self,
+                 model: Any,
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 10.0,
+                 executor: Optional[Executor] = None):
+        """
+        Args:
+            model: Instância com `analyze_risk_batch(texts, batch_size, include_explanation,
+                long_document, pooling)`
+            max_batch_size: Máximo de itens por forward pass
+            max_wait_ms: Janela de espera (ms) após o primeiro item do lote
+            executor: Executor onde o modelo roda (None = executor padrão do loop)
+        """
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight = 0
+
+        # Métricas
+        self._batch_size_histogram: Counter = Counter()
+        self._total_requests = 0
+        self._total_batched_items = 0
+        self._total_batches = 0
+        self._max_depth = 0
+        self._total_wait = 0.0
+
+    async def submit(self, text: str, include_explanation: bool = True,
+                     long_document: bool = False, pooling: str = "max") -> Any:
+        """Enfileira um texto e aguarda o resultado do lote em que ele entrar"""
+        self._ensure_worker()
+
+        future = asyncio.get_running_loop().create_future()
+        options = (include_explanation, long_document, pooling)
+        await self._queue.put((text, options, future, time.perf_counter()))
+
+        self._total_requests += 1
+        self._max_depth = max(self._max_depth, self._queue.qsize())
+
+        return await future
+
+    def _ensure_worker(self):
+        """Inicia o worker no loop corrente na primeira requisição"""
+        if self._worker is None or self._worker.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+            logger.info(
+                f"📦 Fila de micro-batching iniciada "
+                f"(max_batch_size={self.max_batch_size}, janela={self.max_wait * 1000:.0f}ms)"
+            )
+
+    async def stop(self):
+        """Encerra o worker (chamar no shutdown da aplicação)"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _collect_batch(self) -> List[Tuple[str, Tuple[bool, bool, str], asyncio.Future, float]]:
+        """Aguarda o primeiro item e coleta os demais até encher o lote ou fechar a janela"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                # Janela fechada: aproveitar apenas o que já está na fila
+                while len(batch) < self.max_batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        """Loop principal: coleta lotes e executa um forward pass por lote"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect_batch()
+            # Chamadores que desistiram (ex.: cliente desconectou) não entram no lote
+            batch = [item for item in batch if not item[2].done()]
+            if not batch:
+                continue
+
+            self._in_flight = len(batch)
+            self._total_batches += 1
+            self._total_batched_items += len(batch)
+            self._batch_size_histogram[len(batch)] += 1
+            started = time.perf_counter()
+            self._total_wait += sum(started - enqueued for _, _, _, enqueued in batch)
+
+            # Agrupar por opções da requisição para manter a semântica de cada chamador
+            groups: Dict[Tuple[bool, bool, str], List[Tuple[str, asyncio.Future]]] = {}
+            for text, options, future, _ in batch:
+                groups.setdefault(options, []).append((text, future))
+
+            for (include_explanation, long_document, pooling), items in groups.items():
+                texts = [text for text, _ in items]
+                try:
+                    results = await loop.run_in_executor(
+                        self.executor,
+                        lambda: self.model.analyze_risk_batch(
+                            texts,
+                            batch_size=self.max_batch_size,
+                            include_explanation=include_explanation,
+                            long_document=long_document,
+                            pooling=pooling
+                        )
+                    )
+                except Exception as e:
+                    logger.error(f"❌ Erro no lote de análise de risco: {e}")
+                    for _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                for (_, future), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+
+            self._in_flight = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Profundidade da fila e histograma de tamanhos de lote"""
+        depth = self._queue.qsize() if self._queue is not None else 0
+        return {
+            "running": self._worker is not None and not self._worker.done(),
+            "queue_depth": depth,
+            "in_flight": self._in_flight,
+            "max_queue_depth": self._max_depth,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "total_requests": self._total_requests,
+            "total_batches": self._total_batches,
+            "avg_batch_size": self._total_batched_items / self._total_batches if self._total_batches else 0.0,
+            "avg_queue_wait_ms": (self._total_wait / self._total_batched_items * 1000) if self._total_batched_items else 0.0,
+            "batch_size_histogram": {
+                str(size): count for size, count in sorted(self._batch_size_histogram.items())
+            },
+        }
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+🗄️ RISK RESULT CACHE - Advanced DD-AI v2.1
+==========================================
+
+Cache endereçado por conteúdo para as predições do modelo de risco.
+
+A chave é o hash do texto pré-processado + nome do modelo + versão do
+adapter (+ opções que alteram a predição). Dois níveis:
+- Memória: LRU limitado por número de entradas
+- Disco: diskcache com TTL e limite de tamanho (eviction LRU)
+
+Apenas a saída do modelo (classe e confiança) é armazenada; regras de
+compliance e explicação continuam sendo calculadas sobre o texto original.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class RiskResultCache:
+    """Cache em dois níveis (memória LRU + disco) para predições de risco"""
+
+    def __init__(self,
+                 directory: Optional[str] = "cache/risk_results",
+                 memory_max_entries: int = 2048,
+                 ttl_seconds: float = 7 * 24 * 3600,
+                 disk_size_limit_mb: int = 512):
+        """
+        Args:
+            directory: Diretório do nível em disco (None = somente memória)
+            memory_max_entries: Máximo de entradas no LRU em memória
+            ttl_seconds: Validade de cada entrada (memória e disco)
+            disk_size_limit_mb: Tamanho máximo do nível em disco
+        """
+        self.memory_max_entries = max(1, memory_max_entries)
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._memory_hits = 0
+        self._disk_hits = 0
+
+        self._disk = None
+        if directory and DISKCACHE_AVAILABLE:
+            self._disk = diskcache.Cache(
+                directory,
+                size_limit=disk_size_limit_mb * 1024 * 1024,
+                eviction_policy="least-recently-used"
+            )
+        elif directory:
+            logger.warning("⚠️ diskcache não instalado. Cache de resultados apenas em memória.")
+
+    @staticmethod
+    def make_key(processed_text: str, model_name: str, adapter_version: str, **options: Any) -> str:
+        """Chave determinística: hash do texto pré-processado, modelo, adapter e opções"""
+        digest = hashlib.sha256()
+        for part in (model_name, adapter_version, repr(sorted(options.items())), processed_text):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Busca no LRU em memória e depois no disco (promovendo para a memória)"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._hits += 1
+                    self._memory_hits += 1
+                    return value
+                del self._memory[key]
+
+        value, expires_at = None, None
+        if self._disk is not None:
+            value, expires_at = self._disk.get(key, expire_time=True)
+
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._disk_hits += 1
+            # Na memória, a entrada vence junto com a do disco (sem renovar o TTL)
+            self._store_memory(key, value, expires_at or now + self.ttl_seconds)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Grava nos dois níveis"""
+        with self._lock:
+            self._store_memory(key, value, time.time() + self.ttl_seconds)
+        if self._disk is not None:
+            self._disk.set(key, value, expire=self.ttl_seconds)
+
+    def _store_memory(self, key: str, value: Dict[str, Any], expires_at: float):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        """Remove todas as entradas e zera as estatísticas"""
+        with self._lock:
+            self._memory.clear()
+            self._hits = self._misses = self._memory_hits = self._disk_hits = 0
+        if self._disk is not None:
+            self._disk.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas no formato `CacheStats` do frontend (+ detalhes por nível)"""
+        with self._lock:
+            hits, misses = self._hits, self._misses
+            memory_entries = len(self._memory)
+            memory_hits, disk_hits = self._memory_hits, self._disk_hits
+
+        disk_entries = len(self._disk) if self._disk is not None else 0
+        size_bytes = self._disk.volume() if self._disk is not None else 0
+        total = hits + misses
+
+        return {
+            "total_entries": max(disk_entries, memory_entries),
+            "cache_hits": hits,
+            "cache_misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "size_mb": round(size_bytes / (1024 * 1024), 3),
+            "memory_entries": memory_entries,
+            "memory_hits": memory_hits,
+            "disk_hits": disk_hits
+        }
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+🔀 SINGLE FLIGHT - Advanced DD-AI v2.1
+======================================
+
+Coalescência de chamadas concorrentes: workers que pedem a mesma chave
+(CNPJ, nome da empresa...) enquanto a primeira chamada ainda está em
+andamento aguardam o mesmo future em vez de repetir o enriquecimento, a
+busca de notícias ou a análise de risco.
+"""
+
+import copy
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Mapa de chamadas em andamento por chave (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Executa `fn` uma vez por chave em andamento; chamadas simultâneas com a
+        mesma chave recebem uma cópia do mesmo resultado (ou a mesma exceção)
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            # Cópia para que quem aguardou não altere o resultado do outro chamador
+            return copy.deepcopy(future.result())
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'executed': self.executed, 'shared': self.shared, 'in_flight': len(self._calls)}
@@ -23,11 +23,15 @@ import re
 import time
 import pyodbc
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass, asdict
 from enum import Enum
 import concurrent.futures
 
+from cnpj_enrichment import COMPANY_PROFILE_FIELDS, get_enrichment_service
+from cnpj_utils import canonical_cnpj, is_valid_cnpj
+from single_flight import SingleFlight
+
 class AnalysisStrategy(Enum):
     AUTO_DETECT = "auto_detect"
     CNPJ_ONLY = "cnpj_only"
@@ -90,6 +94,9 @@ class SmartBatchAnalyzer:
             'sociedade', 'empresa', 'companhia', 'corp', 'fundo',
             'gestora', 'asset', 'investimentos', 'participações'
         ]
+        
+        # Workers simultâneos com o mesmo CNPJ/empresa compartilham a mesma chamada
+        self.inflight = SingleFlight()
     
     def detect_data_type(self, value: str) -> Tuple[DataType, float]:
         """
@@ -103,9 +110,8 @@ class SmartBatchAnalyzer:
         # Verificar CNPJ
         cnpj_matches = self.cnpj_pattern.findall(value)
         if cnpj_matches:
-            # Validar se é um CNPJ válido (14 dígitos)
-            clean_cnpj = re.sub(r'[^\d]', '', cnpj_matches[0])
-            if len(clean_cnpj) == 14:
+            # Validar se é um CNPJ válido (dígitos verificadores)
+            if is_valid_cnpj(cnpj_matches[0]):
                 return DataType.CNPJ, 0.95
         
         # Verificar indicadores de nome de empresa
@@ -160,7 +166,8 @@ class SmartBatchAnalyzer:
                 name_value = item.get(name_col, '')
                 
                 # Determinar dados disponíveis
-                has_cnpj = bool(cnpj_value and self.cnpj_pattern.match(str(cnpj_value)))
+                has_cnpj = bool(cnpj_value and self.cnpj_pattern.match(str(cnpj_value))
+                                and is_valid_cnpj(cnpj_value))
                 has_name = bool(name_value and len(str(name_value).strip()) > 3)
                 
                 if has_cnpj and has_name:
@@ -187,7 +194,23 @@ class SmartBatchAnalyzer:
                 
                 parsed_items.append(parsed_item)
         
-        return parsed_items
+        # Remover duplicatas: mesmo CNPJ canônico (ou mesmo nome, sem CNPJ)
+        unique_items = {}
+        for parsed_item in parsed_items:
+            unique_items.setdefault(self._item_key(parsed_item), parsed_item)
+        
+        if len(unique_items) < len(parsed_items):
+            print(f"🔁 {len(parsed_items) - len(unique_items)} items duplicados ignorados")
+        
+        return list(unique_items.values())
+    
+    def _item_key(self, data_item: DataItem) -> Tuple[str, str]:
+        """Chave de deduplicação/coalescência de um item"""
+        if data_item.cnpj:
+            return ('cnpj', canonical_cnpj(data_item.cnpj) or data_item.cnpj)
+        if data_item.company_name:
+            return ('name', ' '.join(data_item.company_name.lower().split()))
+        return ('raw', data_item.original_value)
     
     def choose_analysis_strategy(self, data_items: List[DataItem], 
                                requested_strategy: AnalysisStrategy) -> Dict[str, List[DataItem]]:
@@ -246,13 +269,10 @@ class SmartBatchAnalyzer:
         Enriquece dados da empresa via API Brasil
         """
         try:
-            clean_cnpj = re.sub(r'[^\d]', '', cnpj)
-            url = f"https://brasilapi.com.br/api/cnpj/v1/{clean_cnpj}"
-            
-            response = self.session.get(url, timeout=10)
+            result = get_enrichment_service().lookup(cnpj, fields=COMPANY_PROFILE_FIELDS)
             
-            if response.status_code == 200:
-                data = response.json()
+            if result.success:
+                data = result.data
                 return {
                     'success': True,
                     'source': 'api_brasil',
@@ -273,7 +293,7 @@ class SmartBatchAnalyzer:
                     'success': False,
                     'source': 'api_brasil',
                     'cnpj': cnpj,
-                    'error': f'API Brasil retornou {response.status_code}'
+                    'error': result.error
                 }
                 
         except Exception as e:
@@ -292,11 +312,12 @@ class SmartBatchAnalyzer:
             from enhanced_news_monitor import EnhancedNewsMonitor
             
             monitor = EnhancedNewsMonitor(self.api_base_url)
-            news_data = monitor.search_google_news(company_name, days_back)
+            # Feeds e artigos baixados em paralelo (até 5 artigos)
+            articles = monitor.search_news_articles(company_name, days_back, budget=5)
             
             processed_news = []
-            for news_item in news_data[:5]:
-                content = monitor.extract_news_content(news_item.get('link', ''))
+            for article in articles:
+                news_item, content = article.news, article.content
                 
                 processed_news.append({
                     'title': news_item.get('title', ''),
@@ -304,6 +325,7 @@ class SmartBatchAnalyzer:
                     'source': news_item.get('source', ''),
                     'date': news_item.get('pubDate', ''),
                     'content': content[:500] + "..." if len(content) > 500 else content,
+                    'coverage': news_item.get('cluster_size', 1),
                     'relevance': self._calculate_relevance(news_item.get('title', ''), company_name)
                 })
             
@@ -437,6 +459,10 @@ class SmartBatchAnalyzer:
                 'error': str(e)
             }
     
+    def _enrich_shared(self, cnpj: str) -> Dict:
+        """Enriquecimento coalescido por CNPJ canônico"""
+        return self.inflight.do(('enrich', canonical_cnpj(cnpj) or cnpj), self.enrich_company_data, cnpj)
+    
     def process_single_item(self, data_item: DataItem, strategy: str) -> SmartAnalysisResult:
         """
         Processa um único item de dados
@@ -453,7 +479,7 @@ class SmartBatchAnalyzer:
         # Executar estratégia apropriada
         if strategy == 'cnpj_enrichment':
             # Enriquecer via CNPJ
-            enrichment_data = self.enrich_company_data(data_item.cnpj)
+            enrichment_data = self._enrich_shared(data_item.cnpj)
             if enrichment_data.get('success'):
                 company_name_used = enrichment_data.get('razao_social', '')
             else:
@@ -472,7 +498,7 @@ class SmartBatchAnalyzer:
         
         elif strategy == 'hybrid_analysis':
             # Enriquecer CNPJ + validar com nome
-            enrichment_data = self.enrich_company_data(data_item.cnpj)
+            enrichment_data = self._enrich_shared(data_item.cnpj)
             if enrichment_data.get('success'):
                 company_name_used = enrichment_data.get('razao_social', '')
                 # Verificar se nome bate (opcional)
@@ -491,12 +517,18 @@ class SmartBatchAnalyzer:
         # Buscar notícias
         news_data = []
         if company_name_used:
-            news_data = self.search_company_news(company_name_used)
+            news_data = self.inflight.do(
+                ('news', ' '.join(company_name_used.lower().split())),
+                self.search_company_news, company_name_used
+            )
             if not news_data:
                 errors.append("Nenhuma notícia encontrada")
         
         # Análise de risco
-        risk_data = self.analyze_company_risk(enrichment_data, news_data, strategy)
+        risk_data = self.inflight.do(
+            ('risk', strategy, self._item_key(data_item)),
+            self.analyze_company_risk, enrichment_data, news_data, strategy
+        )
         if not risk_data.get('success'):
             errors.append(f"Análise de risco falhou: {risk_data.get('error', '')}")
         
@@ -514,9 +546,15 @@ class SmartBatchAnalyzer:
             errors=errors
         )
     
-    def process_smart_batch(self, request: SmartBatchRequest) -> Dict:
+    def process_smart_batch(self, request: SmartBatchRequest,
+                            progress_callback: Optional[Callable[[Dict, int], None]] = None) -> Dict:
         """
         Processa lote inteligente de dados
+        
+        Args:
+            request: Lote a processar
+            progress_callback: Chamado a cada item concluído com
+                (resultado do item, total de itens) - ex.: `JobProgress.item`
         """
         print(f"🧠 INICIANDO ANÁLISE INTELIGENTE EM LOTE")
         print(f"📊 Items para processar: {len(request.data_items)}")
@@ -530,6 +568,7 @@ class SmartBatchAnalyzer:
         
         # 2. Escolher estratégia de análise
         strategy_groups = self.choose_analysis_strategy(parsed_items, request.analysis_strategy)
+        total_items = sum(len(items) for items in strategy_groups.values())
         
         print(f"📋 Distribuição por estratégia:")
         for strategy, items in strategy_groups.items():
@@ -551,6 +590,8 @@ class SmartBatchAnalyzer:
                 for future in concurrent.futures.as_completed(futures):
                     result = future.result()
                     all_results.append(result)
+                    if progress_callback:
+                        progress_callback(asdict(result), total_items)
         
         # Processar busca direta por nome
         if strategy_groups['direct_name_search']:
@@ -564,6 +605,8 @@ class SmartBatchAnalyzer:
                 for future in concurrent.futures.as_completed(futures):
                     result = future.result()
                     all_results.append(result)
+                    if progress_callback:
+                        progress_callback(asdict(result), total_items)
         
         # Processar análise híbrida
         if strategy_groups['hybrid_analysis']:
@@ -577,6 +620,8 @@ class SmartBatchAnalyzer:
                 for future in concurrent.futures.as_completed(futures):
                     result = future.result()
                     all_results.append(result)
+                    if progress_callback:
+                        progress_callback(asdict(result), total_items)
         
         total_time = time.time() - start_time
         
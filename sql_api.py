@@ -1,12 +1,26 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-import pyodbc
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 import uvicorn
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Literal
 import traceback
-import asyncio
 import threading
+import os
+
+from arrow_results import ARROW_STREAM_MEDIA_TYPE, accepts_arrow, arrow_stream
+from blocking_executors import ExecutorSaturatedError, get_batch_executor, get_db_executor, get_model_executor
+from cnpj_columns import columns_from_rows, first_cnpj_per_row
+from cnpj_enrichment import COMPANY_SUMMARY_FIELDS, get_enrichment_service
+from cursor_sessions import CursorPage, SessionLimitError, SessionNotFoundError, get_cursor_sessions
+from db_pool import get_connection_pool
+from http_cache import get_http_cache
+from job_manager import SSE_MEDIA_TYPE, JobProgress, format_sse, get_job_manager
+from api_batch_extension import add_smart_batch_endpoints
+from query_streaming import NDJSON_MEDIA_TYPE, StreamedQuery, ndjson_stream
+from risk_batch_queue import RiskBatchQueue
+from risk_cache import RiskResultCache
 
 # Import Advanced DD-AI v2.1
 try:
@@ -48,11 +62,20 @@ class ConnectionDetails(BaseModel):
 class QueryRequest(BaseModel):
     connection: ConnectionDetails
     query: str
+    # Paginação por cursor: devolve a primeira página e um token para as seguintes
+    page_size: Optional[int] = None
+
+class QueryPageRequest(BaseModel):
+    cursor: str
+    page_size: Optional[int] = None
 
 # NOVO: Modelos para análise avançada de risco
 class RiskAnalysisRequest(BaseModel):
     text: str
     include_explanation: bool = True
+    # Documento longo: janelas deslizantes de tokens em vez de truncar em 512
+    long_document: bool = False
+    window_pooling: Literal["max", "mean"] = "max"
     connection: Optional[ConnectionDetails] = None
 
 class RiskAnalysisResponse(BaseModel):
@@ -68,17 +91,88 @@ class RiskAnalysisResponse(BaseModel):
     
 # --- INICIALIZAÇÃO GLOBAL ---
 
+# Cache de resultados por conteúdo (memória LRU + disco com TTL)
+risk_result_cache = RiskResultCache(
+    directory=os.getenv("DDAI_RESULT_CACHE_DIR", "cache/risk_results"),
+    memory_max_entries=int(os.getenv("DDAI_RESULT_CACHE_MEMORY_ENTRIES", "2048")),
+    ttl_seconds=float(os.getenv("DDAI_RESULT_CACHE_TTL_HOURS", "168")) * 3600,
+    disk_size_limit_mb=int(os.getenv("DDAI_RESULT_CACHE_SIZE_MB", "512"))
+)
+
 # Inicializar modelo avançado DD-AI v2.1
 advanced_bert_model = None
 if ADVANCED_AI_AVAILABLE:
     try:
         print("🚀 Inicializando Advanced DD-AI v2.1...")
-        advanced_bert_model = AdvancedFinancialBERT(use_qlora=True)
+        # Backend de inferência: "torch" (padrão) ou "onnx" (ONNX Runtime int8 em CPU)
+        advanced_bert_model = AdvancedFinancialBERT(
+            use_qlora=True,
+            inference_only=True,
+            inference_backend=os.getenv("DDAI_INFERENCE_BACKEND", "torch"),
+            onnx_model_dir=os.getenv("DDAI_ONNX_MODEL_DIR"),
+            result_cache=risk_result_cache
+        )
         print("✅ Advanced DD-AI v2.1 inicializado com sucesso!")
     except Exception as e:
         print(f"⚠️ Erro ao inicializar Advanced AI: {e}")
         advanced_bert_model = None
 
+# Fila de micro-batching na frente do modelo: agrupa requisições concorrentes
+# de /api/analyze-risk que chegam dentro da janela em um único forward pass
+RISK_BATCH_MAX_SIZE = int(os.getenv("DDAI_RISK_BATCH_MAX_SIZE", "32"))
+RISK_BATCH_WINDOW_MS = float(os.getenv("DDAI_RISK_BATCH_WINDOW_MS", "10"))
+
+# Trabalho bloqueante fora do event loop, com limites separados: pyodbc no
+# pool de banco, inferência no pool do modelo (uma query lenta não trava as
+# demais requisições nem disputa threads com /api/analyze-risk)
+db_executor = get_db_executor()
+model_executor = get_model_executor()
+batch_executor = get_batch_executor()
+
+@app.on_event("shutdown")
+async def stop_blocking_executors():
+    db_executor.shutdown()
+    model_executor.shutdown()
+    batch_executor.shutdown()
+
+risk_batch_queue = None
+if advanced_bert_model is not None:
+    risk_batch_queue = RiskBatchQueue(
+        advanced_bert_model,
+        max_batch_size=RISK_BATCH_MAX_SIZE,
+        max_wait_ms=RISK_BATCH_WINDOW_MS,
+        executor=model_executor.executor
+    )
+
+@app.on_event("shutdown")
+async def stop_risk_batch_queue():
+    if risk_batch_queue is not None:
+        await risk_batch_queue.stop()
+
+# Pool de conexões SQL Server compartilhado (um pool por string de conexão)
+db_pool = get_connection_pool()
+
+@app.on_event("shutdown")
+async def close_db_pool():
+    db_pool.close_all()
+
+# Linhas por bloco no streaming de /api/execute-query
+QUERY_STREAM_CHUNK_ROWS = int(os.getenv("DDAI_QUERY_STREAM_CHUNK_ROWS", "500"))
+
+# Cursores paginados de /api/execute-query (cada um retém uma conexão do pool)
+query_cursors = get_cursor_sessions()
+
+@app.on_event("shutdown")
+async def close_query_cursors():
+    query_cursors.close_all()
+
+# Jobs de análise em segundo plano (persistidos em SQLite, progresso por SSE)
+job_manager = get_job_manager()
+
+@app.on_event("shutdown")
+async def stop_jobs():
+    await job_manager.shutdown()
+
 # --- FUNÇÕES AUXILIARES ---
 
 # NOVO: Função centralizada para criar a string de conexão de forma segura
@@ -94,6 +188,45 @@ def get_db_connection_string(details: ConnectionDetails) -> str:
         raise ValueError("Para autenticação SQL, username e password são obrigatórios.")
     return conn_str
 
+# Funções síncronas (pyodbc): chamadas apenas via `db_executor.run`
+
+def _test_connection_sync(conn_str: str):
+    # Timeout baixo para testes rápidos
+    with db_pool.connection(conn_str, timeout=5) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT @@VERSION, DB_NAME()")
+        return cursor.fetchone()
+
+def _run_query_sync(conn_str: str, query: str, timeout: Optional[float] = 20):
+    """Executa a query; retorna (columns, rows, affected_rows), com columns=None se não for SELECT"""
+    with db_pool.connection(conn_str, timeout=timeout) as conn:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        
+        if cursor.description:
+            columns = [desc[0] for desc in cursor.description]
+            return columns, cursor.fetchall(), None
+        # INSERT, UPDATE, DELETE, etc.
+        conn.commit()
+        return None, [], cursor.rowcount
+
+def _list_tables_sync(conn_str: str) -> List[str]:
+    with db_pool.connection(conn_str, timeout=5) as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT TABLE_SCHEMA, TABLE_NAME 
+            FROM INFORMATION_SCHEMA.TABLES 
+            WHERE TABLE_TYPE = 'BASE TABLE'
+            ORDER BY TABLE_SCHEMA, TABLE_NAME
+        """)
+        
+        # Retorna no formato "schema.tabela"
+        return [f"{row.TABLE_SCHEMA}.{row.TABLE_NAME}" for row in cursor.fetchall()]
+
+def _executor_saturated(e: ExecutorSaturatedError) -> HTTPException:
+    return HTTPException(status_code=503, detail=f"Servidor ocupado, tente novamente em instantes: {e}")
+
 # --- ENDPOINTS ---
 
 @app.get("/")
@@ -110,12 +243,7 @@ async def test_connection(request: ConnectionDetails):
     """Endpoint para testar a conexão com o SQL Server."""
     try:
         conn_str = get_db_connection_string(request)
-        # Timeout baixo para testes rápidos
-        conn = pyodbc.connect(conn_str, timeout=5)
-        cursor = conn.cursor()
-        cursor.execute("SELECT @@VERSION, DB_NAME()")
-        result = cursor.fetchone()
-        conn.close()
+        result = await db_executor.run(_test_connection_sync, conn_str)
         
         return {
             "success": True,
@@ -123,6 +251,8 @@ async def test_connection(request: ConnectionDetails):
             "server_version": result[0].split(' - ')[0] if result else "Unknown",
             "database": result[1] if result else "Unknown"
         }
+    except ExecutorSaturatedError as e:
+        raise _executor_saturated(e)
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(
@@ -132,21 +262,56 @@ async def test_connection(request: ConnectionDetails):
 
 # ALTERADO: Endpoint para executar query. Recebe a query e a conexão.
 @app.post("/api/execute-query")
-async def execute_query(request: QueryRequest):
-    """Endpoint para executar queries SQL. ATENÇÃO: Risco de SQL Injection."""
+async def execute_query(request: QueryRequest, http_request: Request):
+    """
+    Endpoint para executar queries SQL. ATENÇÃO: Risco de SQL Injection.
+    
+    Com `Accept: application/x-ndjson` o resultado é transmitido em blocos
+    (`fetchmany`) em vez de montado inteiro em memória; com
+    `Accept: application/vnd.apache.arrow.stream`, em record batches Arrow.
+    Com `page_size`, devolve só a primeira página e um `cursor` para
+    `/api/execute-query/next`.
+    """
     try:
         conn_str = get_db_connection_string(request.connection)
-        conn = pyodbc.connect(conn_str, timeout=20)
-        cursor = conn.cursor()
         
-        cursor.execute(request.query)
+        if request.page_size:
+            page = await db_executor.run(
+                query_cursors.open, db_pool.get_pool(conn_str), request.query,
+                page_size=request.page_size, timeout=20
+            )
+            return _query_page_response(page)
+        
+        accept = http_request.headers.get("accept", "")
+        want_arrow = accepts_arrow(accept)
+        if want_arrow or NDJSON_MEDIA_TYPE in accept:
+            streamed = await db_executor.run(
+                StreamedQuery, db_pool.get_pool(conn_str), request.query,
+                timeout=20, chunk_size=QUERY_STREAM_CHUNK_ROWS
+            )
+            if want_arrow:
+                if streamed.columns is None:
+                    return {
+                        "success": True,
+                        "message": f"Query executada com sucesso. {streamed.affected_rows} linhas afetadas."
+                    }
+                body, media_type = arrow_stream(streamed), ARROW_STREAM_MEDIA_TYPE
+            else:
+                body, media_type = ndjson_stream(streamed), NDJSON_MEDIA_TYPE
+            # Cada `fetchmany` roda no pool de banco. A conexão volta ao pool ao fim
+            # do streaming; a tarefa de fundo cobre o caso de o cliente desconectar
+            # antes do primeiro bloco
+            return StreamingResponse(
+                db_executor.iterate(body),
+                media_type=media_type,
+                background=BackgroundTask(streamed.close)
+            )
+        
+        columns, rows, affected_rows = await db_executor.run(_run_query_sync, conn_str, request.query)
         
         # Se a query for um SELECT, retorna os dados
-        if cursor.description:
-            columns = [desc[0] for desc in cursor.description]
-            rows = cursor.fetchall()
+        if columns is not None:
             data = [dict(zip(columns, row)) for row in rows]
-            conn.close()
             return {
                 "success": True,
                 "columns": columns,
@@ -155,13 +320,14 @@ async def execute_query(request: QueryRequest):
             }
         # Se for INSERT, UPDATE, DELETE, etc.
         else:
-            conn.commit()
-            affected_rows = cursor.rowcount
-            conn.close()
             return {
                 "success": True,
                 "message": f"Query executada com sucesso. {affected_rows} linhas afetadas."
             }
+    except SessionLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ExecutorSaturatedError as e:
+        raise _executor_saturated(e)
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(
@@ -169,27 +335,61 @@ async def execute_query(request: QueryRequest):
             detail=f"Erro ao executar a query: {str(e)}"
         )
 
+def _query_page_response(page: CursorPage) -> Dict[str, Any]:
+    """Página de um cursor no mesmo formato do resultado completo, mais `cursor`/`has_more`"""
+    if not page.columns:
+        return {
+            "success": True,
+            "message": f"Query executada com sucesso. {page.affected_rows} linhas afetadas.",
+            "cursor": None,
+            "has_more": False
+        }
+    return {
+        "success": True,
+        "columns": page.columns,
+        "data": [dict(zip(page.columns, row)) for row in page.rows],
+        "row_count": len(page.rows),
+        "rows_read": page.rows_read,
+        "cursor": page.cursor,
+        "has_more": page.has_more
+    }
+
+@app.post("/api/execute-query/next")
+async def execute_query_next(request: QueryPageRequest):
+    """Próxima página de um cursor aberto por /api/execute-query com `page_size`"""
+    try:
+        page = await db_executor.run(query_cursors.fetch, request.cursor, request.page_size)
+        return _query_page_response(page)
+    except SessionNotFoundError:
+        raise HTTPException(status_code=404, detail="Cursor expirado, esgotado ou inexistente")
+    except ExecutorSaturatedError as e:
+        raise _executor_saturated(e)
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=f"Erro ao ler a próxima página: {str(e)}")
+
+@app.delete("/api/execute-query/{cursor}")
+async def close_query_cursor(cursor: str):
+    """Fecha um cursor antes do fim da leitura (devolve a conexão ao pool)"""
+    closed = await db_executor.run(query_cursors.close, cursor)
+    return {"success": closed}
+
+@app.get("/api/execute-query/cursors/stats")
+async def get_query_cursor_stats():
+    """Sessões de cursor abertas e limites configurados"""
+    return query_cursors.get_stats()
+
 # ALTERADO: Endpoint para listar tabelas. Agora é POST para receber os detalhes da conexão.
 @app.post("/api/tables")
 async def get_tables(request: ConnectionDetails):
     """Lista todas as tabelas (com seus schemas) do banco de dados especificado."""
     try:
         conn_str = get_db_connection_string(request)
-        conn = pyodbc.connect(conn_str, timeout=5)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT TABLE_SCHEMA, TABLE_NAME 
-            FROM INFORMATION_SCHEMA.TABLES 
-            WHERE TABLE_TYPE = 'BASE TABLE'
-            ORDER BY TABLE_SCHEMA, TABLE_NAME
-        """)
-        
-        # Retorna no formato "schema.tabela"
-        tables = [f"{row.TABLE_SCHEMA}.{row.TABLE_NAME}" for row in cursor.fetchall()]
-        conn.close()
+        tables = await db_executor.run(_list_tables_sync, conn_str)
         
         return {"success": True, "tables": tables}
+    except ExecutorSaturatedError as e:
+        raise _executor_saturated(e)
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(
@@ -216,14 +416,12 @@ async def analyze_financial_risk(request: RiskAnalysisRequest):
         )
     
     try:
-        # Executar análise em thread separada para não bloquear
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None, 
-            lambda: advanced_bert_model.analyze_risk(
-                request.text, 
-                request.include_explanation
-            )
+        # Enfileirar na fila de micro-batching (o lote roda em thread separada)
+        result = await risk_batch_queue.submit(
+            request.text,
+            request.include_explanation,
+            long_document=request.long_document,
+            pooling=request.window_pooling
         )
         
         # Obter informações do modelo para auditoria
@@ -248,6 +446,55 @@ async def analyze_financial_risk(request: RiskAnalysisRequest):
             detail=f"Erro na análise de risco: {str(e)}"
         )
 
+@app.get("/api/analyze-risk/queue-stats")
+async def get_risk_queue_stats():
+    """Profundidade da fila de micro-batching e histograma de tamanhos de lote"""
+    if risk_batch_queue is None:
+        return {
+            "available": False,
+            "message": "Advanced DD-AI v2.1 não está disponível"
+        }
+    
+    return {
+        "available": True,
+        "queue_stats": risk_batch_queue.get_stats()
+    }
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Estatísticas do cache de resultados de análise (formato CacheStats)"""
+    return risk_result_cache.get_stats()
+
+@app.delete("/api/cache")
+async def clear_cache():
+    """Limpa o cache de resultados de análise"""
+    risk_result_cache.clear()
+    return {"success": True, "message": "Cache de resultados limpo"}
+
+@app.get("/api/cnpj-cache/stats")
+async def get_cnpj_cache_stats():
+    """Estatísticas do cache persistente de enriquecimento de CNPJ"""
+    return get_enrichment_service().get_stats()
+
+@app.get("/api/http-cache/stats")
+async def get_http_cache_stats():
+    """Estatísticas do cache HTTP de feeds RSS e páginas de notícias"""
+    return get_http_cache().get_stats()
+
+@app.get("/api/db-pool/stats")
+async def get_db_pool_stats():
+    """Estatísticas do pool de conexões SQL Server"""
+    return db_pool.get_stats()
+
+@app.get("/api/executors/stats")
+async def get_executor_stats():
+    """Ocupação dos pools de threads de banco, de modelo e dos lotes inteligentes"""
+    return {
+        "database": db_executor.get_stats(),
+        "model": model_executor.get_stats(),
+        "batch": batch_executor.get_stats()
+    }
+
 # NOVO: Endpoint para análise de dados do SQL Server
 @app.post("/api/analyze-sql-data")
 async def analyze_sql_data(request: QueryRequest):
@@ -264,30 +511,26 @@ async def analyze_sql_data(request: QueryRequest):
     try:
         # Executar query SQL
         conn_str = get_db_connection_string(request.connection)
-        conn = pyodbc.connect(conn_str, timeout=20)
-        cursor = conn.cursor()
+        columns, rows, _ = await db_executor.run(_run_query_sync, conn_str, request.query)
         
-        cursor.execute(request.query)
-        
-        if cursor.description:
-            columns = [desc[0] for desc in cursor.description]
-            rows = cursor.fetchall()
+        if columns is not None:
             data = [dict(zip(columns, row)) for row in rows]
-            conn.close()
             
-            # Analisar cada linha de dados
+            # Analisar as linhas de dados em lote
+            analyzed_rows = data[:10]  # Limitar a 10 registros para performance
+            # Converter dados em texto para análise
+            texts = [
+                " ".join([f"{k}: {v}" for k, v in row.items() if v is not None])
+                for row in analyzed_rows
+            ]
+            
+            # Executar análise de risco (um forward pass por micro-batch)
+            risk_analyses = await model_executor.run(
+                advanced_bert_model.analyze_risk_batch, texts, include_explanation=False
+            )
+            
             analyses = []
-            for row in data[:10]:  # Limitar a 10 registros para performance
-                # Converter dados em texto para análise
-                text_data = " ".join([f"{k}: {v}" for k, v in row.items() if v is not None])
-                
-                # Executar análise de risco
-                loop = asyncio.get_event_loop()
-                risk_analysis = await loop.run_in_executor(
-                    None,
-                    lambda: advanced_bert_model.analyze_risk(text_data, False)
-                )
-                
+            for row, risk_analysis in zip(analyzed_rows, risk_analyses):
                 analyses.append({
                     "row_data": row,
                     "risk_analysis": {
@@ -312,13 +555,13 @@ async def analyze_sql_data(request: QueryRequest):
                 }
             }
         else:
-            conn.commit()
-            conn.close()
             return {
                 "success": True,
                 "message": "Query executada (não SELECT), análise não aplicável"
             }
             
+    except ExecutorSaturatedError as e:
+        raise _executor_saturated(e)
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(
@@ -359,118 +602,128 @@ async def sql_to_analysis(request: QueryRequest) -> Dict[str, Any]:
     4. Busca notícias (simulado)
     5. Análise de risco com IA
     6. Relatório consolidado
+    
+    Para lotes grandes, use /api/jobs/sql-to-analysis (segundo plano com progresso).
     """
     if not ADVANCED_AI_AVAILABLE or advanced_bert_model is None:
         raise HTTPException(status_code=503, detail="Advanced AI module not available")
     
     try:
-        import time
-        import requests
-        from datetime import datetime
-        import re
-        
-        start_time = time.time()
-        
-        # 1. Executar query SQL
-        connection_string = get_db_connection_string(request.connection)
-        cnx = pyodbc.connect(connection_string)
-        cursor = cnx.cursor()
-        
-        cursor.execute(request.query)
-        columns = [column[0] for column in cursor.description]
-        rows = cursor.fetchall()
+        return await _sql_to_analysis_pipeline(request)
+    except ExecutorSaturatedError as e:
+        raise _executor_saturated(e)
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Erro na análise integrada: {str(e)}")
+
+async def _sql_to_analysis_pipeline(request: QueryRequest,
+                                    progress: Optional[JobProgress] = None) -> Dict[str, Any]:
+    """Pipeline de /api/sql-to-analysis; com `progress`, publica cada empresa analisada"""
+    import time
+    from datetime import datetime
+    
+    start_time = time.time()
+    
+    # 1. Executar query SQL
+    connection_string = get_db_connection_string(request.connection)
+    columns, rows, _ = await db_executor.run(_run_query_sync, connection_string, request.query, None)
+    if columns is None:
+        return {
+            'success': False,
+            'error': 'A query não retornou linhas'
+        }
+    
+    # Extrair CNPJs dos resultados: primeiro CNPJ válido por linha, com as
+    # colunas validadas de forma vetorizada (sem regex por célula)
+    row_cnpjs = first_cnpj_per_row(columns_from_rows(columns, rows))
+    cnpjs = list(dict.fromkeys(row_cnpjs[row_cnpjs != ''].tolist()))
+    
+    if not cnpjs:
+        return {
+            'success': False,
+            'error': 'Nenhum CNPJ encontrado na query'
+        }
+    
+    if progress:
+        progress.set_total(len(cnpjs))
+        progress.message(f"Enriquecendo {len(cnpjs)} CNPJs")
+    
+    # 2. Enriquecer dados via API Brasil (assíncrono, com limite de taxa compartilhado)
+    try:
+        results = await get_enrichment_service().lookup_many_async(cnpjs, fields=COMPANY_SUMMARY_FIELDS)
+    except Exception:
+        results = [None] * len(cnpjs)
+    
+    enriched_data = []
+    for cnpj, result in zip(cnpjs, results):
+        if result is not None and result.success:
+            data = result.data
+            enriched_data.append({
+                'cnpj': cnpj,
+                'razao_social': data.get('razao_social', ''),
+                'nome_fantasia': data.get('nome_fantasia', ''),
+                'situacao': data.get('descricao_situacao_cadastral', ''),
+                'atividade_principal': data.get('cnae_fiscal_descricao', ''),
+                'porte': data.get('porte', ''),
+                'capital_social': data.get('capital_social', 0),
+                'municipio': data.get('municipio', ''),
+                'uf': data.get('uf', ''),
+                'enrichment_success': True
+            })
+        else:
+            enriched_data.append({
+                'cnpj': cnpj,
+                'razao_social': f'CNPJ {cnpj}',
+                'enrichment_success': False
+            })
+    
+    # 3. Montar textos de análise para cada empresa
+    analysis_inputs = []
+    for company_data in enriched_data:
+        # Simular notícias (em produção, integrar APIs reais)
+        news_data = [
+            {
+                'title': f'Análise financeira de {company_data.get("razao_social", "")}',
+                'content': f'Relatório corporativo sobre {company_data.get("razao_social", "")} indicando performance no setor financeiro...',
+                'date': datetime.now().strftime('%Y-%m-%d'),
+                'relevance': 0.85
+            }
+        ]
         
-        # Extrair CNPJs dos resultados
-        cnpjs = []
-        cnpj_pattern = re.compile(r'\d{2}\.?\d{3}\.?\d{3}\/?\d{4}-?\d{2}')
+        # Análise de risco com IA
+        analysis_text = f"""
+        Análise de risco corporativo:
         
-        for row in rows:
-            for value in row:
-                if isinstance(value, str) and cnpj_pattern.match(value):
-                    cnpjs.append(value)
-                    break  # Pegar apenas o primeiro CNPJ por linha
+        Dados da empresa:
+        - Razão Social: {company_data.get('razao_social', 'N/A')}
+        - CNPJ: {company_data.get('cnpj', 'N/A')}
+        - Situação Cadastral: {company_data.get('situacao', 'N/A')}
+        - Atividade Principal: {company_data.get('atividade_principal', 'N/A')}
+        - Porte Empresarial: {company_data.get('porte', 'N/A')}
+        - Capital Social: R$ {company_data.get('capital_social', 0)}
+        - Localização: {company_data.get('municipio', '')}/{company_data.get('uf', '')}
         
-        cursor.close()
-        cnx.close()
+        Contexto de notícias:
+        {news_data[0]['content'][:300]}...
         
-        if not cnpjs:
-            return {
-                'success': False,
-                'error': 'Nenhum CNPJ encontrado na query'
-            }
+        Avalie o risco financeiro considerando compliance regulatório brasileiro.
+        """
         
-        # 2. Enriquecer dados via API Brasil
-        enriched_data = []
-        for cnpj in cnpjs:
-            try:
-                clean_cnpj = ''.join(filter(str.isdigit, cnpj))
-                response = requests.get(f"https://brasilapi.com.br/api/cnpj/v1/{clean_cnpj}", timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    enriched_data.append({
-                        'cnpj': cnpj,
-                        'razao_social': data.get('razao_social', ''),
-                        'nome_fantasia': data.get('nome_fantasia', ''),
-                        'situacao': data.get('descricao_situacao_cadastral', ''),
-                        'atividade_principal': data.get('cnae_fiscal_descricao', ''),
-                        'porte': data.get('porte', ''),
-                        'capital_social': data.get('capital_social', 0),
-                        'municipio': data.get('municipio', ''),
-                        'uf': data.get('uf', ''),
-                        'enrichment_success': True
-                    })
-                else:
-                    enriched_data.append({
-                        'cnpj': cnpj,
-                        'razao_social': f'CNPJ {cnpj}',
-                        'enrichment_success': False
-                    })
-                    
-                time.sleep(0.3)  # Rate limiting
-                
-            except Exception:
-                enriched_data.append({
-                    'cnpj': cnpj,
-                    'razao_social': f'CNPJ {cnpj}',
-                    'enrichment_success': False
-                })
+        analysis_inputs.append((company_data, news_data, analysis_text))
+    
+    # 4. Análise de risco com IA em lotes (resultados parciais publicados a cada lote)
+    if progress:
+        progress.message(f"Analisando risco de {len(analysis_inputs)} empresas")
+    results = []
+    for offset in range(0, len(analysis_inputs), RISK_BATCH_MAX_SIZE):
+        chunk = analysis_inputs[offset:offset + RISK_BATCH_MAX_SIZE]
+        risk_results = await model_executor.run(
+            advanced_bert_model.analyze_risk_batch,
+            [analysis_text for _, _, analysis_text in chunk]
+        )
         
-        # 3. Análise de risco para cada empresa
-        results = []
-        for company_data in enriched_data:
-            # Simular notícias (em produção, integrar APIs reais)
-            news_data = [
-                {
-                    'title': f'Análise financeira de {company_data.get("razao_social", "")}',
-                    'content': f'Relatório corporativo sobre {company_data.get("razao_social", "")} indicando performance no setor financeiro...',
-                    'date': datetime.now().strftime('%Y-%m-%d'),
-                    'relevance': 0.85
-                }
-            ]
-            
-            # Análise de risco com IA
-            analysis_text = f"""
-            Análise de risco corporativo:
-            
-            Dados da empresa:
-            - Razão Social: {company_data.get('razao_social', 'N/A')}
-            - CNPJ: {company_data.get('cnpj', 'N/A')}
-            - Situação Cadastral: {company_data.get('situacao', 'N/A')}
-            - Atividade Principal: {company_data.get('atividade_principal', 'N/A')}
-            - Porte Empresarial: {company_data.get('porte', 'N/A')}
-            - Capital Social: R$ {company_data.get('capital_social', 0)}
-            - Localização: {company_data.get('municipio', '')}/{company_data.get('uf', '')}
-            
-            Contexto de notícias:
-            {news_data[0]['content'][:300]}...
-            
-            Avalie o risco financeiro considerando compliance regulatório brasileiro.
-            """
-            
-            risk_result = advanced_bert_model.analyze_risk(analysis_text)
-            
-            results.append({
+        for (company_data, news_data, _), risk_result in zip(chunk, risk_results):
+            result = {
                 'company_data': company_data,
                 'news_data': news_data,
                 'risk_analysis': {
@@ -482,52 +735,139 @@ async def sql_to_analysis(request: QueryRequest) -> Dict[str, Any]:
                     'regulatory_alerts': risk_result.regulatory_alerts
                 },
                 'processing_time': time.time() - start_time
-            })
-        
-        # 4. Compilar relatório final
-        total_time = time.time() - start_time
-        successful_enrichments = len([r for r in enriched_data if r.get('enrichment_success')])
-        successful_analyses = len(results)
-        
-        risk_levels = [r['risk_analysis']['risk_level'] for r in results]
-        risk_counts = {}
-        for level in risk_levels:
-            risk_counts[level] = risk_counts.get(level, 0) + 1
-        
-        return {
-            'success': True,
-            'metadata': {
-                'query_executed': request.query,
-                'total_cnpjs': len(cnpjs),
-                'successful_enrichments': successful_enrichments,
-                'successful_analyses': successful_analyses,
-                'total_processing_time': total_time,
-                'analysis_date': datetime.now().isoformat()
-            },
-            'risk_distribution': risk_counts,
-            'results': results,
-            'summary': {
-                'companies_analyzed': len(results),
-                'enrichment_success_rate': f"{(successful_enrichments/len(cnpjs)*100):.1f}%",
-                'analysis_success_rate': f"{(successful_analyses/len(cnpjs)*100):.1f}%",
-                'avg_processing_time': f"{total_time/len(cnpjs):.2f}s"
             }
+            results.append(result)
+            if progress:
+                progress.item(result)
+    
+    # 5. Compilar relatório final
+    total_time = time.time() - start_time
+    successful_enrichments = len([r for r in enriched_data if r.get('enrichment_success')])
+    successful_analyses = len(results)
+    
+    risk_levels = [r['risk_analysis']['risk_level'] for r in results]
+    risk_counts = {}
+    for level in risk_levels:
+        risk_counts[level] = risk_counts.get(level, 0) + 1
+    
+    return {
+        'success': True,
+        'metadata': {
+            'query_executed': request.query,
+            'total_cnpjs': len(cnpjs),
+            'successful_enrichments': successful_enrichments,
+            'successful_analyses': successful_analyses,
+            'total_processing_time': total_time,
+            'analysis_date': datetime.now().isoformat()
+        },
+        'risk_distribution': risk_counts,
+        'results': results,
+        'summary': {
+            'companies_analyzed': len(results),
+            'enrichment_success_rate': f"{(successful_enrichments/len(cnpjs)*100):.1f}%",
+            'analysis_success_rate': f"{(successful_analyses/len(cnpjs)*100):.1f}%",
+            'avg_processing_time': f"{total_time/len(cnpjs):.2f}s"
         }
-        
-    except Exception as e:
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Erro na análise integrada: {str(e)}")
+    }
+    
+
+def _summarize_sql_to_analysis(report: Dict[str, Any]) -> str:
+    """Texto de `resultado` do job (ExecucaoJob)"""
+    if not report.get('success'):
+        return report.get('error', 'Nenhuma empresa analisada')
+    high_risk = sum(count for level, count in report['risk_distribution'].items() if level in ("ALTO", "CRÍTICO"))
+    return f"{report['summary']['companies_analyzed']} empresas analisadas, {high_risk} de risco alto/crítico"
+
+# --- JOBS EM SEGUNDO PLANO ---
+
+@app.post("/api/jobs/sql-to-analysis")
+async def start_sql_to_analysis_job(request: QueryRequest):
+    """Mesmo pipeline de /api/sql-to-analysis em segundo plano: devolve o job (ExecucaoJob) na hora"""
+    if not ADVANCED_AI_AVAILABLE or advanced_bert_model is None:
+        raise HTTPException(status_code=503, detail="Advanced AI module not available")
+    
+    return job_manager.start(
+        "sql-to-analysis",
+        lambda progress: _sql_to_analysis_pipeline(request, progress),
+        summarize=_summarize_sql_to_analysis
+    )
+
+@app.get("/api/jobs")
+async def list_jobs(limit: int = 50):
+    """Histórico de execuções (formato ExecucaoJob), mais recentes primeiro"""
+    return job_manager.list(limit)
+
+@app.get("/api/jobs/stats")
+async def get_job_stats():
+    """Jobs em execução e contadores"""
+    return job_manager.get_stats()
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: int):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: int):
+    """Relatório completo de um job concluído"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job ainda não concluído (status: {job['status']})")
+    return job_manager.report(job_id)
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: int, request: Request):
+    """
+    Progresso do job por Server-Sent Events (status, item, message, done)
+    
+    Reconexões retomam do cabeçalho `Last-Event-ID`.
+    """
+    if job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    
+    try:
+        after = int(request.headers.get("last-event-id", "0"))
+    except ValueError:
+        after = 0
+    
+    async def event_stream():
+        async for event in job_manager.events(job_id, after=after):
+            # Comentário SSE mantém a conexão aberta entre eventos
+            yield ": keepalive\n\n" if event is None else format_sse(event)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Endpoints de análise inteligente em lote (api_batch_extension), que recebem
+# a conexão como dicionário no formato de ConnectionDetails
+add_smart_batch_endpoints(app, lambda details: get_db_connection_string(ConnectionDetails(**details)))
 
 if __name__ == "__main__":
     print("🚀 Iniciando DD-AI SQL Server API v3.0.0 na porta 8001...")
     print("🌐 Endpoints disponíveis:")
     print("   - POST /api/test-connection")
-    print("   - POST /api/execute-query") 
+    print("   - POST /api/execute-query (Accept: application/x-ndjson ou application/vnd.apache.arrow.stream)")
+    print("   - POST /api/execute-query/next (Próxima página de um cursor)")
     print("   - POST /api/tables")
     print("   🆕 DD-AI v2.1 Advanced Features:")
     print("   - POST /api/analyze-risk (Análise de risco financeiro)")
+    print("   - GET  /api/analyze-risk/queue-stats (Fila de micro-batching)")
+    print("   - GET  /api/cache/stats (Estatísticas do cache de resultados)")
+    print("   - GET  /api/cnpj-cache/stats (Estatísticas do cache de CNPJ)")
+    print("   - GET  /api/db-pool/stats (Pool de conexões SQL Server)")
+    print("   - GET  /api/http-cache/stats (Cache HTTP de notícias)")
     print("   - POST /api/analyze-sql-data (Query + Análise IA)")
     print("   - POST /api/sql-to-analysis (Query → Enriquecimento → IA) ⭐ NOVO!")
+    print("   - POST /api/smart-batch-analysis, /api/sql-to-smart-batch, /api/detect-data-type (Lote inteligente)")
+    print("   - POST /api/jobs/sql-to-analysis, /api/jobs/smart-batch-analysis, /api/jobs/sql-to-smart-batch (Jobs em segundo plano)")
+    print("   - GET  /api/jobs, /api/jobs/{id}, /api/jobs/{id}/events (SSE), /api/jobs/{id}/result")
     print("   - GET  /api/model-info (Informações do modelo)")
     
     if ADVANCED_AI_AVAILABLE and advanced_bert_model:
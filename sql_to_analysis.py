@@ -17,13 +17,19 @@ import time
 from datetime import datetime
 from typing import List, Dict, Any
 
+from arrow_results import ARROW_STREAM_MEDIA_TYPE, PYARROW_AVAILABLE, iter_arrow_batches
+from cnpj_columns import CNPJCollector, columns_from_rows
+from cnpj_enrichment import COMPANY_SUMMARY_FIELDS, get_enrichment_service
+from cnpj_utils import is_valid_cnpj
+
 class SQLToAnalysis:
-    def __init__(self, api_url: str = "http://127.0.0.1:8001"):
+    def __init__(self, api_url: str = "http://127.0.0.1:8001", page_size: int = 2000):
         self.api_url = api_url
+        self.page_size = page_size
         
     def execute_sql_query(self, connection_details: Dict, query: str) -> List[str]:
         """
-        Executa query SQL e retorna lista de CNPJs
+        Executa query SQL e retorna lista de CNPJs (resultado lido em páginas)
         """
         print(f"🔍 Executando query SQL...")
         print(f"📊 Query: {query}")
@@ -33,48 +39,71 @@ class SQLToAnalysis:
             "query": query
         }
         
+        # CNPJs acumulados página a página: o resultado completo nunca fica em memória
+        collector = CNPJCollector()
+        
         try:
-            response = requests.post(f"{self.api_url}/api/execute-query", json=payload)
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                if result.get('success'):
-                    data = result.get('data', [])
-                    cnpjs = []
-                    
-                    # Extrair CNPJs dos resultados
-                    for row in data:
-                        if isinstance(row, dict):
-                            # Procurar por colunas que podem conter CNPJs
-                            for key, value in row.items():
-                                if isinstance(value, str) and self._is_cnpj(value):
-                                    cnpjs.append(value)
-                        elif isinstance(row, list) and len(row) > 0:
-                            # Se for lista, pegar o primeiro valor
-                            value = row[0]
-                            if isinstance(value, str) and self._is_cnpj(value):
-                                cnpjs.append(value)
-                    
-                    print(f"✅ Query executada com sucesso!")
-                    print(f"📊 CNPJs encontrados: {len(cnpjs)}")
-                    return cnpjs
-                else:
-                    print(f"❌ Erro na query: {result.get('error', 'Erro desconhecido')}")
-                    return []
+            if PYARROW_AVAILABLE:
+                # Record batches Arrow lidos à medida que chegam: as colunas vão direto
+                # para a validação vetorizada, sem parse de JSON
+                success = self._collect_arrow_stream(payload, collector)
             else:
-                print(f"❌ Erro HTTP: {response.status_code}")
-                return []
-                
+                # JSON paginado por cursor no servidor
+                success = self._collect_paged(payload, collector)
         except Exception as e:
             print(f"❌ Erro de conexão: {str(e)}")
             return []
+        
+        if not success:
+            return []
+        
+        print(f"✅ Query executada com sucesso! ({collector.rows_seen} linhas lidas)")
+        print(f"📊 CNPJs encontrados: {len(collector.cnpjs)}")
+        return collector.cnpjs
+    
+    def _collect_arrow_stream(self, payload: Dict, collector: CNPJCollector) -> bool:
+        """Lê o resultado como stream Arrow IPC, um record batch por vez"""
+        headers = {"Accept": ARROW_STREAM_MEDIA_TYPE}
+        with requests.post(f"{self.api_url}/api/execute-query", json=payload,
+                           headers=headers, stream=True) as response:
+            if response.status_code != 200:
+                print(f"❌ Erro HTTP: {response.status_code}")
+                return False
+            if not response.headers.get('content-type', '').startswith(ARROW_STREAM_MEDIA_TYPE):
+                # Query sem resultado (INSERT/UPDATE...): resposta JSON
+                return bool(response.json().get('success'))
+            
+            response.raw.decode_content = True
+            for batch in iter_arrow_batches(response.raw):
+                collector.add({name: batch.column(i) for i, name in enumerate(batch.schema.names)})
+        return True
+    
+    def _collect_paged(self, payload: Dict, collector: CNPJCollector) -> bool:
+        """Lê o resultado em páginas JSON, seguindo o cursor devolvido pela API"""
+        response = requests.post(f"{self.api_url}/api/execute-query",
+                                 json={**payload, "page_size": self.page_size})
+        while True:
+            if response.status_code != 200:
+                print(f"❌ Erro HTTP: {response.status_code}")
+                return False
+            
+            result = response.json()
+            if not result.get('success'):
+                print(f"❌ Erro na query: {result.get('error', 'Erro desconhecido')}")
+                return False
+            
+            data = result.get('data', [])
+            columns = result.get('columns') or (list(data[0].keys()) if data else [])
+            collector.add(columns_from_rows(columns, data))
+            
+            if not result.get('cursor'):
+                return True
+            response = requests.post(f"{self.api_url}/api/execute-query/next",
+                                     json={"cursor": result['cursor'], "page_size": self.page_size})
     
     def _is_cnpj(self, value: str) -> bool:
-        """Verifica se uma string é um CNPJ válido"""
-        import re
-        cnpj_pattern = re.compile(r'\d{2}\.?\d{3}\.?\d{3}\/?\d{4}-?\d{2}')
-        return bool(cnpj_pattern.match(value))
+        """Verifica se uma string é um CNPJ válido (dígitos verificadores inclusos)"""
+        return is_valid_cnpj(value)
     
     def enrich_cnpjs(self, cnpjs: List[str]) -> List[Dict]:
         """
@@ -82,54 +111,52 @@ class SQLToAnalysis:
         """
         print(f"\n🌐 Enriquecendo {len(cnpjs)} CNPJs via API Brasil...")
         
+        # Consultas em paralelo com limite de taxa compartilhado (sem pausa fixa)
+        try:
+            results = get_enrichment_service().lookup_many(
+                cnpjs, fields=COMPANY_SUMMARY_FIELDS + ('data_inicio_atividade',)
+            )
+        except Exception as e:
+            results = [e] * len(cnpjs)
+        
         enriched_data = []
         
-        for i, cnpj in enumerate(cnpjs, 1):
+        for i, (cnpj, result) in enumerate(zip(cnpjs, results), 1):
             print(f"   📊 {i}/{len(cnpjs)}: {cnpj}")
             
-            try:
-                # Limpar CNPJ (remover pontos e traços)
-                clean_cnpj = ''.join(filter(str.isdigit, cnpj))
-                url = f"https://brasilapi.com.br/api/cnpj/v1/{clean_cnpj}"
-                
-                response = requests.get(url, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    enriched_data.append({
-                        'cnpj': cnpj,
-                        'razao_social': data.get('razao_social', ''),
-                        'nome_fantasia': data.get('nome_fantasia', ''),
-                        'situacao': data.get('descricao_situacao_cadastral', ''),
-                        'atividade_principal': data.get('cnae_fiscal_descricao', ''),
-                        'porte': data.get('porte', ''),
-                        'capital_social': data.get('capital_social', 0),
-                        'municipio': data.get('municipio', ''),
-                        'uf': data.get('uf', ''),
-                        'data_abertura': data.get('data_inicio_atividade', ''),
-                        'enrichment_success': True
-                    })
-                    print(f"      ✅ {data.get('razao_social', 'N/A')}")
-                else:
-                    enriched_data.append({
-                        'cnpj': cnpj,
-                        'razao_social': f'CNPJ {cnpj}',
-                        'enrichment_success': False,
-                        'error': f'API retornou {response.status_code}'
-                    })
-                    print(f"      ❌ Erro: {response.status_code}")
-                    
-            except Exception as e:
+            if isinstance(result, Exception):
                 enriched_data.append({
                     'cnpj': cnpj,
                     'razao_social': f'CNPJ {cnpj}',
                     'enrichment_success': False,
-                    'error': str(e)
+                    'error': str(result)
                 })
-                print(f"      ❌ Erro: {str(e)}")
-            
-            # Pausa para não sobrecarregar a API
-            time.sleep(0.5)
+                print(f"      ❌ Erro: {str(result)}")
+            elif result.success:
+                data = result.data
+                enriched_data.append({
+                    'cnpj': cnpj,
+                    'razao_social': data.get('razao_social', ''),
+                    'nome_fantasia': data.get('nome_fantasia', ''),
+                    'situacao': data.get('descricao_situacao_cadastral', ''),
+                    'atividade_principal': data.get('cnae_fiscal_descricao', ''),
+                    'porte': data.get('porte', ''),
+                    'capital_social': data.get('capital_social', 0),
+                    'municipio': data.get('municipio', ''),
+                    'uf': data.get('uf', ''),
+                    'data_abertura': data.get('data_inicio_atividade', ''),
+                    'enrichment_success': True
+                })
+                cache_note = " (cache)" if result.from_cache else ""
+                print(f"      ✅ {data.get('razao_social', 'N/A')}{cache_note}")
+            else:
+                enriched_data.append({
+                    'cnpj': cnpj,
+                    'razao_social': f'CNPJ {cnpj}',
+                    'enrichment_success': False,
+                    'error': result.error
+                })
+                print(f"      ❌ Erro: {result.error}")
         
         return enriched_data
     
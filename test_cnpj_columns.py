@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Teste da validação de CNPJ por coluna (`cnpj_columns`)
+
+Os mesmos CNPJs em cada representação aceita (lista, NumPy, pandas com e
+sem dtype de extensão, pyarrow) devem resultar na mesma forma canônica;
+nulos e valores inválidos resultam em vazio.
+"""
+
+import sys
+
+import numpy as np
+
+from cnpj_columns import scan_cnpj_values
+
+VALID = "11222333000181"
+# CNPJ com zeros à esquerda (numérico: 12 dígitos)
+LEADING_ZEROS = "00360305000104"
+
+
+def _check(name: str, values, expected) -> bool:
+    canonical = [str(value) for value in scan_cnpj_values(values).canonical]
+    ok = canonical == expected
+    print(f"{'✅' if ok else '❌'} {name}: {canonical}")
+    return ok
+
+
+def _cases() -> list:
+    cases = [
+        ("lista de texto", [VALID, "11.222.333/0001-81", "11222333000182", None],
+         [VALID, VALID, "", ""]),
+        ("NumPy inteiro", np.array([11222333000181, int(LEADING_ZEROS), 5]),
+         [VALID, LEADING_ZEROS, ""]),
+    ]
+
+    try:
+        import pandas as pd
+    except ImportError:
+        print("⚠️ pandas não instalado: casos com Series pulados")
+    else:
+        cases += [
+            ("pandas Int64 com pd.NA", pd.Series([11222333000181, pd.NA], dtype="Int64"),
+             [VALID, ""]),
+            ("pandas Int64 com zeros à esquerda", pd.Series([int(LEADING_ZEROS), pd.NA], dtype="Int64"),
+             [LEADING_ZEROS, ""]),
+            ("pandas string com pd.NA", pd.Series(["11.222.333/0001-81", pd.NA], dtype="string"),
+             [VALID, ""]),
+        ]
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        print("⚠️ pyarrow não instalado: casos com arrays Arrow pulados")
+    else:
+        cases += [
+            ("pyarrow int64 com nulo", pa.array([11222333000181, None]), [VALID, ""]),
+            ("pyarrow string com nulo", pa.array(["11.222.333/0001-81", None]), [VALID, ""]),
+        ]
+    return cases
+
+
+def test_scan_cnpj_values():
+    assert all([_check(name, values, expected) for name, values, expected in _cases()])
+
+
+def main():
+    """Função principal de teste"""
+    print("🧪 VALIDAÇÃO DE CNPJ POR COLUNA")
+    print("=" * 50)
+
+    results = [_check(name, values, expected) for name, values, expected in _cases()]
+
+    print(f"\n📊 RESUMO: {sum(results)}/{len(results)} casos OK")
+    return all(results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Teste de paridade entre o backend PyTorch e o backend ONNX Runtime
+
+A cabeça de classificação do modelo base é inicializada aleatoriamente; a
+semente fixa torna o teste reproduzível. A comparação é feita nos logits
+(com tolerância) e a classe prevista só é exigida igual quando a margem
+entre as duas maiores classes supera a tolerância.
+
+Sem onnxruntime ou sem acesso ao modelo (download do Hugging Face), os
+testes são pulados no pytest.
+"""
+
+import os
+import sys
+import tempfile
+
+# Modelo usado no teste (pode apontar para um checkpoint local)
+MODEL_NAME = os.getenv("DDAI_TEST_MODEL", "neuralmind/bert-base-portuguese-cased")
+SEED = int(os.getenv("DDAI_TEST_SEED", "1234"))
+
+SAMPLE_TEXTS = [
+    "Empresa com situação cadastral ativa e capital social de R$ 1.000.000,00.",
+    """Identificada transação suspeita de R$ 150.000,00 entre contas de
+    pessoa física e empresa offshore. Operação fracionada em múltiplas
+    transferências para evitar reportes ao COAF.""",
+    "Fundo sofreu multa da CVM por infração e apresenta falta de liquidez.",
+    "Gestora divulga relatório de sustentabilidade e governança.",
+]
+
+
+def model_available() -> bool:
+    """O modelo de teste pode ser carregado (checkpoint local ou download do Hub)"""
+    from transformers import AutoConfig
+
+    try:
+        AutoConfig.from_pretrained(MODEL_NAME)
+        return True
+    except OSError as e:
+        print(f"⚠️ Modelo {MODEL_NAME} indisponível: {e}")
+        return False
+
+
+def _require_onnx_and_model():
+    import pytest
+
+    pytest.importorskip("onnxruntime")
+    if not model_available():
+        pytest.skip(f"Modelo {MODEL_NAME} indisponível (sem checkpoint local nem acesso ao Hub)")
+
+
+def compute_logits(model, texts):
+    """Logits do backend ativo para os textos pré-processados (um único batch)"""
+    import torch
+
+    processed = [model.financial_patterns.scan(text).normalized_text for text in texts]
+    inputs = model.tokenizer(processed, padding=True, truncation=True, max_length=512, return_tensors="pt")
+    with torch.no_grad():
+        return model._forward_logits(inputs.to(model.device)).float()
+
+
+def compare_results(reference, candidate, reference_logits, candidate_logits, atol: float) -> list:
+    """Compara logits e regras de compliance; retorna a lista de divergências"""
+    problems = []
+    max_diff = (reference_logits - candidate_logits).abs().max().item()
+    if max_diff > atol:
+        problems.append(f"logits diferem em {max_diff:.4f} (tolerância {atol})")
+    # Classe só é comparável quando a margem entre as duas maiores supera o erro permitido
+    top2 = reference_logits.topk(2).values
+    if (top2[0] - top2[1]).item() > 2 * atol and reference_logits.argmax() != candidate_logits.argmax():
+        problems.append(f"risk_level {reference.risk_level} != {candidate.risk_level}")
+    for field in ("risk_factors", "compliance_flags", "financial_entities", "regulatory_alerts"):
+        if getattr(reference, field) != getattr(candidate, field):
+            problems.append(f"{field} diverge")
+    return problems
+
+
+def _check_parity(quantize: bool, atol: float) -> bool:
+    """Exporta o modelo PyTorch para ONNX e compara os resultados"""
+    import torch
+    from advanced_financial_bert import AdvancedFinancialBERT
+    from onnx_inference import ONNX_METADATA_FILENAME
+
+    label = "int8" if quantize else "fp32"
+    print(f"\n⚡ Testando paridade PyTorch x ONNX ({label})...")
+
+    # Cabeça de classificação e adapters LoRA com inicialização reproduzível
+    torch.manual_seed(SEED)
+    torch_model = AdvancedFinancialBERT(model_name=MODEL_NAME, use_qlora=True)
+
+    with tempfile.TemporaryDirectory() as onnx_dir:
+        torch_model.export_onnx(onnx_dir, quantize=quantize)
+        # Resultado de referência após o merge LoRA (mesmos pesos exportados)
+        reference = torch_model.analyze_risk_batch(SAMPLE_TEXTS)
+        reference_logits = compute_logits(torch_model, SAMPLE_TEXTS)
+        metadata_path = os.path.join(onnx_dir, ONNX_METADATA_FILENAME)
+        exported_at = os.stat(metadata_path).st_mtime_ns
+
+        onnx_model = AdvancedFinancialBERT(
+            model_name=MODEL_NAME,
+            inference_backend="onnx",
+            onnx_model_dir=onnx_dir,
+            onnx_quantize=quantize
+        )
+        # A exportação do teste deve ser reaproveitada, não refeita
+        if os.stat(metadata_path).st_mtime_ns != exported_at or onnx_model.onnx_session.quantized != quantize:
+            print("❌ Exportação ONNX não foi reaproveitada")
+            return False
+        candidate = onnx_model.analyze_risk_batch(SAMPLE_TEXTS)
+        candidate_logits = compute_logits(onnx_model, SAMPLE_TEXTS)
+
+    ok = True
+    for i, (ref, cand) in enumerate(zip(reference, candidate)):
+        problems = compare_results(ref, cand, reference_logits[i], candidate_logits[i], atol)
+        if problems:
+            ok = False
+            print(f"❌ Texto {i + 1}: {'; '.join(problems)}")
+        else:
+            print(f"✅ Texto {i + 1}: {ref.risk_level} ({ref.confidence_score:.4f} x {cand.confidence_score:.4f})")
+
+    return ok
+
+
+def _check_export_reuse() -> bool:
+    """A exportação só é reaproveitada com a mesma origem e a quantização pedida"""
+    import json
+    from onnx_inference import ONNX_METADATA_FILENAME, find_exported_model
+
+    print("\n♻️ Testando reaproveitamento da exportação ONNX...")
+    source = {"model_name": MODEL_NAME, "adapter_version": "no-adapter", "checkpoint_hash": "abc"}
+    with tempfile.TemporaryDirectory() as onnx_dir:
+        for filename in ("model.onnx", "model.int8.onnx"):
+            open(os.path.join(onnx_dir, filename), "wb").close()
+        with open(os.path.join(onnx_dir, ONNX_METADATA_FILENAME), "w", encoding="utf-8") as f:
+            json.dump({"model_file": "model.onnx", "model_files": {"fp32": "model.onnx"}, "source": source}, f)
+
+        checks = {
+            "mesma origem (fp32)": find_exported_model(onnx_dir, quantize=False, source=source) is not None,
+            "int8 não exportado": find_exported_model(onnx_dir, quantize=True, source=source) is None,
+            "outro adapter": find_exported_model(
+                onnx_dir, quantize=False, source={**source, "adapter_version": "v2"}
+            ) is None,
+            "outro checkpoint": find_exported_model(
+                onnx_dir, quantize=False, source={**source, "checkpoint_hash": "def"}
+            ) is None,
+        }
+
+    for name, passed in checks.items():
+        print(f"{'✅' if passed else '❌'} {name}")
+    return all(checks.values())
+
+
+def test_export_reuse():
+    assert _check_export_reuse()
+
+
+def test_parity_fp32():
+    _require_onnx_and_model()
+    assert _check_parity(quantize=False, atol=1e-4)
+
+
+def test_parity_int8():
+    _require_onnx_and_model()
+    # int8 dinâmico: logits dentro de uma tolerância maior
+    assert _check_parity(quantize=True, atol=1e-1)
+
+
+def main():
+    """Função principal de teste"""
+    print("🧪 PARIDADE PYTORCH x ONNX RUNTIME")
+    print("=" * 50)
+
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError as e:
+        print(f"❌ ONNX Runtime: {e}")
+        return False
+    if not model_available():
+        return False
+
+    reuse_ok = _check_export_reuse()
+    fp32_ok = _check_parity(quantize=False, atol=1e-4)
+    # int8 dinâmico: logits dentro de uma tolerância maior
+    int8_ok = _check_parity(quantize=True, atol=1e-1)
+
+    print("\n📊 RESUMO DOS TESTES:")
+    print(f"   Reaproveitamento da exportação: {'✅' if reuse_ok else '❌'}")
+    print(f"   ONNX fp32: {'✅' if fp32_ok else '❌'}")
+    print(f"   ONNX int8: {'✅' if int8_ok else '❌'}")
+
+    return reuse_ok and fp32_ok and int8_ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Teste de concorrência da sql_api: uma query lenta não pode travar o event loop
+
+Sobe a API com um driver pyodbc simulado (a query "WAITFOR" leva
+SLOW_QUERY_SECONDS), dispara a query lenta e, enquanto ela roda, mede o
+health check (GET /) e a listagem de tabelas em paralelo.
+"""
+
+import contextlib
+import os
+import socket
+import sys
+import threading
+import time
+import types
+from collections import namedtuple
+
+SLOW_QUERY_SECONDS = float(os.getenv("DDAI_SLOW_QUERY_SECONDS", "10"))
+MAX_HEALTH_LATENCY = 0.5
+
+
+# Módulos trocados durante o teste (restaurados ao final, ver running_api)
+_PATCHED_MODULES = (
+    "pyodbc", "advanced_financial_bert", "sql_api",
+    # Importam o pyodbc simulado e guardam pools/threads compartilhados
+    "db_pool", "query_streaming", "cursor_sessions", "blocking_executors", "job_manager",
+)
+
+# Singletons `get_*()` dos módulos acima, zerados ao final do teste
+_SHARED_SINGLETONS = {
+    "db_pool": ("_shared_registry",),
+    "cursor_sessions": ("_shared_manager",),
+    "blocking_executors": ("_db_executor", "_model_executor", "_batch_executor"),
+    "job_manager": ("_shared_manager",),
+}
+
+
+def install_slow_driver():
+    """Registra um módulo `pyodbc` simulado cujo execute('WAITFOR...') bloqueia a thread"""
+    pyodbc = types.ModuleType("pyodbc")
+
+    class Error(Exception):
+        pass
+
+    # Como pyodbc.Row: acesso por posição e por nome de coluna
+    Row = namedtuple("Row", ["TABLE_SCHEMA", "TABLE_NAME"])
+
+    class Cursor:
+        def __init__(self):
+            self.description = None
+            self.rowcount = 0
+            self._rows = []
+
+        def execute(self, query):
+            if "WAITFOR" in query.upper():
+                time.sleep(SLOW_QUERY_SECONDS)
+            self.description = [("TABLE_SCHEMA", str, None, 128, 128, 0, True),
+                                ("TABLE_NAME", str, None, 128, 128, 0, True)]
+            self._rows = [Row("dbo", "empresas")]
+            return self
+
+        def fetchall(self):
+            rows, self._rows = self._rows, []
+            return rows
+
+        def fetchmany(self, size):
+            rows, self._rows = self._rows[:size], self._rows[size:]
+            return rows
+
+        def fetchone(self):
+            return ("Microsoft SQL Server - simulado", "teste")
+
+        def close(self):
+            pass
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            pass
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    pyodbc.Error = Error
+    pyodbc.connect = lambda conn_str, timeout=None: Connection()
+    sys.modules["pyodbc"] = pyodbc
+    # O teste mede só o event loop; o modelo não precisa ser carregado
+    sys.modules["advanced_financial_bert"] = None
+
+
+def start_server():
+    import uvicorn
+    from sql_api import app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def reset_shared_singletons():
+    """Zera os singletons dos módulos carregados pelo teste (já fechados no shutdown da API)"""
+    for module_name, attributes in _SHARED_SINGLETONS.items():
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        for attribute in attributes:
+            setattr(module, attribute, None)
+
+
+@contextlib.contextmanager
+def running_api():
+    """API com o driver simulado; desfaz o registro dos módulos ao sair"""
+    saved = {name: sys.modules.get(name) for name in _PATCHED_MODULES}
+    install_slow_driver()
+    # Reimportados com o driver simulado e singletons novos
+    for name in _PATCHED_MODULES[2:]:
+        sys.modules.pop(name, None)
+    server, thread, base_url = start_server()
+    try:
+        yield base_url
+    finally:
+        # Shutdown da API: fecha pools, cursores, executores e jobs antes de restaurar
+        server.should_exit = True
+        thread.join(timeout=10)
+        reset_shared_singletons()
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+def _check_slow_query(base_url: str) -> bool:
+    import httpx
+
+    connection = {"server": "localhost", "database": "teste"}
+    slow_result = {}
+
+    def run_slow_query():
+        start = time.perf_counter()
+        response = httpx.post(f"{base_url}/api/execute-query",
+                              json={"connection": connection, "query": "WAITFOR DELAY '00:00:10'"},
+                              timeout=SLOW_QUERY_SECONDS + 30)
+        slow_result["status"] = response.status_code
+        slow_result["elapsed"] = time.perf_counter() - start
+
+    print(f"🐢 Disparando query de {SLOW_QUERY_SECONDS:.0f}s...")
+    slow = threading.Thread(target=run_slow_query)
+    slow.start()
+    time.sleep(0.5)
+
+    ok = True
+    with httpx.Client(base_url=base_url, timeout=5) as client:
+        for _ in range(5):
+            start = time.perf_counter()
+            response = client.get("/")
+            elapsed = time.perf_counter() - start
+            fast = response.status_code == 200 and elapsed < MAX_HEALTH_LATENCY
+            ok &= fast
+            print(f"{'✅' if fast else '❌'} GET / durante a query lenta: {elapsed * 1000:.1f} ms")
+
+        start = time.perf_counter()
+        response = client.post("/api/tables", json=connection)
+        elapsed = time.perf_counter() - start
+        fast = response.status_code == 200 and elapsed < MAX_HEALTH_LATENCY
+        ok &= fast
+        print(f"{'✅' if fast else '❌'} POST /api/tables durante a query lenta: {elapsed * 1000:.1f} ms")
+
+        stats = client.get("/api/executors/stats").json()
+        print(f"📊 Pool de banco: {stats['database']}")
+
+    slow.join()
+    finished = slow_result.get("status") == 200 and slow_result["elapsed"] >= SLOW_QUERY_SECONDS
+    ok &= finished
+    print(f"{'✅' if finished else '❌'} Query lenta concluída: HTTP {slow_result.get('status')} "
+          f"em {slow_result.get('elapsed', 0):.1f}s")
+    return ok
+
+
+def test_slow_query_does_not_block():
+    with running_api() as base_url:
+        assert _check_slow_query(base_url)
+
+
+def main():
+    print("🧪 Teste de concorrência da sql_api")
+    print("=" * 40)
+
+    with running_api() as base_url:
+        ok = _check_slow_query(base_url)
+
+    print("=" * 40)
+    print("🎉 Event loop livre durante a query lenta" if ok else "❌ Event loop bloqueado pela query")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)